@@ -0,0 +1,253 @@
+import argparse
+import compileall
+import itertools
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, Any, Callable, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from src.core.competitors import CompetitorIndex
+from src.core.encoding import INDENTED, PageEncoding
+from src.core.orchestration import Orchestrator
+from src.core.templates import TemplateEngine, FAQ_TEMPLATE, PRODUCT_PAGE_TEMPLATE, COMPARISON_PAGE_TEMPLATE
+from benchmarks.synthetic import iter_products
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_SIZES = (1000,)
+FIXTURE_SIZE = 512
+COMPETITOR_CATALOG_SIZE = 20000
+# Command lines of main.py whose cold start is measured.
+STARTUP_COMMANDS = {
+    "startup.help": ["--help"],
+    "startup.run.faq_page": ["--page", "faq_page"],
+    "startup.run.all_pages": [],
+}
+
+
+def time_call(fn: Callable[[], Any], min_time: float = 0.2, repeat: int = 5) -> float:
+    """
+    Returns the best observed seconds per call of ``fn``, timeit-style.
+
+    The number of calls per round is scaled until a round takes at least ``min_time / repeat``.
+    """
+    number = 1
+    target = min_time / repeat
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= target:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(target / elapsed) + 1))
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def _rotating(fn: Callable[[Any], Any], inputs: List[Any]) -> Callable[[], Any]:
+    items = itertools.cycle(inputs)
+    return lambda: fn(next(items))
+
+
+def micro_benchmarks(orchestrator: Orchestrator) -> Dict[str, Callable[[], Any]]:
+    """
+    Builds one benchmark per agent and per template rendering path.
+
+    Each benchmark processes a single product per call, rotating over a fixed set of
+    synthetic products so that field lengths vary between calls.
+    """
+    raws = list(iter_products(FIXTURE_SIZE, seed=1))
+    products = [orchestrator.parse(raw) for raw in raws]
+    artifacts = [orchestrator.executor.run({"product": p}, [orchestrator.target]) for p in products]
+    contexts = [{"product": a["product"], "questions": a["questions"], "content_blocks": a["content_blocks"],
+                 "competitor": a["competitor"]} for a in artifacts]
+    engine = TemplateEngine()
+    compiled = {name: engine.compile(t) for name, t in (
+        ("faq", FAQ_TEMPLATE), ("product", PRODUCT_PAGE_TEMPLATE), ("comparison", COMPARISON_PAGE_TEMPLATE))}
+    templates = {"faq": FAQ_TEMPLATE, "product": PRODUCT_PAGE_TEMPLATE, "comparison": COMPARISON_PAGE_TEMPLATE}
+
+    benchmarks = {
+        "agent.DataParserAgent": _rotating(orchestrator.data_parser.run, raws),
+        "agent.QuestionGeneratorAgent": _rotating(orchestrator.question_generator.run, products),
+        "agent.CompetitorGenerationAgent": _rotating(orchestrator.competitor_generator.run, products),
+        "agent.ContentLogicAgent": _rotating(
+            lambda a: orchestrator.content_logic.run(a["product"], a["competitor"]), artifacts),
+        "agent.PageAssemblerAgent": _rotating(orchestrator.page_assembler.invoke, artifacts),
+        "agent.ValidationAgent": _rotating(orchestrator.validator.run, [a["pages"] for a in artifacts]),
+        "validation.schema": _rotating(orchestrator.validator.schema.validate, [a["pages"] for a in artifacts]),
+    }
+    index = CompetitorIndex.build(iter_products(COMPETITOR_CATALOG_SIZE, seed=3))
+    benchmarks["competitors.top_k"] = _rotating(index.top_k, products)
+    for name, template in templates.items():
+        benchmarks[f"template.render.{name}"] = _rotating(lambda c, t=template: engine.render(t, c), contexts)
+        benchmarks[f"template.compiled.{name}"] = _rotating(compiled[name].render, contexts)
+    pages = [a["pages"] for a in artifacts]
+    benchmarks["json.dumps.indented"] = _rotating(lambda p: json.dumps(p, indent=2).encode('utf-8'), pages)
+    for name, encoding in (("indented", INDENTED), ("compact", PageEncoding(compact=True))):
+        benchmarks[f"json.template.{name}"] = _rotating(
+            lambda a, e=encoding: orchestrator.page_assembler.encode(orchestrator.page_assembler.templates, a, e),
+            artifacts)
+    return benchmarks
+
+
+def end_to_end(orchestrator: Orchestrator, size: int) -> float:
+    """
+    Returns the seconds per product of the full agent chain over ``size`` synthetic products.
+
+    Records are generated lazily and pages are discarded, so the measurement excludes disk I/O.
+    """
+    records = enumerate(iter_products(size, seed=2))
+    start = time.perf_counter()
+    failures = 0
+    for _, _, _, error in orchestrator.iter_pages(records):
+        failures += error is not None
+    elapsed = time.perf_counter() - start
+    if failures:
+        raise RuntimeError(f"{failures} synthetic products failed end-to-end")
+    return elapsed / size
+
+
+def startup_time(args: List[str], repeat: int = 10) -> float:
+    """
+    Returns the best wall time of ``main.py`` with ``args`` in a new interpreter, writing the
+    pages of the sample product to a temporary directory.
+
+    The bytecode of the package is compiled first, as it is in an installed copy.
+    """
+    compileall.compile_dir(os.path.join(ROOT, "src"), quiet=1)
+    best = float("inf")
+    with tempfile.TemporaryDirectory() as output_dir:
+        command = [sys.executable, os.path.join(ROOT, "main.py"), "--output", output_dir, *args]
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+            best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmarks(sizes: Tuple[int, ...] = DEFAULT_SIZES, min_time: float = 0.2,
+                   only: str = "") -> Dict[str, Any]:
+    """
+    Runs the micro-benchmarks, the end-to-end throughput benchmarks and the cold start
+    benchmarks of the command line.
+
+    Returns:
+        Dict[str, Any]: ``{"meta": {...}, "results": {name: {"seconds_per_op", "ops_per_sec"}}}``.
+    """
+    logging.disable(logging.INFO)
+    orchestrator = Orchestrator()
+    results = {}
+
+    def record(name: str, seconds: float) -> None:
+        results[name] = {"seconds_per_op": seconds, "ops_per_sec": 1.0 / seconds if seconds else 0.0}
+        print(f"{name:<45} {seconds * 1e6:>12.2f} us/op {results[name]['ops_per_sec']:>14.1f} ops/s")
+
+    for name, fn in micro_benchmarks(orchestrator).items():
+        if only in name:
+            record(name, time_call(fn, min_time=min_time))
+    for size in sizes:
+        name = f"orchestrator.e2e.{size}"
+        if only in name:
+            record(name, end_to_end(orchestrator, size))
+    for name, args in STARTUP_COMMANDS.items():
+        if only in name:
+            record(name, startup_time(args))
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Lists the benchmarks whose time per operation grew by more than ``threshold`` (a fraction).
+
+    Benchmarks missing from either side are ignored.
+    """
+    regressions = []
+    for name, result in sorted(current["results"].items()):
+        base = baseline["results"].get(name)
+        if base is None or not base["seconds_per_op"]:
+            continue
+        change = result["seconds_per_op"] / base["seconds_per_op"] - 1.0
+        status = "REGRESSION" if change > threshold else "ok"
+        print(f"{name:<45} {change:>+8.1%}  {status}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def _load(path: str) -> Dict[str, Any]:
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _save(path: str, data: Dict[str, Any]) -> None:
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Kasparro content generation benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Run the benchmark suite")
+    run.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                     help="End-to-end catalog sizes, e.g. 1000 100000 1000000")
+    run.add_argument("--min-time", type=float, default=0.2, help="Minimum seconds spent per micro-benchmark")
+    run.add_argument("--only", default="", help="Only run benchmarks whose name contains this string")
+    run.add_argument("--output", "-o", default=None, help="Write the results to this JSON file")
+    run.add_argument("--save-baseline", action="store_true", help="Store the results as the new baseline")
+    run.add_argument("--compare", action="store_true", help="Compare the results against the baseline")
+
+    cmp = sub.add_parser("compare", help="Compare a results file against the baseline")
+    cmp.add_argument("results", help="Results JSON written by 'run --output'")
+
+    for p in (run, cmp):
+        p.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+        p.add_argument("--threshold", type=float, default=0.10,
+                       help="Allowed slowdown before a benchmark counts as a regression (fraction)")
+
+    args = parser.parse_args()
+    comparing = args.command == "compare" or args.compare
+    if comparing and not (args.command == "run" and args.save_baseline) and not os.path.exists(args.baseline):
+        sys.exit(f"No baseline at {args.baseline}; run with --save-baseline first")
+    if args.command == "run":
+        current = run_benchmarks(tuple(args.sizes), args.min_time, args.only)
+        if args.output:
+            _save(args.output, current)
+        if args.save_baseline:
+            _save(args.baseline, current)
+            print(f"Baseline saved to {args.baseline}")
+        if not args.compare:
+            return
+    else:
+        current = _load(args.results)
+
+    regressions = compare(current, _load(args.baseline), args.threshold)
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    print("No regressions.")
+
+
+if __name__ == "__main__":
+    main()
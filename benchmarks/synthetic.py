@@ -0,0 +1,79 @@
+import argparse
+import json
+import random
+from typing import Dict, Any, Iterator
+
+_WORDS = ("Glow", "Boost", "Radiance", "Hydra", "Pure", "Derma", "Velvet", "Aqua", "Luminous",
+          "Calm", "Renew", "Silk", "Bright", "Daily", "Night", "Rose", "Matcha", "Cica")
+_FORMS = ("Serum", "Cream", "Toner", "Essence", "Gel", "Lotion", "Mask", "Oil", "Balm")
+_INGREDIENTS = ("Vitamin C", "Hyaluronic Acid", "Niacinamide", "Retinol", "Ceramides", "Peptides",
+                "Salicylic Acid", "Glycolic Acid", "Squalane", "Centella Asiatica", "Zinc PCA",
+                "Green Tea Extract", "Bakuchiol", "Panthenol", "Allantoin", "Água Termal", "Ginseng")
+_BENEFITS = ("Brightening", "Fades dark spots", "Deep hydration", "Reduces fine lines", "Soothes redness",
+             "Controls oil", "Minimises pores", "Evens skin tone", "Strengthens barrier",
+             "Smooths texture", "Boosts radiance", "Calms irritation", "Firms skin", "Unclogs pores")
+_SKIN_TYPES = ("Oily", "Dry", "Combination", "Normal", "Sensitive", "Acne-prone", "Mature")
+_SIDE_EFFECTS = ("", "Mild tingling for sensitive skin", "Possible dryness during the first week",
+                 "May cause photosensitivity; use sunscreen", "Temporary redness")
+_PRICE_FORMATS = ("₹{:,}", "${:,}.99", "€{},50", "£{}.00", "¥{:,}", "Rs. {}", "{} ₽")
+
+
+def generate_product(rng: random.Random, index: int) -> Dict[str, Any]:
+    """
+    Builds one raw product record (input JSON format) from a seeded random generator.
+
+    Field lengths, the number of comma-separated benefits (1-14) and the currency and
+    formatting of the price all vary between records.
+    """
+    name_words = rng.sample(_WORDS, rng.randint(1, 4))
+    strength = rng.choice((2, 5, 10, 15, 20))
+    ingredients = rng.sample(_INGREDIENTS, rng.randint(1, 6))
+    benefits = rng.sample(_BENEFITS, rng.randint(1, len(_BENEFITS)))
+    steps = rng.randint(1, 4)
+    how_to_use = " then ".join(
+        f"apply {rng.randint(1, 5)} drops to {rng.choice(('face', 'neck', 'damp skin', 'clean skin'))}"
+        for _ in range(steps)
+    ).capitalize()
+    return {
+        "SKU": f"SYN-{index:08d}",
+        "Product Name": f"{' '.join(name_words)} {ingredients[0]} {rng.choice(_FORMS)}",
+        "Concentration": f"{strength}% {ingredients[0]}",
+        "Skin Type": ", ".join(rng.sample(_SKIN_TYPES, rng.randint(1, 3))),
+        "Key Ingredients": ", ".join(ingredients),
+        "Benefits": ", ".join(benefits),
+        "How to Use": how_to_use,
+        "Side Effects": rng.choice(_SIDE_EFFECTS),
+        "Price": rng.choice(_PRICE_FORMATS).format(rng.randint(199, 49999)),
+    }
+
+
+def iter_products(count: int, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """
+    Yields ``count`` synthetic raw product records; the same seed always yields the same catalog.
+    """
+    rng = random.Random(seed)
+    for index in range(count):
+        yield generate_product(rng, index)
+
+
+def write_catalog(path: str, count: int, seed: int = 0) -> None:
+    """
+    Writes a synthetic catalog as JSONL.
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in iter_products(count, seed):
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write('\n')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write a deterministic synthetic product catalog (JSONL)")
+    parser.add_argument("output", help="Path of the JSONL file to write")
+    parser.add_argument("--count", "-n", type=int, default=1000, help="Number of products")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+    write_catalog(args.output, args.count, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,28 +6,173 @@ import argparse
 # Add src to python path to allow imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from src.core.orchestration import Orchestrator
-
-def setup_logging():
-    """Configures the logging settings."""
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
+# Only the registry is imported up front, so that --help and argument errors return at once
+# and each run only imports what it uses.
+from src.core.registry import (AGENTS, COMPRESSIONS, EXECUTION_MODES, GENERATION_BACKENDS, JSON_BACKENDS,
+                               LOG_FORMATS, PAGES, PIPELINE_STAGES, SINKS)
 
 def main():
     """Main entry point for the application."""
-    setup_logging()
     logger = logging.getLogger(__name__)
 
     parser = argparse.ArgumentParser(description="Kasparro AI Agentic Content Generation System")
     parser.add_argument("--input", "-i", default="data/input_product.json", help="Path to input JSON file")
     parser.add_argument("--output", "-o", default="output", help="Directory for output files")
+    parser.add_argument("--batch", action="store_true", help="Treat the input as a JSON array or JSONL catalog of products")
+    parser.add_argument("--stream", action="store_true", help="Stream a JSONL or JSON array catalog record by record into <page>.jsonl outputs")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Run the catalog through a staged in-process pipeline with bounded queues")
+    parser.add_argument("--stage-workers", action="append", default=[], metavar="STAGE=N",
+                        help=f"Worker threads of a pipeline stage ({', '.join(PIPELINE_STAGES)}; repeatable)")
+    parser.add_argument("--queue-size", type=int, default=64, help="Capacity of the queue in front of each pipeline stage")
+    parser.add_argument("--workers", "-w", type=int, default=None, help="Worker processes for batch mode (default: CPU count)")
+    parser.add_argument("--csv-workers", type=int, default=0,
+                        help="Threads decoding the blocks of a CSV or TSV catalog (default: 0, decoded as read)")
+    parser.add_argument("--cache", nargs="?", const="", default=None, metavar="PATH",
+                        help="Skip products whose pages are up to date, using a build cache index "
+                             "(default location: <output>/.build_cache.sqlite)")
+    parser.add_argument("--cache-size", type=int, default=1_000_000, help="Maximum number of build cache entries kept")
+    parser.add_argument("--force", action="store_true", help="Regenerate every product even when it is cached")
+    parser.add_argument("--executor", choices=EXECUTION_MODES, default="sequential",
+                        help="How independent agents are scheduled for each product")
+    parser.add_argument("--agent-timeout", type=float, default=None, help="Seconds allowed per agent attempt (thread/asyncio executors)")
+    parser.add_argument("--agent-retries", type=int, default=0, help="Additional attempts for a failing agent")
+    parser.add_argument("--metrics", nargs="?", const="", default=None, metavar="DIR",
+                        help="Record per-agent timings and sizes and export agent_metrics.json/.prom "
+                             "(default location: the output directory)")
+    parser.add_argument("--trace-memory", action="store_true", help="Also record per-agent allocation peaks with tracemalloc")
+    parser.add_argument("--profile", default=None, metavar="PATH", help="Write a cProfile stats file for the whole run")
+    parser.add_argument("--question-bank", default=None, metavar="PATH",
+                        help="JSON file with the FAQ question bank to use instead of the built-in one")
+    parser.add_argument("--question-limit", action="append", default=[], metavar="CATEGORY=N",
+                        help="Maximum number of FAQ questions for a category (repeatable)")
+    parser.add_argument("--competitors", default=None, metavar="PATH",
+                        help="Competitor catalog (JSON, JSONL, CSV or TSV) or saved competitor index to compare against")
+    parser.add_argument("--variant", action="append", default=[], metavar="LOCALE[:VARIANT]",
+                        help="Also render the pages in this locale and A/B copy variant, e.g. fr or en:b, "
+                             "as <page>.<locale>[-<variant>] (repeatable)")
+    parser.add_argument("--page", action="append", default=[], metavar="NAME",
+                        help="Only render this page, e.g. faq_page, or also a plugin page (repeatable; "
+                             f"default: {', '.join(PAGES.builtins())})")
+    parser.add_argument("--agent", action="append", default=[], metavar="NAME",
+                        help="Run this plugin agent, in place of the built-in agent producing the same "
+                             "artifact (repeatable)")
+    parser.add_argument("--generator", default=None, metavar="NAME",
+                        help="Rewrite product descriptions and FAQ answers with a text-generation backend "
+                             f"({', '.join(GENERATION_BACKENDS.builtins())} or a plugin; "
+                             "stub: offline backend returning the rule-based text)")
+    parser.add_argument("--generator-latency", type=float, default=0.0,
+                        help="Simulated seconds per request of the stub generation backend")
+    parser.add_argument("--generator-batch-size", type=int, default=16, help="Prompts sent per generation request")
+    parser.add_argument("--generator-concurrency", type=int, default=4,
+                        help="Generation requests in flight at a time (per process)")
+    parser.add_argument("--generator-retries", type=int, default=2, help="Additional attempts for a failed generation request")
+    parser.add_argument("--generator-cache", default=None, metavar="PATH",
+                        help="Response cache of the generation backend (default: <output>/.generation_cache.sqlite)")
+    parser.add_argument("--competitor-index", default=None, metavar="PATH",
+                        help="Where the competitor index is saved and reused "
+                             "(default: <output>/.competitor_index.kcidx)")
+    parser.add_argument("--sink", choices=SINKS, default=None,
+                        help="Output store for batch/stream mode: one JSON file per page (dir), "
+                             "compressed JSONL shards (jsonl), a SQLite table (sqlite) or compressed "
+                             "shards of deduplicated pages (fragments)")
+    parser.add_argument("--shards", type=int, default=16,
+                        help="Number of shards written by the jsonl and fragments sinks")
+    parser.add_argument("--compression", choices=COMPRESSIONS, default=None,
+                        help="Compression of the jsonl and fragments sinks (default: zstd if installed, else gzip)")
+    parser.add_argument("--shard", default=None, metavar="I/N",
+                        help="Only process shard I of N (0-based) of the catalog in batch mode")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip the products completed by an interrupted batch run into the same output")
+    parser.add_argument("--checkpoint-every", type=int, default=1000,
+                        help="Completed products between two progress manifest checkpoints in batch mode")
+    parser.add_argument("--merge", nargs="+", default=None, metavar="DIR",
+                        help="Merge the outputs and manifests of (sharded) batch runs into --output")
+    parser.add_argument("--index", nargs="?", const="", default=None, metavar="PATH",
+                        help="Keep a full-text index of the pages written, for --search "
+                             "(default location: <output>/.page_index.sqlite)")
+    parser.add_argument("--search", default=None, metavar="QUERY",
+                        help="Print the indexed page texts matching an FTS5 query, e.g. 'niacinamide' "
+                             "or '\"sensitive skin\"', instead of generating pages")
+    parser.add_argument("--search-page", default=None, metavar="PAGE", help="Only search this page type, e.g. faq_page")
+    parser.add_argument("--search-field", default=None, metavar="FIELD",
+                        help="Only search this field, e.g. answer, question or verdict")
+    parser.add_argument("--search-limit", type=int, default=20, help="Maximum number of search results")
+    parser.add_argument("--search-products", action="store_true",
+                        help="Print the matching product keys instead of the matching texts")
+    parser.add_argument("--compact", action="store_true",
+                        help="Write compact JSON (no indentation or spaces after separators)")
+    parser.add_argument("--json-backend", choices=JSON_BACKENDS, default="json",
+                        help="JSON encoder for the pages: the standard library (json) or orjson if installed")
+    parser.add_argument("--chunk-size", type=int, default=64, help="Records sent to a worker at a time in batch mode")
+    parser.add_argument("--serve", action="store_true",
+                        help="Serve on-demand renders over HTTP (POST /render, GET /healthz, GET /metrics)")
+    parser.add_argument("--host", default="127.0.0.1", help="Address the server listens on")
+    parser.add_argument("--port", type=int, default=8080, help="Port the server listens on")
+    parser.add_argument("--socket", default=None, metavar="PATH", help="Listen on a Unix domain socket instead of a TCP port")
+    parser.add_argument("--render-cache-size", type=int, default=1024, help="Rendered products kept in the server's LRU cache")
+    parser.add_argument("--log-level", choices=("DEBUG", "INFO", "WARNING", "ERROR"), default="INFO",
+                        help="Lowest level logged (DEBUG adds a record per agent and product)")
+    parser.add_argument("--log-format", choices=LOG_FORMATS, default="text",
+                        help="Log lines as text or as one JSON object per line")
+    parser.add_argument("--log-sample", action="append", default=[], metavar="EVENT=RATE",
+                        help="Share (0-1) of the records of an event type that are logged, e.g. "
+                             "agent.start=0.01 (repeatable; warnings and errors are always logged)")
     
     args = parser.parse_args()
+    from src.core.logs import event, parse_sampling, setup_logging
+    try:
+        sampling = parse_sampling(args.log_sample)
+    except ValueError as e:
+        parser.error(str(e))
+    setup_logging(args.log_level, args.log_format, sampling)
+
+    question_limits = {}
+    for limit in args.question_limit:
+        category, _, count = limit.partition("=")
+        if not count.isdigit():
+            parser.error(f"Invalid --question-limit '{limit}', expected CATEGORY=N")
+        question_limits[category] = int(count)
+    for variant in args.variant:
+        from src.core.variants import VariantSpec
+        try:
+            VariantSpec.parse(variant)
+        except ValueError as e:
+            parser.error(f"Invalid --variant '{variant}': {e}")
+    for option, names, registry in (("--page", args.page, PAGES), ("--agent", args.agent, AGENTS),
+                                    ("--generator", [args.generator] if args.generator else [], GENERATION_BACKENDS)):
+        for name in names:
+            if name not in registry:
+                parser.error(f"Unknown {option} '{name}', expected one of {', '.join(registry)}")
+    stage_workers = {}
+    for workers in args.stage_workers:
+        stage, _, count = workers.partition("=")
+        if stage not in PIPELINE_STAGES or not count.isdigit() or int(count) < 1:
+            parser.error(f"Invalid --stage-workers '{workers}', expected STAGE=N with STAGE one of {PIPELINE_STAGES}")
+        stage_workers[stage] = int(count)
+    if args.csv_workers < 0:
+        parser.error("--csv-workers must be at least 0")
+    if sum((args.batch, args.stream, args.pipeline, args.serve)) > 1:
+        parser.error("Choose only one of --batch, --stream, --pipeline and --serve")
+    if args.sink is not None and not (args.batch or args.stream or args.pipeline):
+        parser.error("--sink requires --batch, --stream or --pipeline")
+    if (args.shard or args.resume) and not args.batch:
+        parser.error("--shard and --resume require --batch")
+    if args.merge and (args.batch or args.stream or args.pipeline or args.serve):
+        parser.error("--merge cannot be combined with --batch, --stream, --pipeline or --serve")
+    if args.search is not None and (args.batch or args.stream or args.pipeline or args.serve or args.merge):
+        parser.error("--search cannot be combined with --batch, --stream, --pipeline, --serve or --merge")
+    if args.index is not None and args.search is None and (args.serve or args.merge):
+        parser.error("--index cannot be combined with --serve or --merge")
+    if args.index is not None and args.stream and args.sink is None:
+        parser.error("--index in stream mode requires --sink")
+    shard = None
+    if args.shard:
+        from src.core.checkpoint import ShardSpec
+        try:
+            shard = ShardSpec.parse(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
 
     base_dir = os.path.dirname(os.path.abspath(__file__))
     
@@ -35,15 +180,148 @@ def main():
     input_path = args.input if os.path.isabs(args.input) else os.path.join(base_dir, args.input)
     output_dir = args.output if os.path.isabs(args.output) else os.path.join(base_dir, args.output)
     
+    if args.merge:
+        from src.core.checkpoint import merge_outputs
+        try:
+            manifest = merge_outputs(args.merge, output_dir)
+        except Exception as e:
+            logger.critical(f"Merge failed: {e}")
+            sys.exit(1)
+        logger.info(f"Merged {len(manifest.completed)} products from {len(args.merge)} directories into {output_dir}")
+        return
+
+    index_path = args.index or os.path.join(output_dir, ".page_index.sqlite")
+    if args.search is not None:
+        from src.core.search import PageIndex
+        if not os.path.exists(index_path):
+            logger.critical(f"No page index at {index_path} (build one with --index)")
+            sys.exit(1)
+        index = PageIndex(index_path)
+        try:
+            if args.search_products:
+                for key in index.products(args.search, args.search_page, args.search_field, args.search_limit):
+                    print(key)
+            else:
+                for hit in index.search(args.search, args.search_page, args.search_field, args.search_limit):
+                    print("\t".join(hit))
+        except ValueError as e:
+            logger.critical(str(e))
+            sys.exit(1)
+        finally:
+            index.close()
+        return
+
     logger.info(f"Input path: {input_path}")
     logger.info(f"Output directory: {output_dir}")
 
-    orchestrator = Orchestrator()
+    from src.core.orchestration import Orchestrator
+    from src.core.encoding import INDENTED, SINGLE_LINE
+    cache = None
+    if args.cache is not None:
+        from src.core.cache import BuildCache
+        cache_path = args.cache or os.path.join(output_dir, ".build_cache.sqlite")
+        cache = BuildCache(cache_path, max_entries=args.cache_size)
+        logger.info(f"Build cache: {cache_path}")
+
+    competitors = None
+    if args.competitors:
+        from src.core.competitors import ensure_index
+        competitors = ensure_index(args.competitors,
+                                   args.competitor_index or os.path.join(output_dir, ".competitor_index.kcidx"))
+        logger.info(f"Competitor index: {competitors}")
+
+    generation = None
+    if args.generator:
+        from src.core.generation import GenerationConfig
+        if args.generator_batch_size < 1 or args.generator_concurrency < 1:
+            parser.error("--generator-batch-size and --generator-concurrency must be at least 1")
+        generation = GenerationConfig(args.generator, latency=args.generator_latency,
+                                      batch_size=args.generator_batch_size,
+                                      max_in_flight=args.generator_concurrency, retries=args.generator_retries,
+                                      cache_path=args.generator_cache or os.path.join(output_dir, ".generation_cache.sqlite"))
+        logger.info(f"Generation backend: {args.generator} (response cache: {generation.cache_path})")
+
+    orchestrator = Orchestrator(mode=args.executor, timeout=args.agent_timeout, retries=args.agent_retries,
+                                metrics=args.metrics is not None or args.trace_memory,
+                                trace_memory=args.trace_memory,
+                                question_bank=args.question_bank, question_limits=question_limits or None,
+                                competitors=competitors, variants=args.variant or None, generation=generation,
+                                pages=args.page or None, agents=args.agent or None,
+                                csv_workers=args.csv_workers)
     try:
-        orchestrator.run(input_path, output_dir)
+        encoding = INDENTED.adjusted(args.compact, args.json_backend)
+        line_encoding = SINGLE_LINE.adjusted(args.compact, args.json_backend)
+    except (ValueError, RuntimeError) as e:
+        parser.error(str(e))
+    sink = None
+    if args.sink is not None or ((args.batch or args.pipeline) and (args.compact or args.json_backend != "json")):
+        from src.core.sinks import open_sink
+        sink = open_sink(args.sink or "dir", output_dir, shards=args.shards, compression=args.compression,
+                         compact=args.compact, backend=args.json_backend)
+        logger.info(f"Output sink: {type(sink).__name__}")
+    index = None
+    if args.index is not None:
+        from src.core.search import IndexingSink, PageIndex
+        from src.core.sinks import DirectorySink
+        index = PageIndex(index_path)
+        logger.info(f"Page index: {index_path}")
+        if args.batch or args.stream or args.pipeline:
+            # The sink closes the index when the run completes.
+            sink = IndexingSink(sink if sink is not None else DirectorySink(output_dir), index)
+
+    result = None
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        if args.serve:
+            from src.core.server import serve
+            serve(orchestrator, host=args.host, port=args.port, socket_path=args.socket,
+                  cache_size=args.render_cache_size, encoding=line_encoding)
+        elif args.batch:
+            orchestrator.run_batch(input_path, output_dir, workers=args.workers, chunk_size=args.chunk_size,
+                                   cache=cache, force=args.force, profile_path=args.profile, sink=sink,
+                                   shard=shard, resume=args.resume, checkpoint_every=args.checkpoint_every)
+        elif args.pipeline:
+            result = orchestrator.run_pipeline(input_path, output_dir, sink=sink, stage_workers=stage_workers,
+                                      queue_size=args.queue_size)
+        elif args.stream:
+            orchestrator.run_stream(input_path, output_dir, sink=sink, encoding=line_encoding)
+        else:
+            orchestrator.run(input_path, output_dir, cache=cache, force=args.force, encoding=encoding, index=index)
     except Exception as e:
         logger.critical(f"Application failed: {e}")
         sys.exit(1)
+    finally:
+        if cache is not None:
+            cache.close()
+        if index is not None and sink is None:
+            index.close()
+        if orchestrator.generator is not None:
+            orchestrator.generator.close()
+            if not args.batch:
+                # Batch workers have clients of their own.
+                logger.info(f"Generation: {orchestrator.generator.stats}",
+                            extra=event("generation.stats", **orchestrator.generator.stats))
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            from src.core.metrics import merge_profiles
+            merge_profiles(args.profile)
+            logger.info(f"Profile written to {args.profile}")
+
+    if orchestrator.metrics is not None:
+        metrics_dir = args.metrics or output_dir
+        paths = orchestrator.metrics.export(metrics_dir)
+        logger.info(f"Agent metrics written to {paths['json']} and {paths['prometheus']}")
+        if result is not None and result.stages:
+            from src.core.pipeline import stages_to_prometheus
+            path = os.path.join(metrics_dir, "pipeline_metrics.prom")
+            with open(path, 'w') as f:
+                f.write(stages_to_prometheus(result.stages))
+            logger.info(f"Pipeline metrics written to {path}")
 
 if __name__ == "__main__":
     main()
@@ -1,8 +1,24 @@
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Dict, Optional, Tuple
 
 class BaseAgent(ABC):
+    # Names of the artifacts the agent consumes, in the order ``run`` takes them.
+    inputs: Tuple[str, ...] = ()
+    # Name of the artifact the agent produces.
+    output: str = ''
+    # Product fields the agent reads from its "product" input; None means any of them.
+    product_fields: Optional[Tuple[str, ...]] = None
+
     @abstractmethod
     def run(self, input_data: Any) -> Any:
         """Execute the agent's task."""
         pass
+
+    def invoke(self, artifacts: Dict[str, Any]) -> Any:
+        """Execute the agent with its declared inputs taken from the available artifacts."""
+        return self.run(*(artifacts[name] for name in self.inputs))
+
+    async def ainvoke(self, artifacts: Dict[str, Any]) -> Any:
+        """Asynchronous variant of ``invoke``; agents doing real I/O can override it."""
+        import asyncio
+        return await asyncio.to_thread(self.invoke, artifacts)
@@ -1,15 +1,38 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from .base_agent import BaseAgent
+from ..core.competitors import CompetitorIndex
+from ..core.models import Product
 
 class CompetitorGenerationAgent(BaseAgent):
     """
-    Generates a fictional competitor product for comparison.
+    Picks the competitor a product is compared against.
+
+    With a CompetitorIndex, the most similar catalog competitor is returned, together
+    with the next best ones under ``alternatives``. Without one (or when the index has
+    no candidate), a fictional competitor is generated.
     """
-    def run(self, product_data: Dict[str, Any]) -> Dict[str, Any]:
+    inputs = ("product",)
+    output = "competitor"
+
+    def __init__(self, index: Optional[CompetitorIndex] = None, top_k: int = 3):
+        self.index = index
+        self.top_k = top_k
+        # The fictional competitor is named after the product; catalog matches also
+        # depend on its price, ingredients and skin type.
+        self.product_fields = ("name",) if index is None else ("name", "skin_type", "key_ingredients", "price")
+
+    def run(self, product: Product) -> Dict[str, Any]:
+        if self.index is not None:
+            matches = self.index.top_k(product, self.top_k)
+            if matches:
+                competitor = matches[0][1].to_dict()
+                competitor["alternatives"] = [match.to_dict() for _, match in matches[1:]]
+                return competitor
+
         # Rule-based competitor generation
         # We create a competitor that is slightly cheaper but has "inferior" ingredients
         return {
-            "name": f"Generic {product_data['name'].split()[-1]} B",
+            "name": f"Generic {product.name.split()[-1]} B",
             "ingredients": "Water, Glycerin, Alcohol",
             "benefits": "Basic hydration",
             "price": "₹499"
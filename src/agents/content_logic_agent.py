@@ -1,23 +1,35 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, List, Optional
 from .base_agent import BaseAgent
+from ..core.generation import DESCRIPTION_PROMPT, GenerationClient
+from ..core.models import Product
 
 class ContentLogicAgent(BaseAgent):
     """
     Generates specific content blocks and fictional competitor data.
+
+    With a generation client, the description is rewritten by its backend; the template
+    text is kept when generation fails.
     """
-    def run(self, product_data: Dict[str, Any], competitor: Dict[str, Any]) -> Dict[str, Any]:
+    inputs = ("product", "competitor")
+    output = "content_blocks"
+    product_fields = ("name", "skin_type", "key_ingredients", "benefits", "price")
+
+    def __init__(self, generator: Optional[GenerationClient] = None):
+        self.generator = generator
+
+    def run(self, product: Product, competitor: Dict[str, Any]) -> Dict[str, Any]:
         
         # 1. Generate Description Block
-        description = self._generate_description(product_data)
+        description = self._generate_description(product)
         
         # 2. Generate Benefits List (Formatted)
-        benefits = self._generate_benefits(product_data)
+        benefits = self._generate_benefits(product)
         
         # 3. Generate Comparison Rows
-        comparison_rows = self._generate_comparison_rows(product_data, competitor)
+        comparison_rows = self._generate_comparison_rows(product, competitor)
         
         # 4. Generate Comparison Verdict
-        verdict = self._generate_verdict(product_data, competitor)
+        verdict = self._generate_verdict(product, competitor)
         
         return {
             "description": description,
@@ -26,27 +38,45 @@ class ContentLogicAgent(BaseAgent):
             "comparison_verdict": verdict
         }
 
-    def _generate_description(self, product_data: Dict[str, Any]) -> str:
+    def _generate_description_draft(self, product: Product) -> str:
         # Template-based description
-        return (f"Experience the power of {product_data['name']}. "
-                f"Formulated with {product_data['key_ingredients']}, it delivers results like {product_data['benefits']}. "
-                f"Perfect for {product_data.get('skin_type', 'all skin types')}, it is the ultimate addition to your routine.")
+        return (f"Experience the power of {product.name}. "
+                f"Formulated with {product.key_ingredients}, it delivers results like {product.benefits}. "
+                f"Perfect for {product.skin_type}, it is the ultimate addition to your routine.")
+
+    def _generate_description(self, product: Product) -> str:
+        description = self._generate_description_draft(product)
+        if self.generator is not None:
+            description = self.generator.generate(self._description_prompt(product, description)) or description
+        return description
+
+    def description_prompts(self, products: Iterable[Product]) -> List[str]:
+        """Returns the generation prompts of the products' descriptions."""
+        return [self._description_prompt(product, self._generate_description_draft(product)) for product in products]
+
+    def _description_prompt(self, product: Product, draft: str) -> str:
+        return DESCRIPTION_PROMPT.format(name=product.name, key_ingredients=product.key_ingredients,
+                                         benefits=product.benefits, skin_type=product.skin_type, draft=draft)
 
-    def _generate_benefits(self, product_data: Dict[str, Any]) -> List[str]:
+    def _generate_benefits(self, product: Product) -> List[str]:
         # Just splitting the string for simplicity
-        raw = product_data.get('benefits', '')
+        raw = product.benefits
         return [b.strip() for b in raw.split(',')]
 
-    def _generate_comparison_rows(self, product: Dict[str, Any], competitor: Dict[str, Any]) -> List[List[str]]:
+    def _generate_comparison_rows(self, product: Product, competitor: Dict[str, Any]) -> List[List[str]]:
         # Logic to create comparison rows
-        return [
-            ["Price", product['price'], competitor.get('price', 'N/A')],
-            ["Key Ingredients", product['key_ingredients'], competitor.get('ingredients', 'N/A')],
-            ["Benefits", product['benefits'], competitor.get('benefits', 'N/A')]
+        rows = [
+            ["Price", product.price, competitor.get('price', 'N/A')],
+            ["Key Ingredients", product.key_ingredients, competitor.get('ingredients', 'N/A')],
+            ["Benefits", product.benefits, competitor.get('benefits', 'N/A')]
         ]
+        # Catalog competitors also carry their skin types
+        if competitor.get('skin_type'):
+            rows.append(["Skin Type", product.skin_type, competitor['skin_type']])
+        return rows
 
-    def _generate_verdict(self, product: Dict[str, Any], competitor: Dict[str, Any]) -> str:
+    def _generate_verdict(self, product: Product, competitor: Dict[str, Any]) -> str:
         return (
-            f"{product['name']} highlights ingredients like {product['key_ingredients']}, "
+            f"{product.name} highlights ingredients like {product.key_ingredients}, "
             f"while {competitor['name']} focuses on {competitor['ingredients']}."
         )
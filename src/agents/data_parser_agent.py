@@ -1,7 +1,7 @@
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List, Tuple
 import logging
 from .base_agent import BaseAgent
-from ..core.models import Product
+from ..core.models import Product, ProductBatch
 
 logger = logging.getLogger(__name__)
 
@@ -9,15 +9,18 @@ class DataParserAgent(BaseAgent):
     """
     Parses and validates the input product data.
     """
-    def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+    inputs = ("raw",)
+    output = "product"
+
+    def run(self, input_data: Dict[str, Any]) -> Product:
         """
-        Parses input dictionary into a Product object and returns its dictionary representation.
+        Parses input dictionary into an immutable Product record.
 
         Args:
             input_data (Dict[str, Any]): Raw input data.
 
         Returns:
-            Dict[str, Any]: Processed product data.
+            Product: Processed product data.
 
         Raises:
             ValueError: If required fields are missing.
@@ -36,7 +39,7 @@ class DataParserAgent(BaseAgent):
                 raise ValueError(f"Missing required field: {req}")
                 
         # Create Product object
-        product = Product(
+        return Product(
             name=normalized['product_name'],
             concentration=normalized.get('concentration', ''),
             skin_type=normalized.get('skin_type', ''),
@@ -44,7 +47,26 @@ class DataParserAgent(BaseAgent):
             benefits=normalized.get('benefits', ''),
             how_to_use=normalized.get('how_to_use', ''),
             side_effects=normalized.get('side_effects', ''),
-            price=normalized.get('price', '')
+            price=normalized.get('price', ''),
+            sku=str(normalized.get('sku', normalized.get('id', '')))
         )
-        
-        return product.to_dict()
+
+    def run_batch(self, records: Iterable[Dict[str, Any]]) -> Tuple[ProductBatch, List[Tuple[int, str]]]:
+        """
+        Parses many records into a columnar ProductBatch.
+
+        Args:
+            records (Iterable[Dict[str, Any]]): Raw input records.
+
+        Returns:
+            Tuple[ProductBatch, List[Tuple[int, str]]]: The parsed products, and the
+            ``(record index, error)`` of every record that failed to parse.
+        """
+        batch = ProductBatch()
+        errors = []
+        for index, record in enumerate(records):
+            try:
+                batch.append(self.run(record))
+            except ValueError as e:
+                errors.append((index, str(e)))
+        return batch, errors
@@ -1,13 +1,31 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, Optional
 from .base_agent import BaseAgent
-from ..core.templates import TemplateEngine, FAQ_TEMPLATE, PRODUCT_PAGE_TEMPLATE, COMPARISON_PAGE_TEMPLATE
+from ..core.encoding import PageEncoding
+from ..core.registry import PAGES
+from ..core.templates import TemplateEngine, JsonTemplate, PAGE_TEMPLATES
 
 class PageAssemblerAgent(BaseAgent):
     """
     Assembles final pages using templates and data.
+
+    The pages are the built-in ones, or those named in ``pages`` (registered in ``PAGES``).
+    Only the artifacts their templates reference are inputs, so the agents producing the
+    others do not run.
+
+    Attributes:
+        templates (Dict[str, CompiledTemplate]): The compiled template of each page, by page name.
     """
-    def __init__(self):
+    inputs = ("product", "questions", "content_blocks", "competitor")
+    output = "pages"
+
+    def __init__(self, pages: Optional[Iterable[str]] = None):
         self.engine = TemplateEngine()
+        self.templates = {name: self.engine.compile(PAGES[name]) for name in (pages or PAGE_TEMPLATES)}
+        self.inputs = tuple(dict.fromkeys(path[0] for template in self.templates.values() for path in template.paths))
+        self._json_templates: Dict[PageEncoding, Dict[str, JsonTemplate]] = {}
+
+    def invoke(self, artifacts: Dict[str, Any]) -> Dict[str, Any]:
+        return self.run({name: artifacts[name] for name in self.inputs})
 
     def run(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -17,31 +35,23 @@ class PageAssemblerAgent(BaseAgent):
         - content_blocks: generated content blocks
         - competitor: competitor data
         """
-        
-        # Assemble FAQ Page
-        faq_context = {
-            "product": data['product'],
-            "questions": data['questions']
-        }
-        faq_page = self.engine.render(FAQ_TEMPLATE, faq_context)
-        
-        # Assemble Product Page
-        product_context = {
-            "product": data['product'],
-            "content_blocks": data['content_blocks']
-        }
-        product_page = self.engine.render(PRODUCT_PAGE_TEMPLATE, product_context)
-        
-        # Assemble Comparison Page
-        comparison_context = {
-            "product": data['product'],
-            "competitor": data['competitor'],
-            "content_blocks": data['content_blocks']
-        }
-        comparison_page = self.engine.render(COMPARISON_PAGE_TEMPLATE, comparison_context)
-        
-        return {
-            "faq_page": faq_page,
-            "product_page": product_page,
-            "comparison_page": comparison_page
-        }
+        return self.render(self.templates, data)
+
+    def render(self, names: Iterable[str], data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Assembles only the named pages. ``data`` needs just the artifacts their templates
+        reference (see ``CompiledTemplate.paths``).
+        """
+        return {name: self.templates[name].render(data) for name in names}
+
+    def encode(self, names: Iterable[str], data: Dict[str, Any], encoding: PageEncoding) -> Dict[str, bytes]:
+        """
+        Assembles the named pages straight into JSON bytes.
+
+        The templates are compiled for each encoding on first use (see ``JsonTemplate``).
+        """
+        templates = self._json_templates.get(encoding)
+        if templates is None:
+            templates = self._json_templates[encoding] = {
+                name: self.engine.compile_json(template.template, encoding) for name, template in self.templates.items()}
+        return {name: templates[name].render(data) for name in names}
@@ -1,101 +1,58 @@
-from typing import Dict, Any, List
+from typing import Dict, Iterable, List, Optional, Union
 from .base_agent import BaseAgent
+from ..core.generation import ANSWER_PROMPT, GenerationClient
+from ..core.models import PRODUCT_FIELDS, Product, ProductBatch
+from ..core.question_bank import QuestionBank, DEFAULT_QUESTION_BANK
 
 class QuestionGeneratorAgent(BaseAgent):
     """
     Generates categorized user questions based on product data.
+
+    The questions come from a declarative, precompiled QuestionBank; per-category
+    limits cap how many questions of each category a product gets. With a generation
+    client, the answers are rewritten by its backend, all answers of a call in one
+    ``generate_many``; the bank's answers are kept where generation fails.
     """
-    def run(self, product_data: Dict[str, Any]) -> List[Dict[str, str]]:
-        name = product_data.get('name', 'the product')
-        benefits = product_data.get('benefits', '')
-        usage = product_data.get('how_to_use', '')
-        ingredients = product_data.get('key_ingredients', '')
-        
-        questions = []
-        
-        # Usage Category
-        questions.append({
-            "category": "Usage",
-            "question": f"How often should I use {name}?",
-            "answer": f"For best results, follow the usage instructions: {usage}."
-        })
-        questions.append({
-            "category": "Usage",
-            "question": "Can I use this in my morning routine?",
-            "answer": "Yes, it is suitable for morning use. " + usage
-        })
-        questions.append({
-            "category": "Usage",
-            "question": "Is it complicated to apply?",
-            "answer": "No, simply: " + usage
-        })
+    inputs = ("product",)
+    output = "questions"
+
+    def __init__(self, bank: Optional[QuestionBank] = None, limits: Optional[Dict[str, int]] = None,
+                 generator: Optional[GenerationClient] = None):
+        self.bank = bank or DEFAULT_QUESTION_BANK
+        self.limits = limits
+        self.generator = generator
+        self.product_fields = self.bank.fields
+        if generator is not None:
+            # The prompts name the product.
+            self.product_fields = tuple(name for name in PRODUCT_FIELDS if name in self.bank.fields or name == "name")
 
-        # Ingredients Category
-        questions.append({
-            "category": "Ingredients",
-            "question": "What are the key ingredients?",
-            "answer": f"The key ingredients are {ingredients}."
-        })
-        questions.append({
-            "category": "Ingredients",
-            "question": "Does it contain Vitamin C?",
-            "answer": "Yes, check the ingredient list: " + ingredients
-        })
-        questions.append({
-            "category": "Ingredients",
-            "question": "Are the ingredients safe?",
-            "answer": "It is formulated with " + ingredients
-        })
+    def run(self, product: Product) -> List[Dict[str, str]]:
+        questions = self.bank.generate(product, self.limits)
+        if self.generator is not None:
+            return self._rewrite_answers([product.name], [questions])[0]
+        return questions
 
-        # Benefits Category
-        questions.append({
-            "category": "Benefits",
-            "question": "What will this do for my skin?",
-            "answer": f"It helps with: {benefits}."
-        })
-        questions.append({
-            "category": "Benefits",
-            "question": "Will it brighten my skin?",
-            "answer": f"Yes, one of the main benefits is: {benefits}."
-        })
-        questions.append({
-            "category": "Benefits",
-            "question": "Why should I choose this serum?",
-            "answer": f"Because it offers: {benefits}."
-        })
+    def run_batch(self, products: Union[ProductBatch, Iterable[Product]]) -> List[List[Dict[str, str]]]:
+        """
+        Generates the questions of many products in one pass over the question bank.
+        """
+        if self.generator is None:
+            return self.bank.generate_batch(products, self.limits)
+        if not isinstance(products, ProductBatch):
+            products = list(products)
+        names = products.columns["name"] if isinstance(products, ProductBatch) else [p.name for p in products]
+        return self._rewrite_answers(names, self.bank.generate_batch(products, self.limits))
 
-        # Safety Category
-        questions.append({
-            "category": "Safety",
-            "question": "Is this safe for sensitive skin?",
-            "answer": f"Please check the side effects: {product_data.get('side_effects', 'None')}."
-        })
-        questions.append({
-            "category": "Safety",
-            "question": "Are there side effects?",
-            "answer": f"You might experience: {product_data.get('side_effects', 'None')}."
-        })
-        questions.append({
-            "category": "Safety",
-            "question": "Can I use it every day?",
-            "answer": "Refer to usage instructions: " + usage
-        })
+    def answer_prompts(self, products: Iterable[Product]) -> List[str]:
+        """Returns the generation prompts of the products' answers."""
+        products = list(products)
+        return self._answer_prompts([p.name for p in products], self.bank.generate_batch(products, self.limits))
 
-        # Purchase/General
-        questions.append({
-            "category": "Purchase",
-            "question": "What is the price?",
-            "answer": f"It is priced at {product_data.get('price')}."
-        })
-        questions.append({
-            "category": "General",
-            "question": "Is this a good value?",
-            "answer": f"At {product_data.get('price')}, it offers great benefits like {benefits}."
-        })
-        questions.append({
-            "category": "General",
-            "question": "Who is this for?",
-            "answer": f"It is designed for skin types: {product_data.get('skin_type')}."
-        })
+    def _answer_prompts(self, names: List[str], results: List[List[Dict[str, str]]]) -> List[str]:
+        return [ANSWER_PROMPT.format(name=name, question=entry["question"], draft=entry["answer"])
+                for name, questions in zip(names, results) for entry in questions]
 
-        return questions
+    def _rewrite_answers(self, names: List[str], results: List[List[Dict[str, str]]]) -> List[List[Dict[str, str]]]:
+        answers = iter(self.generator.generate_many(self._answer_prompts(names, results)))
+        return [[dict(entry, answer=next(answers) or entry["answer"]) for entry in questions]
+                for questions in results]
@@ -1,13 +1,29 @@
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, Optional, Tuple
 import logging
 from .base_agent import BaseAgent
+from ..core.logs import event
+from ..core.schema import CompiledSchema, ValidationReport
+from ..core.templates import PAGES_SCHEMA, TemplateSchema
 
 logger = logging.getLogger(__name__)
 
 class ValidationAgent(BaseAgent):
     """
     Validates the structure and content of the generated pages.
+
+    The page schemas declared in ``core.templates`` are compiled once, when the agent is created.
     """
+    inputs = ("pages",)
+    output = "validated_pages"
+
+    def __init__(self, schema: Optional[Dict[str, Any]] = None):
+        schema = schema or PAGES_SCHEMA
+        self.schema = CompiledSchema(schema, root="pages")
+        self.page_schemas = {name: CompiledSchema(page_schema, root=f"pages.{name}")
+                             for name, page_schema in schema.get("properties", {}).items()}
+        # Keyed by the id of the template, which is kept alive with its schema.
+        self._template_schemas: Dict[Tuple[str, int], Tuple[Any, Optional[TemplateSchema]]] = {}
+
     def run(self, pages: Dict[str, Any]) -> Dict[str, Any]:
         """
         Validates the generated pages against required schemas.
@@ -19,41 +35,66 @@ class ValidationAgent(BaseAgent):
             Dict[str, Any]: The validated pages.
 
         Raises:
-            ValueError: If any validation check fails.
-        """
-        logger.info("Agent: ValidationAgent working...")
-        
-        # Validate FAQ Page
-        faq = pages.get("faq_page")
-        if not faq:
-            logger.error("Validation failed: Missing FAQ page")
-            raise ValueError("Missing FAQ page")
-        if "sections" not in faq:
-            logger.error("Validation failed: FAQ page missing 'sections'")
-            raise ValueError("FAQ page missing 'sections'")
-        if len(faq["sections"][0]["q_and_a"]) < 5:
-            logger.error("Validation failed: FAQ page must have at least 5 questions")
-            raise ValueError("FAQ page must have at least 5 questions")
-
-        # Validate Product Page
-        product_page = pages.get("product_page")
-        if not product_page:
-            logger.error("Validation failed: Missing Product page")
-            raise ValueError("Missing Product page")
-        for key in ["title", "price", "description", "benefits_list"]:
-            if key not in product_page:
-                logger.error(f"Validation failed: Product page missing required key: {key}")
-                raise ValueError(f"Product page missing required key: {key}")
-
-        # Validate Comparison Page
-        comparison_page = pages.get("comparison_page")
-        if not comparison_page:
-            logger.error("Validation failed: Missing Comparison page")
-            raise ValueError("Missing Comparison page")
-        for key in ["title", "comparison_table", "verdict"]:
-            if key not in comparison_page:
-                logger.error(f"Validation failed: Comparison page missing required key: {key}")
-                raise ValueError(f"Comparison page missing required key: {key}")
-
-        logger.info("Validation successful.")
+            ValueError: If any validation check fails; the message lists every violation.
+        """
+        errors = self.schema.validate(pages)
+        if errors:
+            logger.error(f"Validation failed: {'; '.join(errors)}")
+            raise ValueError("; ".join(errors))
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Validation successful.", extra=event("validation.ok"))
         return pages
+
+    def run_subset(self, pages: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Validates some of a product's pages, e.g. the ones re-rendered after a partial update.
+
+        Raises:
+            ValueError: If any validation check fails; the message lists every violation.
+        """
+        errors = [error for name, page in pages.items() if name in self.page_schemas
+                  for error in self.page_schemas[name].validate(page)]
+        if errors:
+            logger.error(f"Validation failed: {'; '.join(errors)}")
+            raise ValueError("; ".join(errors))
+        return pages
+
+    def run_templates(self, templates: Iterable[Tuple[str, Any]], context: Dict[str, Any]) -> None:
+        """
+        Validates the pages the templates render from ``context``, without rendering them
+        (see ``TemplateSchema``), e.g. for pages rendered straight to JSON.
+
+        Args:
+            templates (Iterable[Tuple[str, Any]]): ``(page, template)`` pairs, where ``page``
+                names the schema, e.g. "faq_page" for a French FAQ template.
+            context (Dict[str, Any]): The artifacts the pages are rendered from.
+
+        Raises:
+            ValueError: If any validation check fails; the message lists every violation.
+        """
+        errors = []
+        for page, template in templates:
+            entry = self._template_schemas.get((page, id(template)))
+            if entry is None:
+                schema = self.schema.schema.get("properties", {}).get(page)
+                entry = self._template_schemas[page, id(template)] = (
+                    template, TemplateSchema(schema, template, f"pages.{page}") if schema is not None else None)
+            if entry[1] is not None:
+                errors += entry[1].validate(context)
+        if errors:
+            logger.error(f"Validation failed: {'; '.join(errors)}")
+            raise ValueError("; ".join(errors))
+
+    def run_batch(self, pages: Iterable[Dict[str, Any]], keys: Optional[Iterable[str]] = None) -> ValidationReport:
+        """
+        Validates the pages of many products in one call, without raising.
+
+        Args:
+            pages (Iterable[Dict[str, Any]]): The pages of each product.
+            keys (Optional[Iterable[str]]): Product keys, used to label the report.
+
+        Returns:
+            ValidationReport: The number of products checked and the violations of each failing one.
+        """
+        return self.schema.validate_batch(pages, keys)
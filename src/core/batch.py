@@ -0,0 +1,413 @@
+import os
+import re
+import time
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Any, Callable, List, Iterator, Iterable, NamedTuple, Optional, Tuple
+from .cache import BuildCache, encode_product, product_digest
+from .checkpoint import Assignment, BatchManifest, ShardSpec, manifest_path
+from .logs import event, use_direct_handlers
+from .models import Product
+from .metrics import WorkerProfiler
+from .encoding import SINGLE_LINE, PageEncoding
+from .sinks import BackgroundWriter, DirectorySink, EncodedPages, OutputSink
+from .streaming import iter_records
+
+logger = logging.getLogger(__name__)
+
+# Orchestrator and build cache owned by each pool worker (built once per process).
+_worker_orchestrator = None
+_worker_cache: Optional[BuildCache] = None
+_worker_profiler: Optional[WorkerProfiler] = None
+_worker_sink: Optional[OutputSink] = None
+_worker_locate: Optional[Callable[[str], str]] = None
+_worker_skip: Optional[Callable[[str], bool]] = None
+
+
+@dataclass
+class BatchFailure:
+    """A single product that could not be processed."""
+    index: int
+    key: str
+    error: str
+
+
+class RecordOutcome(NamedTuple):
+    """
+    Result of processing one record: ``error`` is None on success.
+
+    ``encoded`` holds the encoded pages when they still have to be written by the caller.
+    ``record`` is the product as recorded in the build cache; ``partial`` tells that only
+    the pages affected by a change were re-rendered. ``skipped`` products were left to
+    another shard or completed by an earlier run.
+    """
+    index: int
+    key: str
+    error: Optional[str] = None
+    digest: Optional[str] = None
+    location: Optional[str] = None
+    cached: bool = False
+    encoded: Optional[EncodedPages] = None
+    record: Optional[str] = None
+    partial: bool = False
+    skipped: bool = False
+
+
+@dataclass
+class BatchResult:
+    """
+    Summary of a batch run.
+
+    Attributes:
+        total (int): Number of records read from the input.
+        succeeded (int): Number of products whose pages were written.
+        failures (List[BatchFailure]): Records that failed, with their errors.
+        elapsed (float): Wall time of the run in seconds.
+        cache_hits (int): Products skipped because their pages were up to date.
+        cache_misses (int): Products (re)generated despite a build cache being in use.
+        partial_updates (int): Cache misses for which only the affected pages were re-rendered.
+        skipped (int): Products left to another shard or completed by an earlier run.
+        stages (Dict[str, Dict[str, Any]]): Per-stage statistics of a pipeline run (see
+            ``StagedPipeline.stats``).
+    """
+    total: int = 0
+    succeeded: int = 0
+    failures: List[BatchFailure] = field(default_factory=list)
+    elapsed: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    partial_updates: int = 0
+    skipped: int = 0
+    stages: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    @property
+    def products_per_sec(self) -> float:
+        return self.total / self.elapsed if self.elapsed > 0 else 0.0
+
+    def fields(self) -> Dict[str, Any]:
+        """Returns the counts of the run, as logged with its summary and progress records."""
+        return {"total": self.total, "succeeded": self.succeeded, "failed": len(self.failures),
+                "skipped": self.skipped, "cache_hits": self.cache_hits, "cache_misses": self.cache_misses,
+                "partial_updates": self.partial_updates, "elapsed": round(self.elapsed, 3),
+                "products_per_sec": round(self.products_per_sec, 1)}
+
+    def summary(self) -> str:
+        text = (f"Processed {self.total} products in {self.elapsed:.2f}s "
+                f"({self.products_per_sec:.1f} products/sec): "
+                f"{self.succeeded} succeeded, {len(self.failures)} failed")
+        if self.skipped:
+            text += f", {self.skipped} skipped"
+        if self.cache_hits or self.cache_misses:
+            text += f" (cache: {self.cache_hits} hits, {self.cache_misses} misses"
+            text += f", {self.partial_updates} partial)" if self.partial_updates else ")"
+        return text
+
+
+def product_key(product: Product, index: Optional[int] = None) -> str:
+    """
+    Returns a filesystem-safe key identifying a parsed product.
+
+    The SKU is used when the record provides one, otherwise the product name is slugified.
+    Names need not be unique, so a catalog product without a SKU also gets its record
+    ``index`` appended (e.g. ``glow-serum-3``), when given.
+    """
+    slug = re.sub(r'[^a-z0-9]+', '-', (product.sku or product.name).lower()).strip('-') or 'product'
+    return f"{slug}-{index}" if index is not None and not product.sku else slug
+
+
+def _chunked(records: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+    chunk = []
+    for item in enumerate(records):
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _init_worker(options: Dict[str, Any], cache_path: Optional[str], profile_path: Optional[str],
+                 sink: Optional[OutputSink], locate: Optional[Callable[[str], str]],
+                 skip: Optional[Callable[[str], bool]]) -> None:
+    """Builds the per-process orchestrator and makes the process write its logs directly."""
+    global _worker_orchestrator, _worker_cache, _worker_profiler, _worker_sink, _worker_locate, _worker_skip
+    from .orchestration import Orchestrator
+    use_direct_handlers()
+    _worker_orchestrator = Orchestrator(**options)
+    _worker_cache = BuildCache(cache_path) if cache_path else None
+    _worker_profiler = WorkerProfiler(profile_path) if profile_path else None
+    _worker_sink = sink
+    _worker_locate = locate
+    _worker_skip = skip
+
+
+def process_chunk(orchestrator, chunk: List[Tuple[int, Dict[str, Any]]], sink: Optional[OutputSink],
+                  cache: Optional[BuildCache] = None, force: bool = False,
+                  encoding: Optional[PageEncoding] = None,
+                  locate: Optional[Callable[[str], str]] = None,
+                  skip: Optional[Callable[[str], bool]] = None) -> List[RecordOutcome]:
+    """
+    Runs the agent chain for every record in a chunk, isolating failures per record.
+
+    When a build cache is given, products whose digest is already recorded for their
+    output location skip generation and saving altogether, and products that changed
+    since they were last rendered to that location only have their affected pages
+    re-rendered and rewritten (unless ``force`` is set). With a generation backend, the
+    prompts of the whole chunk are sent up front, in batches.
+
+    Args:
+        orchestrator (Orchestrator): Orchestrator used to process the records.
+        chunk (List[Tuple[int, Dict[str, Any]]]): ``(index, raw_record)`` pairs.
+        sink (Optional[OutputSink]): Sink the pages are written to. When None, the pages are
+            only encoded and returned in each outcome for the caller to write.
+        cache (Optional[BuildCache]): Build cache to consult, if any. Requires a sink.
+        force (bool): Regenerate every product even when it is cached.
+        encoding (Optional[PageEncoding]): Encoding of the pages when ``sink`` is None
+            (defaults to the sink's encoding, else single-line JSON).
+        locate (Optional[Callable[[str], str]]): Maps keys to output locations for the
+            cache check when ``sink`` is None (see ``OutputSink.locator``).
+        skip (Optional[Callable[[str], bool]]): Tells, by product key, which products to
+            leave out (see ``Assignment.skips``).
+
+    Returns:
+        List[RecordOutcome]: One outcome per record, in chunk order.
+    """
+    if encoding is None:
+        encoding = sink.encoding if sink is not None else SINGLE_LINE
+    if orchestrator.generator is not None:
+        _prefetch_generation(orchestrator, chunk)
+    outcomes = []
+    for index, raw in chunk:
+        key = f"record-{index}"
+        try:
+            product_model = orchestrator.parse(raw)
+            key = product_key(product_model, index)
+            if skip is not None and skip(key):
+                outcomes.append(RecordOutcome(index, key, skipped=True))
+                continue
+            digest = record = previous = None
+            if cache is not None:
+                digest = product_digest(product_model, orchestrator.fingerprint)
+                location = sink.location(key) if sink is not None else locate(key)
+                if not force and cache.contains(digest, location):
+                    outcomes.append(RecordOutcome(index, key, None, digest, location, cached=True))
+                    continue
+                if not force:
+                    previous = cache.previous(location, key, orchestrator.fingerprint)
+                record = encode_product(product_model)
+            if previous is not None:
+                encoded = orchestrator.update_pages(previous, product_model, encoding)
+                if not encoded:
+                    outcomes.append(RecordOutcome(index, key, None, digest, location, record=record, partial=True))
+                    continue
+            else:
+                encoded = orchestrator.generate_pages(product_model, encoding)
+            partial = previous is not None
+            if sink is None:
+                outcomes.append(RecordOutcome(index, key, None, digest, encoded=encoded,
+                                              record=record, partial=partial))
+            else:
+                outcomes.append(RecordOutcome(index, key, None, digest, sink.write_encoded(key, encoded),
+                                              record=record, partial=partial))
+        except Exception as e:
+            outcomes.append(RecordOutcome(index, key, f"{type(e).__name__}: {e}"))
+    return outcomes
+
+
+def _prefetch_generation(orchestrator, chunk: List[Tuple[int, Dict[str, Any]]]) -> None:
+    # Invalid records are reported by the chunk loop.
+    products = []
+    for _, raw in chunk:
+        try:
+            products.append(orchestrator.parse(raw))
+        except Exception:
+            pass
+    orchestrator.prefetch_generation(products)
+
+
+def _process_chunk_in_worker(chunk: List[Tuple[int, Dict[str, Any]]], force: bool,
+                             encoding: PageEncoding) -> Tuple[List[RecordOutcome], Optional[Dict[str, Any]]]:
+    outcomes = process_chunk(_worker_orchestrator, chunk, _worker_sink, _worker_cache, force, encoding,
+                             _worker_locate, _worker_skip)
+    if _worker_profiler is not None:
+        _worker_profiler.dump()
+    metrics = _worker_orchestrator.metrics
+    return outcomes, (metrics.drain() if metrics is not None else None)
+
+
+def _collect_from_worker(orchestrator, result: BatchResult, future, cache: Optional[BuildCache],
+                         writer: OutputSink, build: str) -> List[RecordOutcome]:
+    outcomes, metrics = future.result()
+    written = []
+    for outcome in outcomes:
+        if outcome.encoded is not None:
+            location = writer.write_encoded(outcome.key, outcome.encoded)
+            outcome = outcome._replace(location=location, encoded=None)
+        written.append(outcome)
+    collect(result, written, cache, build)
+    if metrics is not None and orchestrator.metrics is not None:
+        orchestrator.metrics.absorb(metrics)
+    return written
+
+
+def collect(result: BatchResult, outcomes: Iterable[RecordOutcome],
+            cache: Optional[BuildCache] = None, build: str = '') -> None:
+    """
+    Adds per-record outcomes to a batch result, logging each failure and updating the cache.
+
+    ``build`` is the fingerprint of the orchestrator that rendered the pages (see ``Orchestrator.fingerprint``).
+    """
+    stored = []
+    hits = []
+    products = []
+    for outcome in outcomes:
+        result.total += 1
+        if outcome.skipped:
+            result.skipped += 1
+            continue
+        if outcome.error is not None:
+            result.failures.append(BatchFailure(outcome.index, outcome.key, outcome.error))
+            logger.error("Product #%d (%s) failed: %s", outcome.index, outcome.key, outcome.error,
+                         extra=event("product.failed", index=outcome.index, key=outcome.key, error=outcome.error))
+            continue
+        result.succeeded += 1
+        if outcome.digest is None:
+            continue
+        if outcome.cached:
+            result.cache_hits += 1
+            hits.append(outcome.digest)
+        else:
+            result.cache_misses += 1
+            result.partial_updates += outcome.partial
+            stored.append((outcome.digest, outcome.location))
+            if outcome.record is not None:
+                products.append((outcome.location, outcome.key, build, outcome.record))
+    if cache is not None and (stored or hits):
+        cache.record(stored, hits, products)
+
+
+def run_batch(orchestrator, input_file_path: str, output_dir: str,
+              workers: Optional[int] = None, chunk_size: int = 64,
+              cache: Optional[BuildCache] = None, force: bool = False,
+              profile_path: Optional[str] = None, sink: Optional[OutputSink] = None,
+              shard: Optional[ShardSpec] = None, resume: bool = False,
+              checkpoint_every: int = 1000) -> BatchResult:
+    """
+    Processes every product in a catalog file, fanning chunks out over a process pool.
+
+    At most ``2 * workers`` chunks are in flight at any time, so the input is never
+    materialised in full in the parent process.
+
+    Workers write through their own copy of a ``parallel_safe`` sink; for any other sink
+    they only encode the pages, which the parent hands to a single background writer.
+
+    Completed products are recorded in a manifest in ``output_dir`` (see ``BatchManifest``)
+    every ``checkpoint_every`` products, once their pages are stored, so an interrupted
+    run can be resumed. Sinks that only publish their output when closed are checkpointed
+    at the end of the run only.
+
+    Args:
+        orchestrator (Orchestrator): Orchestrator used when running in-process (``workers=1``).
+        input_file_path (str): JSON array or JSONL file of products.
+        output_dir (str): Directory to save the generated output.
+        workers (Optional[int]): Number of worker processes. Defaults to the CPU count.
+        chunk_size (int): Number of records sent to a worker per task.
+        cache (Optional[BuildCache]): Build cache used to skip unchanged products.
+        force (bool): Regenerate every product even when it is cached.
+        profile_path (Optional[str]): Profile the pool workers, dumping their stats to ``<path>.<pid>``.
+        sink (Optional[OutputSink]): Where pages are written; defaults to one directory per
+            product under ``output_dir``. The sink is closed when the run completes.
+        shard (Optional[ShardSpec]): Only process the products of this shard of the catalog.
+        resume (bool): Skip the products completed by an earlier, interrupted run of the same shard.
+        checkpoint_every (int): Completed products between two manifest checkpoints.
+
+    Returns:
+        BatchResult: Counts, failures, cache statistics and throughput of the run.
+
+    Raises:
+        ValueError: If resuming with a sink that rewrites its output on every run, or a
+            manifest written for another shard or sink.
+    """
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+    workers = workers or os.cpu_count() or 1
+    result = BatchResult()
+    start = time.perf_counter()
+    chunks = _chunked(iter_records(input_file_path, csv_workers=orchestrator.csv_workers), chunk_size)
+    sink = sink if sink is not None else DirectorySink(output_dir)
+    if cache is not None and not sink.incremental:
+        logger.warning(f"{type(sink).__name__} rewrites its output on every run; ignoring the build cache")
+        cache = None
+    if resume and not sink.incremental:
+        raise ValueError(f"{type(sink).__name__} rewrites its output on every run and cannot be resumed")
+    manifest = BatchManifest.start(manifest_path(output_dir, shard), sink.kind, shard,
+                                   orchestrator.fingerprint, resume)
+    if manifest.completed:
+        logger.info(f"Resuming: {len(manifest.completed)} products already completed")
+    skip = None
+    if shard is not None or manifest.completed:
+        skip = Assignment(shard, frozenset(manifest.completed)).skips
+    writer = BackgroundWriter(sink)
+    build = orchestrator.fingerprint if cache is not None else ''
+
+    next_progress = checkpoint_every
+
+    def track(outcomes: List[RecordOutcome]) -> None:
+        nonlocal next_progress
+        for outcome in outcomes:
+            if outcome.error is None and not outcome.skipped:
+                manifest.add(outcome.key, outcome.location)
+        if sink.incremental and manifest.pending >= checkpoint_every:
+            writer.flush()
+            manifest.checkpoint()
+        if result.total >= next_progress:
+            next_progress = result.total + checkpoint_every
+            result.elapsed = time.perf_counter() - start
+            logger.info("Progress: %d products read, %d failed (%.1f products/sec)", result.total,
+                        len(result.failures), result.products_per_sec,
+                        extra=event("batch.progress", **result.fields()))
+
+    try:
+        if workers == 1:
+            for chunk in chunks:
+                outcomes = process_chunk(orchestrator, chunk, writer, cache, force, skip=skip)
+                collect(result, outcomes, cache, build)
+                track(outcomes)
+        else:
+            max_in_flight = workers * 2
+            cache_path = cache.path if cache is not None else None
+            worker_sink = sink if sink.parallel_safe else None
+            locate = sink.locator() if cache is not None and worker_sink is None else None
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(orchestrator.options, cache_path, profile_path,
+                                               worker_sink, locate, skip)) as pool:
+                pending = set()
+                for chunk in chunks:
+                    pending.add(pool.submit(_process_chunk_in_worker, chunk, force, sink.encoding))
+                    if len(pending) >= max_in_flight:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            track(_collect_from_worker(orchestrator, result, future, cache, writer, build))
+                for future in wait(pending).done:
+                    track(_collect_from_worker(orchestrator, result, future, cache, writer, build))
+    except BaseException:
+        # Nothing more is published: a sink rewriting its output keeps that of the last run.
+        manifest.discard()
+        try:
+            writer.discard()
+        finally:
+            manifest.close()
+        raise
+    try:
+        writer.close()
+    except BaseException:
+        manifest.discard()
+        raise
+    finally:
+        manifest.close()
+
+    if cache is not None:
+        cache.evict()
+
+    result.elapsed = time.perf_counter() - start
+    return result
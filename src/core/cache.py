@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import logging
+from typing import Iterable, Optional, Tuple
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+_SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_fingerprint: Optional[str] = None
+
+
+def code_fingerprint() -> str:
+    """
+    Returns a digest of the templates and agent code that produce the pages.
+
+    Every Python source file under ``src`` is hashed, so any change to an agent,
+    a template or the models invalidates all cached products. Computed once per process.
+    """
+    global _fingerprint
+    if _fingerprint is None:
+        h = hashlib.sha256()
+        for root, dirs, files in os.walk(_SRC_DIR):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith('.py'):
+                    path = os.path.join(root, name)
+                    h.update(os.path.relpath(path, _SRC_DIR).encode('utf-8'))
+                    with open(path, 'rb') as f:
+                        h.update(f.read())
+        _fingerprint = h.hexdigest()
+    return _fingerprint
+
+
+def product_digest(product: Product, context: str = '') -> str:
+    """
+    Returns the content address of a normalized product (the DataParserAgent output).
+
+    ``context`` identifies the data the pages are rendered with besides the code, such as
+    the question bank and competitor catalog (see ``Orchestrator.fingerprint``).
+    """
+    payload = json.dumps(product.to_dict(), sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256((code_fingerprint() + context + payload).encode('utf-8')).hexdigest()
+
+
+def encode_product(product: Product) -> str:
+    return json.dumps(product.to_dict(), separators=(',', ':'), ensure_ascii=False)
+
+
+class BuildCache:
+    """
+    On-disk index of products whose pages are already up to date.
+
+    Entries map a product digest to the directory its pages were written to. The
+    index is a SQLite database in WAL mode, so pool workers can look entries up while
+    the parent process records new ones. When the index grows beyond ``max_entries``,
+    the least recently used entries are evicted.
+
+    The index also keeps each product as it was last rendered, by location and product key
+    (sinks such as SQLite store every product at the same location), with the build it was
+    rendered by, so a changed product can be re-rendered partially.
+
+    Attributes:
+        path (str): Location of the SQLite index.
+        max_entries (int): Maximum number of entries kept after eviction.
+    """
+    def __init__(self, path: str, max_entries: int = 1_000_000):
+        self.path = path
+        self.max_entries = max_entries
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "digest TEXT PRIMARY KEY, location TEXT NOT NULL, last_used REAL NOT NULL)"
+        )
+        # Records kept by location alone are dropped; changed products are then re-rendered in full.
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(products)")]
+        if columns and "key" not in columns:
+            self._conn.execute("DROP TABLE products")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS products ("
+            "location TEXT NOT NULL, key TEXT NOT NULL, build TEXT NOT NULL, record TEXT NOT NULL, "
+            "PRIMARY KEY (location, key)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def contains(self, digest: str, location: str) -> bool:
+        """
+        Checks whether the pages for ``digest`` were written to ``location`` and still exist.
+        """
+        row = self._conn.execute("SELECT location FROM entries WHERE digest = ?", (digest,)).fetchone()
+        return row is not None and row[0] == location and os.path.exists(location)
+
+    def previous(self, location: str, key: str, build: str) -> Optional[Product]:
+        """
+        Returns product ``key`` as its pages at ``location`` were rendered, if rendered by ``build``.
+        """
+        row = self._conn.execute("SELECT build, record FROM products WHERE location = ? AND key = ?",
+                                 (location, key)).fetchone()
+        if row is None or row[0] != build or not os.path.exists(location):
+            return None
+        return Product(**json.loads(row[1]))
+
+    def record(self, stored: Iterable[Tuple[str, str]], hits: Iterable[str] = (),
+               products: Iterable[Tuple[str, str, str, str]] = ()) -> None:
+        """
+        Adds newly written products and refreshes the recency of cache hits.
+
+        Args:
+            stored (Iterable[Tuple[str, str]]): ``(digest, location)`` of freshly written products.
+            hits (Iterable[str]): Digests that were served from the cache.
+            products (Iterable[Tuple[str, str, str, str]]): ``(location, key, build, record)`` of
+                the products written, ``record`` being the product encoded by ``encode_product``.
+        """
+        now = time.time()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO entries (digest, location, last_used) VALUES (?, ?, ?)",
+            ((digest, location, now) for digest, location in stored)
+        )
+        self._conn.executemany(
+            "UPDATE entries SET last_used = ? WHERE digest = ?",
+            ((now, digest) for digest in hits)
+        )
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO products (location, key, build, record) VALUES (?, ?, ?, ?)", products
+        )
+        self._conn.commit()
+
+    def evict(self) -> int:
+        """
+        Drops the least recently used entries beyond ``max_entries``.
+
+        Returns:
+            int: Number of evicted entries.
+        """
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+        excess = count - self.max_entries
+        if excess <= 0:
+            return 0
+        self._conn.execute(
+            "DELETE FROM entries WHERE digest IN "
+            "(SELECT digest FROM entries ORDER BY last_used ASC, rowid ASC LIMIT ?)",
+            (excess,)
+        )
+        self._conn.commit()
+        logger.info(f"Evicted {excess} entries from build cache {self.path}")
+        return excess
+
+    def close(self) -> None:
+        self._conn.close()
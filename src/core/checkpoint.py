@@ -0,0 +1,314 @@
+import glob
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import zlib
+from typing import Dict, Any, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+from .fragments import FragmentWriter, iter_fragments
+from .sinks import SqliteSink, _lines, _open_compressed, _open_decompressed
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+_MANIFEST_PREFIX = ".batch_manifest"
+
+
+class ShardSpec(NamedTuple):
+    """
+    One of ``count`` disjoint slices of a catalog, selected by a stable hash of the product key.
+    """
+    index: int
+    count: int
+
+    @classmethod
+    def parse(cls, text: str) -> 'ShardSpec':
+        """
+        Parses ``"i/N"`` (0-based, so ``0/4`` to ``3/4``).
+
+        Raises:
+            ValueError: If the text is not a valid shard.
+        """
+        index, _, count = text.partition("/")
+        if not (index.isdigit() and count.isdigit()) or not int(index) < int(count):
+            raise ValueError(f"Invalid shard '{text}', expected i/N with 0 <= i < N")
+        return cls(int(index), int(count))
+
+    def owns(self, key: str) -> bool:
+        return zlib.crc32(key.encode('utf-8')) % self.count == self.index
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+
+class Assignment:
+    """
+    The products a batch run is responsible for: those of its shard that an earlier run
+    did not complete. Picklable, so it can be handed to pool workers.
+    """
+    def __init__(self, shard: Optional[ShardSpec] = None, completed: FrozenSet[str] = frozenset()):
+        self.shard = shard
+        self.completed = completed
+
+    def skips(self, key: str) -> bool:
+        return key in self.completed or (self.shard is not None and not self.shard.owns(key))
+
+
+def manifest_path(output_dir: str, shard: Optional[ShardSpec] = None) -> str:
+    """Returns where a batch run (of ``shard``) into ``output_dir`` keeps its manifest."""
+    if shard is None:
+        return os.path.join(output_dir, f"{_MANIFEST_PREFIX}.jsonl")
+    return os.path.join(output_dir, f"{_MANIFEST_PREFIX}-{shard.index:05d}-of-{shard.count:05d}.jsonl")
+
+
+class BatchManifest:
+    """
+    Progress of a batch run: the products it completed and where their pages are.
+
+    The manifest is a JSONL file whose first line is a header (format version, shard,
+    sink kind and the build fingerprint of the orchestrator) followed by one
+    ``{"key", "location"}`` line per completed product, with locations relative
+    to the output directory. Entries are buffered with ``add`` and appended and synced
+    by ``checkpoint``, which the caller invokes only once the pages written so far are
+    durable, so every product listed in the manifest has its pages on disk.
+
+    Attributes:
+        path (str): Manifest file.
+        header (Dict[str, Any]): The header line.
+        completed (Dict[str, str]): Location of every completed product, by key.
+    """
+    def __init__(self, path: str, header: Dict[str, Any], completed: Optional[Dict[str, str]] = None):
+        self.path = path
+        self.header = header
+        self.completed: Dict[str, str] = completed if completed is not None else {}
+        self._root = os.path.dirname(os.path.abspath(path))
+        self._pending: List[bytes] = []
+        self._file = None
+
+    @classmethod
+    def start(cls, path: str, sink_kind: str, shard: Optional[ShardSpec] = None, build: str = '',
+              resume: bool = False) -> 'BatchManifest':
+        """
+        Opens the manifest of a run: a fresh one, or with ``resume`` the one left by an
+        interrupted run (when there is one), whose completed products are kept.
+
+        Raises:
+            ValueError: If the manifest to resume belongs to another shard or sink.
+        """
+        header = {"version": MANIFEST_VERSION, "shard": list(shard) if shard is not None else None,
+                  "sink": sink_kind, "build": build}
+        manifest = cls(path, header)
+        if resume and os.path.exists(path):
+            previous = cls.read(path)
+            for name in ("shard", "sink"):
+                if previous.header.get(name) != header[name]:
+                    raise ValueError(f"Cannot resume {path}: it was written with {name} "
+                                     f"{previous.header.get(name)}, not {header[name]}")
+            if previous.header.get("build") != build:
+                logger.warning(f"Resuming {path}, whose completed pages were rendered by a different build")
+            manifest.completed = previous.completed
+            manifest._rewrite(previous.completed.items())
+        else:
+            manifest._rewrite(())
+        return manifest
+
+    @classmethod
+    def read(cls, path: str) -> 'BatchManifest':
+        """
+        Loads a manifest, ignoring a trailing line cut short by a crash.
+
+        Raises:
+            ValueError: If the file is not a batch manifest of a supported version.
+        """
+        completed = {}
+        with open(path, 'rb') as f:
+            lines = f.read().split(b'\n')
+        try:
+            header = json.loads(lines[0])
+        except ValueError:
+            header = None
+        if not isinstance(header, dict) or header.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"{path} is not a batch manifest (version {MANIFEST_VERSION})")
+        for line in lines[1:]:
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                logger.warning(f"Ignoring a truncated entry at the end of {path}")
+                break
+            completed[entry["key"]] = entry["location"]
+        return cls(path, header, completed)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def add(self, key: str, location: str) -> None:
+        """Buffers a completed product until the next ``checkpoint``."""
+        location = os.path.relpath(location, self._root)
+        self.completed[key] = location
+        self._pending.append(_entry(key, location))
+
+    def checkpoint(self) -> None:
+        """Appends the buffered entries and syncs them to disk."""
+        if not self._pending:
+            return
+        self._file.write(b''.join(self._pending))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending.clear()
+
+    def discard(self) -> None:
+        """Drops the entries buffered since the last checkpoint, whose pages may not be stored."""
+        for line in self._pending:
+            self.completed.pop(json.loads(line)["key"], None)
+        self._pending.clear()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self.checkpoint()
+            self._file.close()
+            self._file = None
+
+    def _rewrite(self, entries: Iterable[Tuple[str, str]]) -> None:
+        # Starts the file over with the header and the given entries, then appends to it.
+        tmp = f"{self.path}.tmp"
+        os.makedirs(self._root, exist_ok=True)
+        with open(tmp, 'wb') as f:
+            f.write(json.dumps(self.header).encode('utf-8') + b'\n')
+            f.writelines(_entry(key, location) for key, location in entries)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._file = open(self.path, 'ab')
+
+    def __enter__(self) -> 'BatchManifest':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _entry(key: str, location: str) -> bytes:
+    return json.dumps({"key": key, "location": location}).encode('utf-8') + b'\n'
+
+
+def merge_outputs(sources: List[str], output_dir: str) -> BatchManifest:
+    """
+    Combines the outputs and manifests of several (sharded) batch runs into ``output_dir``.
+
+    Every manifest found in a source directory is merged. Pages are copied according to
+    the sink that wrote them: product directories for "dir", the ``pages`` rows for
+    "sqlite", the lines of same-named shard files for "jsonl", and the products of
+    same-named shard files, deduplicated anew, for "fragments". A warning is logged
+    when the merged shards do not cover the whole catalog.
+
+    Args:
+        sources (List[str]): Output directories of the runs to merge.
+        output_dir (str): Directory receiving the merged pages and manifest.
+
+    Returns:
+        BatchManifest: The merged manifest, written to ``<output_dir>/.batch_manifest.jsonl``.
+
+    Raises:
+        ValueError: If a source has no manifest or the sources were written by different sinks.
+    """
+    manifests = []
+    for source in sources:
+        paths = sorted(glob.glob(os.path.join(source, f"{_MANIFEST_PREFIX}*.jsonl")))
+        if not paths:
+            raise ValueError(f"No batch manifest found in {source}")
+        manifests += [(source, BatchManifest.read(path)) for path in paths]
+    kinds = {manifest.header["sink"] for _, manifest in manifests}
+    if len(kinds) != 1:
+        raise ValueError(f"Cannot merge outputs of different sinks: {sorted(kinds)}")
+    kind = kinds.pop()
+    shards = {tuple(m.header["shard"]) for _, m in manifests if m.header["shard"] is not None}
+    counts = {count for _, count in shards}
+    if shards and (len(counts) != 1 or len(shards) != next(iter(counts))):
+        logger.warning(f"Merged shards {sorted(f'{i}/{n}' for i, n in shards)} do not cover the whole catalog")
+
+    os.makedirs(output_dir, exist_ok=True)
+    sources = list(dict.fromkeys(source for source, _ in manifests))
+    if kind == "dir":
+        for source, manifest in manifests:
+            if os.path.samefile(source, output_dir):
+                continue
+            for location in manifest.completed.values():
+                shutil.copytree(os.path.join(source, location), os.path.join(output_dir, location),
+                                dirs_exist_ok=True)
+    elif kind == "sqlite":
+        _merge_sqlite(sources, output_dir)
+    elif kind == "jsonl":
+        _merge_jsonl(sources, output_dir)
+    elif kind == "fragments":
+        _merge_fragments(sources, output_dir)
+    else:
+        raise ValueError(f"Unknown sink '{kind}' in manifest")
+
+    completed: Dict[str, str] = {}
+    for _, manifest in manifests:
+        for key, location in manifest.completed.items():
+            if completed.setdefault(key, location) != location:
+                logger.warning(f"Product {key} was completed by several runs; keeping {completed[key]}")
+    header = {"version": MANIFEST_VERSION, "shard": None, "sink": kind,
+              "build": ",".join(sorted({m.header["build"] for _, m in manifests}))}
+    merged = BatchManifest(manifest_path(output_dir), header, completed)
+    merged._rewrite(completed.items())
+    merged.close()
+    return merged
+
+
+def _merge_sqlite(sources: List[str], output_dir: str) -> None:
+    target = SqliteSink(os.path.join(output_dir, "pages.sqlite"))
+    try:
+        conn = target._conn
+        for source in sources:
+            path = os.path.join(source, "pages.sqlite")
+            if os.path.abspath(path) == os.path.abspath(target.path):
+                continue
+            conn.execute("ATTACH DATABASE ? AS source", (path,))
+            try:
+                with conn:
+                    conn.execute("INSERT OR REPLACE INTO pages SELECT product_id, page_type, body FROM source.pages")
+            finally:
+                conn.execute("DETACH DATABASE source")
+    except sqlite3.Error as e:
+        raise ValueError(f"Cannot merge SQLite outputs: {e}") from e
+    finally:
+        target.close()
+
+
+def _shard_files(sources: List[str], pattern: str) -> List[str]:
+    names = [sorted(os.path.basename(p) for p in glob.glob(os.path.join(source, pattern))) for source in sources]
+    if any(n != names[0] for n in names):
+        raise ValueError("Cannot merge outputs with different shard files")
+    return names[0]
+
+
+def _compression(name: str) -> str:
+    return {".zst": "zstd", ".gz": "gzip"}.get(os.path.splitext(name)[1], "none")
+
+
+def _merge_fragments(sources: List[str], output_dir: str) -> None:
+    for name in _shard_files(sources, "fragments-*-of-*.kfrag*"):
+        writer = FragmentWriter(os.path.join(output_dir, name), _compression(name))
+        for source in sources:
+            for key, encoded in iter_fragments(os.path.join(source, name), encoded=True):
+                writer.add(key, encoded)
+        writer.close()
+
+
+def _merge_jsonl(sources: List[str], output_dir: str) -> None:
+    # Shards are recompressed rather than concatenated, since not every reader handles multi-frame files.
+    for name in _shard_files(sources, "pages-*-of-*.jsonl*"):
+        path = os.path.join(output_dir, name)
+        with _open_compressed(path + ".tmp", _compression(name)) as out:
+            for source in sources:
+                with _open_decompressed(os.path.join(source, name)) as raw:
+                    for line in _lines(raw):
+                        out.write(line + b'\n')
+        os.replace(path + ".tmp", path)
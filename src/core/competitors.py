@@ -0,0 +1,396 @@
+import bisect
+import heapq
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import sys
+from array import array
+from dataclasses import dataclass
+from typing import Dict, Any, Iterable, List, Optional, Sequence, Tuple
+
+from .models import Product
+from .streaming import iter_records
+from .tabular import RowError
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"KCIDX001"
+BUCKET_RATIO = 1.25
+PRICE_BUCKETS = 64
+UNKNOWN_BUCKET = PRICE_BUCKETS  # records without a parsable price
+MAX_SKIN_FACETS = 64
+SKIN_BONUS = 0.5
+
+_NUMBER_RE = re.compile(r"\d[\d.,]*")
+_DECIMAL_COMMA_RE = re.compile(r"\d+,\d{2}")
+
+
+def parse_price(text: Any) -> Optional[float]:
+    """
+    Extracts the amount from a price string such as "₹1,299", "$12.99" or "€12,50".
+
+    The currency is ignored. Returns None when the text holds no number.
+    """
+    if isinstance(text, (int, float)):
+        return float(text)
+    match = _NUMBER_RE.search(str(text))
+    if match is None:
+        return None
+    number = match.group().rstrip('.,')
+    if _DECIMAL_COMMA_RE.fullmatch(number):
+        number = number.replace(',', '.')
+    else:
+        number = number.replace(',', '')
+    try:
+        return float(number)
+    except ValueError:
+        return None
+
+
+def price_bucket(price: Optional[float]) -> int:
+    """Maps a price to a logarithmic bucket; neighbouring buckets differ by ``BUCKET_RATIO``."""
+    if price is None or price <= 0:
+        return UNKNOWN_BUCKET
+    return min(PRICE_BUCKETS - 1, max(0, int(math.log(price) / math.log(BUCKET_RATIO))))
+
+
+def split_terms(text: Any) -> List[str]:
+    """Splits a comma-separated list (ingredients, skin types) into normalised, unique terms."""
+    terms = []
+    for part in str(text or '').split(','):
+        term = ' '.join(part.lower().split())
+        if term and term not in terms:
+            terms.append(term)
+    return terms
+
+
+@dataclass(frozen=True, slots=True)
+class Competitor:
+    """A competitor product, in the shape the ContentLogicAgent compares against."""
+    name: str
+    ingredients: str
+    benefits: str
+    price: str
+    skin_type: str = ''
+
+    def to_dict(self) -> Dict[str, str]:
+        return {"name": self.name, "ingredients": self.ingredients, "benefits": self.benefits,
+                "price": self.price, "skin_type": self.skin_type}
+
+    @classmethod
+    def from_record(cls, record: Any) -> 'Competitor':
+        """
+        Builds a competitor from a parsed Product or a raw catalog record (any key casing,
+        as accepted by the DataParserAgent; ``ingredients`` and ``name`` are also accepted).
+
+        Raises:
+            ValueError: If the record is not an object or has no name.
+        """
+        if isinstance(record, Product):
+            return cls(record.name, record.key_ingredients, record.benefits, str(record.price), record.skin_type)
+        if not isinstance(record, dict):
+            raise ValueError(f"Competitor record is not an object: {record!r:.80}")
+        normalized = {k.lower().replace(" ", "_"): v for k, v in record.items()}
+        name = normalized.get('product_name', normalized.get('name'))
+        if not name:
+            raise ValueError("Competitor record has no name")
+        return cls(str(name), str(normalized.get('key_ingredients', normalized.get('ingredients', ''))),
+                   str(normalized.get('benefits', '')), str(normalized.get('price', '')),
+                   str(normalized.get('skin_type', '')))
+
+
+class CompetitorIndex:
+    """
+    In-memory search index over a competitor catalog.
+
+    Postings are keyed by (ingredient, price bucket), so a query only scans competitors
+    that share an ingredient and sit in a nearby price range. Competitors are scored by
+    the IDF-weighted ingredients they share with the product, a bonus for a shared skin
+    type, and a penalty for the log-ratio of their prices.
+
+    All numeric data lives in flat arrays, so a saved index is opened with ``mmap``
+    without decoding the postings; only the winning competitors' texts are decoded.
+
+    Attributes:
+        terms (List[str]): Ingredient vocabulary; a term's id is its position.
+        skin_facets (List[str]): Skin-type vocabulary (at most 64, one bit each).
+    """
+    SECTIONS = {
+        "keys": 'q', "offsets": 'q', "postings": 'i', "term_df": 'i',
+        "bucket_offsets": 'q', "bucket_members": 'i',
+        "log_price": 'd', "skin": 'Q', "text_offsets": 'q', "text": 'B',
+    }
+
+    def __init__(self, terms: List[str], skin_facets: List[str], sections: Dict[str, Sequence],
+                 buffer: Optional[mmap.mmap] = None, views: Sequence[memoryview] = ()):
+        self.terms = terms
+        self.skin_facets = skin_facets
+        self._term_ids = {term: i for i, term in enumerate(terms)}
+        self._skin_ids = {facet: i for i, facet in enumerate(skin_facets)}
+        self._sections = sections
+        self._keys = sections["keys"]
+        self._offsets = sections["offsets"]
+        self._postings = sections["postings"]
+        self._term_df = sections["term_df"]
+        self._bucket_offsets = sections["bucket_offsets"]
+        self._bucket_members = sections["bucket_members"]
+        self._log_price = sections["log_price"]
+        self._skin = sections["skin"]
+        self._text_offsets = sections["text_offsets"]
+        self._text = sections["text"]
+        self._buffer = buffer
+        self._views = list(views)
+
+    @classmethod
+    def build(cls, records: Iterable[Any]) -> 'CompetitorIndex':
+        """
+        Indexes a competitor catalog. Invalid records (such as the RowError of a rejected
+        catalog row) are logged and left out.
+
+        Args:
+            records (Iterable[Any]): Competitors, Products or raw catalog records.
+        """
+        terms: Dict[str, int] = {}
+        facets: Dict[str, int] = {}
+        postings: Dict[int, array] = {}
+        by_bucket: List[array] = [array('i') for _ in range(PRICE_BUCKETS + 1)]
+        log_price = array('d')
+        skin = array('Q')
+        text_offsets = array('q', [0])
+        text = bytearray()
+        width = PRICE_BUCKETS + 1
+
+        for record in records:
+            try:
+                if isinstance(record, RowError):
+                    raise record
+                competitor = record if isinstance(record, Competitor) else Competitor.from_record(record)
+            except ValueError as e:
+                logger.warning(f"Skipping invalid competitor record: {e}")
+                continue
+            cid = len(log_price)
+            amount = parse_price(competitor.price)
+            bucket = price_bucket(amount)
+            for term in split_terms(competitor.ingredients):
+                term_id = terms.setdefault(term, len(terms))
+                postings.setdefault(term_id * width + bucket, array('i')).append(cid)
+            mask = 0
+            for facet in split_terms(competitor.skin_type):
+                facet_id = facets.setdefault(facet, len(facets)) if len(facets) < MAX_SKIN_FACETS else facets.get(facet)
+                if facet_id is not None:
+                    mask |= 1 << facet_id
+            by_bucket[bucket].append(cid)
+            # Unknown prices rank last whenever the product has a price.
+            log_price.append(math.log(amount) if amount else math.inf)
+            skin.append(mask)
+            for value in (competitor.name, competitor.ingredients, competitor.benefits, competitor.price,
+                          competitor.skin_type):
+                text += value.encode('utf-8')
+                text_offsets.append(len(text))
+
+        keys = array('q', sorted(postings))
+        offsets = array('q', [0])
+        flat = array('i')
+        term_df = array('i', [0] * len(terms))
+        for key in keys:
+            flat.extend(postings[key])
+            offsets.append(len(flat))
+            term_df[key // width] += len(postings[key])
+        bucket_offsets = array('q', [0])
+        bucket_members = array('i')
+        for members in by_bucket:
+            bucket_members.extend(members)
+            bucket_offsets.append(len(bucket_members))
+
+        sections = {"keys": keys, "offsets": offsets, "postings": flat, "term_df": term_df,
+                    "bucket_offsets": bucket_offsets, "bucket_members": bucket_members,
+                    "log_price": log_price, "skin": skin, "text_offsets": text_offsets, "text": bytes(text)}
+        return cls(list(terms), list(facets), sections)
+
+    def save(self, path: str) -> None:
+        """
+        Writes the index in a flat binary layout that ``load`` maps without copying.
+        """
+        layout = {}
+        position = 0
+        blobs = []
+        for name, typecode in self.SECTIONS.items():
+            data = bytes(self._sections[name]) if typecode == 'B' else array(typecode, self._sections[name]).tobytes()
+            layout[name] = [position, len(data)]
+            blobs.append(data)
+            position += len(data) + (-len(data) % 8)
+        header = json.dumps({"byteorder": sys.byteorder, "count": len(self), "terms": self.terms,
+                             "skin_facets": self.skin_facets, "sections": layout}).encode('utf-8')
+        tmp = f"{path}.tmp-{os.getpid()}"
+        with open(tmp, 'wb') as f:
+            f.write(MAGIC)
+            f.write(len(header).to_bytes(8, 'little'))
+            f.write(header)
+            f.write(b'\0' * (-(16 + len(header)) % 8))
+            for data in blobs:
+                f.write(data)
+                f.write(b'\0' * (-len(data) % 8))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'CompetitorIndex':
+        """
+        Opens a saved index by memory-mapping it; the arrays are views into the mapping.
+
+        Raises:
+            ValueError: If the file is not a competitor index written on this platform.
+        """
+        with open(path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if buffer[:8] != MAGIC:
+            buffer.close()
+            raise ValueError(f"{path} is not a competitor index")
+        size = int.from_bytes(buffer[8:16], 'little')
+        header = json.loads(buffer[16:16 + size].decode('utf-8'))
+        if header["byteorder"] != sys.byteorder:
+            buffer.close()
+            raise ValueError(f"{path} was written on a {header['byteorder']}-endian machine")
+        start = 16 + size + (-(16 + size) % 8)
+        views = [memoryview(buffer)]
+        sections = {}
+        for name, typecode in cls.SECTIONS.items():
+            offset, length = header["sections"][name]
+            section = views[0][start + offset:start + offset + length]
+            views.append(section)
+            if typecode != 'B':
+                section = section.cast(typecode)
+                views.append(section)
+            sections[name] = section
+        return cls(header["terms"], header["skin_facets"], sections, buffer, views)
+
+    @classmethod
+    def open(cls, path: str) -> 'CompetitorIndex':
+        """Loads a saved index, or builds one from a competitor catalog (JSON, JSONL, CSV or TSV)."""
+        if is_index_file(path):
+            return cls.load(path)
+        return cls.build(iter_records(path))
+
+    def __len__(self) -> int:
+        return len(self._log_price)
+
+    def competitor(self, cid: int) -> Competitor:
+        """Decodes the competitor with the given id."""
+        base = cid * 5
+        bounds = self._text_offsets[base:base + 6]
+        text = self._text
+        return Competitor(*(bytes(text[bounds[i]:bounds[i + 1]]).decode('utf-8') for i in range(5)))
+
+    def top_k(self, product: Product, k: int = 3, price_window: int = 2,
+              budget: int = 1024) -> List[Tuple[float, Competitor]]:
+        """
+        Returns the ``k`` competitors most similar to ``product``, best first.
+
+        Args:
+            product (Product): The product to find competitors for.
+            k (int): Number of competitors returned.
+            price_window (int): Price buckets searched on each side of the product's bucket.
+            budget (int): Maximum number of postings scanned, split between the product's
+                ingredients; within an ingredient the closest price buckets are scanned first.
+
+        Returns:
+            List[Tuple[float, Competitor]]: ``(score, competitor)`` pairs.
+        """
+        width = PRICE_BUCKETS + 1
+        count = len(self)
+        amount = parse_price(product.price)
+        bucket = price_bucket(amount)
+        if bucket == UNKNOWN_BUCKET:
+            buckets = list(range(width))
+        else:
+            buckets = [bucket]
+            for step in range(1, price_window + 1):
+                buckets += [b for b in (bucket - step, bucket + step) if 0 <= b < PRICE_BUCKETS]
+        term_ids = sorted((self._term_ids[t] for t in split_terms(product.key_ingredients) if t in self._term_ids),
+                          key=self._term_df.__getitem__)
+
+        scores: Dict[int, float] = {}
+        keys, offsets, postings = self._keys, self._offsets, self._postings
+        get = scores.get
+        # Every ingredient gets a share of the budget. Postings are ordered by competitor id,
+        # so the scanned prefixes of different ingredients overlap and shared ones add up.
+        share = budget // len(term_ids) if term_ids else 0
+        for term_id in term_ids:
+            weight = math.log((count + 1) / (self._term_df[term_id] + 1)) + 1.0
+            remaining = share
+            for b in buckets:
+                key = term_id * width + b
+                slot = bisect.bisect_left(keys, key)
+                if slot == len(keys) or keys[slot] != key:
+                    continue
+                lo, hi = offsets[slot], offsets[slot + 1]
+                hi = min(hi, lo + remaining)
+                for cid in postings[lo:hi]:
+                    scores[cid] = get(cid, 0.0) + weight
+                remaining -= hi - lo
+                if remaining <= 0:
+                    break
+        remaining = budget
+        if not scores:
+            # No shared ingredient: fall back to the closest price buckets.
+            for b in buckets:
+                lo, hi = self._bucket_offsets[b], self._bucket_offsets[b + 1]
+                hi = min(hi, lo + remaining)
+                scores.update(dict.fromkeys(self._bucket_members[lo:hi], 0.0))
+                remaining -= hi - lo
+                if remaining <= 0:
+                    break
+
+        skin = 0
+        for facet in split_terms(product.skin_type):
+            facet_id = self._skin_ids.get(facet)
+            if facet_id is not None:
+                skin |= 1 << facet_id
+        skins, log_prices = self._skin, self._log_price
+        if amount:
+            log_amount = math.log(amount)
+            candidates = ((value + (SKIN_BONUS if skin & skins[cid] else 0.0) - abs(log_prices[cid] - log_amount), -cid)
+                          for cid, value in scores.items())
+        else:
+            candidates = ((value + (SKIN_BONUS if skin & skins[cid] else 0.0), -cid) for cid, value in scores.items())
+        ranked = heapq.nlargest(k + 1, candidates)
+        results = []
+        for value, negated in ranked:
+            competitor = self.competitor(-negated)
+            if competitor.name != product.name and len(results) < k:
+                results.append((value, competitor))
+        return results
+
+    def close(self) -> None:
+        """Unmaps a loaded index; the index cannot be queried afterwards."""
+        if self._buffer is not None:
+            for view in reversed(self._views):
+                view.release()
+            self._views = []
+            self._buffer.close()
+            self._buffer = None
+
+
+def is_index_file(path: str) -> bool:
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def ensure_index(catalog_path: str, index_path: str) -> str:
+    """
+    Makes sure an up-to-date saved index exists for a competitor catalog.
+
+    The index is rebuilt only when it is missing or older than the catalog, so a run
+    (and every worker process, which maps the same file) starts without reindexing.
+
+    Returns:
+        str: Path of the index to open: ``catalog_path`` itself when it already is an index.
+    """
+    if is_index_file(catalog_path):
+        return catalog_path
+    if not os.path.exists(index_path) or os.path.getmtime(index_path) < os.path.getmtime(catalog_path):
+        os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+        CompetitorIndex.build(iter_records(catalog_path)).save(index_path)
+    return index_path
@@ -0,0 +1,81 @@
+from typing import Dict, FrozenSet, Iterable, List, Set
+
+from .engine import AgentGraph
+from .models import Product, PRODUCT_FIELDS
+from .templates import CompiledTemplate
+
+ALL_FIELDS = frozenset(PRODUCT_FIELDS)
+
+
+def changed_fields(previous: Product, product: Product) -> List[str]:
+    """Returns the fields whose values differ between two versions of a product."""
+    return [name for name in PRODUCT_FIELDS if getattr(previous, name) != getattr(product, name)]
+
+
+class FieldDependencies:
+    """
+    The product fields every page depends on.
+
+    A page depends on the fields its template reads directly (``{{ product.price }}``)
+    and on the fields read by the agents producing the other artifacts it references,
+    following the agents' declared ``inputs`` and ``product_fields`` transitively. An
+    agent that does not declare its fields is assumed to read all of them.
+
+    Attributes:
+        pages (Dict[str, FrozenSet[str]]): Product fields each page depends on.
+        inputs (Dict[str, FrozenSet[str]]): Artifacts each page's template references.
+    """
+    def __init__(self, graph: AgentGraph, templates: Dict[str, CompiledTemplate], source: str = "product"):
+        self.graph = graph
+        self.revision = graph.revision
+        self.source = source
+        self._artifacts: Dict[str, FrozenSet[str]] = {}
+        self.pages: Dict[str, FrozenSet[str]] = {}
+        self.inputs: Dict[str, FrozenSet[str]] = {}
+        for name, template in templates.items():
+            fields: Set[str] = set()
+            for path in template.paths:
+                if path[0] == source:
+                    fields.update(path[1:2] if len(path) > 1 and path[1] in ALL_FIELDS else ALL_FIELDS)
+                else:
+                    fields |= self.artifact_fields(path[0])
+            self.pages[name] = frozenset(fields)
+            self.inputs[name] = frozenset(path[0] for path in template.paths)
+
+    def artifact_fields(self, artifact: str) -> FrozenSet[str]:
+        """
+        Returns the product fields an artifact is computed from.
+        """
+        fields = self._artifacts.get(artifact)
+        if fields is not None:
+            return fields
+        node = self.graph.producers.get(artifact)
+        if artifact == self.source or node is None:
+            fields = ALL_FIELDS
+        else:
+            collected: Set[str] = set()
+            for dep in node.inputs:
+                if dep == self.source:
+                    declared = node.agent.product_fields
+                    collected.update(ALL_FIELDS if declared is None else declared)
+                else:
+                    collected |= self.artifact_fields(dep)
+            fields = frozenset(collected)
+        self._artifacts[artifact] = fields
+        return fields
+
+    def affected_pages(self, changed: Iterable[str]) -> List[str]:
+        """
+        Returns the pages that have to be re-rendered when the given fields change, in page order.
+        """
+        changed = set(changed)
+        return [name for name, fields in self.pages.items() if not fields.isdisjoint(changed)]
+
+    def page_inputs(self, pages: Iterable[str]) -> List[str]:
+        """
+        Returns the artifacts needed to render the given pages.
+        """
+        needed: Set[str] = set()
+        for name in pages:
+            needed |= self.inputs[name]
+        return sorted(needed)
@@ -0,0 +1,173 @@
+import json
+from dataclasses import dataclass
+from json.encoder import c_make_encoder, encode_basestring_ascii
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+from .registry import JSON_BACKENDS
+
+
+def _orjson() -> Any:
+    # Optional dependency, and slow to import: only the encodings using it import it.
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+
+@dataclass(frozen=True)
+class PageEncoding:
+    """
+    How pages are serialised to JSON.
+
+    The output of the "json" backend is byte-for-byte what ``json.dumps`` writes with the
+    same ``indent`` (and ``separators=(',', ':')`` when compact), but indented output is
+    written by a specialised encoder several times faster than the standard library's.
+    The "orjson" backend writes UTF-8 instead of ``\\u`` escapes and supports compact or
+    2-space indented output only.
+
+    Attributes:
+        indent (Optional[int]): Spaces per nesting level; None writes each page on one line.
+        compact (bool): Leave out the spaces after ``,`` and ``:`` (never indented).
+        backend (str): "json" (standard library) or "orjson" (requires the ``orjson`` package).
+    """
+    indent: Optional[int] = None
+    compact: bool = False
+    backend: str = "json"
+
+    def __post_init__(self):
+        if self.backend not in JSON_BACKENDS:
+            raise ValueError(f"Unknown JSON backend '{self.backend}', expected one of {JSON_BACKENDS}")
+        if self.compact and self.indent is not None:
+            raise ValueError("Compact JSON cannot be indented")
+        if self.backend == "orjson":
+            if _orjson() is None:
+                raise RuntimeError("The orjson JSON backend requires the 'orjson' package")
+            if self.indent not in (None, 2):
+                raise ValueError("The orjson JSON backend only indents by 2 spaces")
+            # orjson has no spaced single-line format.
+            object.__setattr__(self, "compact", self.indent is None)
+        object.__setattr__(self, "_dump", self._make_dump())
+        string = encode_basestring_ascii if self.backend == "json" else _orjson_string(_orjson())
+        object.__setattr__(self, "_string", string)
+        object.__setattr__(self, "_escape", lambda text: string(text)[1:-1])
+
+    def __reduce__(self):
+        return type(self), (self.indent, self.compact, self.backend)
+
+    def adjusted(self, compact: bool = False, backend: str = "json") -> 'PageEncoding':
+        """
+        Returns this encoding made compact (when ``compact`` is set) and written by ``backend``.
+        """
+        if compact:
+            return PageEncoding(compact=True, backend=backend)
+        return PageEncoding(indent=self.indent, compact=self.compact, backend=backend)
+
+    @property
+    def item_separator(self) -> str:
+        return "," if self.compact or self.indent is not None else ", "
+
+    @property
+    def key_separator(self) -> str:
+        return ":" if self.compact else ": "
+
+    def newline(self, level: int) -> str:
+        """Returns the whitespace that starts a line at nesting ``level`` ('' when not indented)."""
+        return "" if self.indent is None else "\n" + " " * (self.indent * level)
+
+    def dumps(self, value: Any, level: int = 0) -> str:
+        """
+        Serialises ``value`` as it is written when nested ``level`` levels deep.
+        """
+        return self._dump(value, level)
+
+    def encode(self, value: Any) -> bytes:
+        return self._dump(value, 0).encode('utf-8')
+
+    def string(self, text: str) -> str:
+        """Returns ``text`` as a quoted JSON string."""
+        return self._string(text)
+
+    def escape(self, text: str) -> str:
+        """Returns ``text`` escaped for use inside a JSON string, without the quotes."""
+        return self._escape(text)
+
+    def envelope(self, items: Iterable[Tuple[str, bytes]]) -> bytes:
+        """
+        Wraps already encoded values into a single-line JSON object, e.g. a JSONL record.
+        """
+        item, key = ("," if self.compact else ", "), (":" if self.compact else ": ")
+        return b"{" + item.encode().join(self.string(name).encode('utf-8') + key.encode() + data
+                                          for name, data in items) + b"}"
+
+    def _make_dump(self) -> Callable[[Any, int], str]:
+        if self.backend == "orjson":
+            orjson = _orjson()
+            option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if self.indent else 0)
+            if not self.indent:
+                return lambda value, level: orjson.dumps(value, option=option).decode('utf-8')
+            return lambda value, level: orjson.dumps(value, option=option).decode('utf-8').replace(
+                "\n", self.newline(level))
+        if self.indent is None:
+            # Single-line output goes through the standard library's C encoder, built once.
+            if c_make_encoder is None:
+                encoder = json.JSONEncoder(separators=(self.item_separator, self.key_separator))
+                return lambda value, level: encoder.encode(value)
+            iterencode = c_make_encoder(None, _unserializable, encode_basestring_ascii, None, self.key_separator,
+                                        self.item_separator, False, False, True)
+            return lambda value, level: "".join(iterencode(value, 0))
+        return _indented_encoder(" " * self.indent, encode_basestring_ascii)
+
+
+def _orjson_string(orjson: Any) -> Callable[[str], str]:
+    return lambda text: orjson.dumps(text).decode('utf-8')
+
+
+def _unserializable(value: Any) -> Any:
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _key(key: Any) -> str:
+    # The key conversions json.dumps applies.
+    if isinstance(key, str):
+        return key
+    if key is True or key is False or key is None or isinstance(key, (int, float)):
+        return json.dumps(key)
+    raise TypeError(f"keys must be str, int, float, bool or None, not {type(key).__name__}")
+
+
+def _indented_encoder(unit: str, string: Callable[[str], str]) -> Callable[[Any, int], str]:
+    """
+    Builds an encoder equivalent to ``json.dumps(value, indent=len(unit))``.
+
+    Every container is joined in one go from its children, with the line break and
+    indentation of its level folded into the separators.
+    """
+    def encode(value: Any, pad: str) -> str:
+        # Strings, the most common leaves, are encoded inline rather than through a call.
+        if isinstance(value, str):
+            return string(value)
+        if isinstance(value, dict):
+            if not value:
+                return "{}"
+            inner = pad + unit
+            return ("{" + inner + ("," + inner).join([
+                string(k if type(k) is str else _key(k)) + ": " + (string(v) if type(v) is str else encode(v, inner))
+                for k, v in value.items()]) + pad + "}")
+        if isinstance(value, (list, tuple)):
+            if not value:
+                return "[]"
+            inner = pad + unit
+            return "[" + inner + ("," + inner).join([string(v) if type(v) is str else encode(v, inner)
+                                                     for v in value]) + pad + "]"
+        return json.dumps(value)
+
+    def dump(value: Any, level: int) -> str:
+        return encode(value, "\n" + unit * level)
+
+    return dump
+
+
+# The two encodings pages have always been written with.
+INDENTED = PageEncoding(indent=2)
+SINGLE_LINE = PageEncoding()
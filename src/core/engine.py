@@ -0,0 +1,289 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, Future, wait
+from dataclasses import dataclass
+from typing import Dict, Any, Iterable, List, Optional, Set
+
+from ..agents.base_agent import BaseAgent
+from .logs import event
+from .metrics import AgentMetrics
+from .registry import EXECUTION_MODES
+
+logger = logging.getLogger(__name__)
+
+
+class AgentTimeoutError(TimeoutError):
+    """Raised when an agent does not finish within its timeout."""
+
+
+@dataclass
+class AgentNode:
+    """
+    An agent registered in the graph, together with its execution policy.
+
+    Attributes:
+        name (str): Unique node name (the agent class name by default).
+        agent (BaseAgent): The agent; its ``inputs`` and ``output`` define the edges.
+        timeout (Optional[float]): Seconds allowed per attempt (thread and asyncio modes).
+        retries (int): Additional attempts after a failure or timeout.
+    """
+    name: str
+    agent: BaseAgent
+    timeout: Optional[float] = None
+    retries: int = 0
+
+    @property
+    def inputs(self):
+        return self.agent.inputs
+
+    @property
+    def output(self) -> str:
+        return self.agent.output
+
+
+class AgentGraph:
+    """
+    Dependency graph of agents, built from the artifacts they declare.
+
+    An agent depends on whichever agent produces one of its inputs. Inputs that no
+    agent produces must be supplied when the graph is executed.
+    """
+    def __init__(self, nodes: Iterable[AgentNode] = ()):
+        self.nodes: Dict[str, AgentNode] = {}
+        self.producers: Dict[str, AgentNode] = {}
+        self.revision = 0
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: AgentNode) -> None:
+        """
+        Registers a node.
+
+        Raises:
+            ValueError: If the name is taken or another agent already produces the same output.
+        """
+        if node.name in self.nodes:
+            raise ValueError(f"Duplicate agent name: {node.name}")
+        if node.output in self.producers:
+            raise ValueError(f"Artifact '{node.output}' is produced by both "
+                             f"{self.producers[node.output].name} and {node.name}")
+        self.nodes[node.name] = node
+        self.producers[node.output] = node
+        self.revision += 1
+
+    def plan(self, available: Iterable[str], targets: Iterable[str]) -> List[AgentNode]:
+        """
+        Returns the nodes needed to produce ``targets`` from ``available``, in dependency order.
+
+        Raises:
+            ValueError: If an input cannot be produced or the graph has a cycle.
+        """
+        available = set(available)
+        order: List[AgentNode] = []
+        visiting: Set[str] = set()
+        done: Set[str] = set()
+
+        def visit(artifact: str) -> None:
+            if artifact in available or artifact in done:
+                return
+            node = self.producers.get(artifact)
+            if node is None:
+                raise ValueError(f"No agent produces required artifact '{artifact}'")
+            if artifact in visiting:
+                raise ValueError(f"Dependency cycle through agent {node.name}")
+            visiting.add(artifact)
+            for dep in node.inputs:
+                visit(dep)
+            visiting.discard(artifact)
+            done.add(artifact)
+            order.append(node)
+
+        for target in targets:
+            visit(target)
+        return order
+
+
+def _log_start(node: AgentNode) -> None:
+    # Runs for every agent of every product, so the record is only built when it is logged.
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Agent: %s working...", node.name, extra=event("agent.start", agent=node.name))
+
+
+def _log_retry(node: AgentNode, error: BaseException, attempt: int) -> None:
+    logger.warning("Agent %s failed (%s), retrying (%d/%d)", node.name, error, attempt, node.retries,
+                   extra=event("agent.retry", agent=node.name, attempt=attempt, error=str(error)))
+
+
+class DagExecutor:
+    """
+    Runs the agents of a graph, starting each one as soon as its inputs are ready.
+
+    Modes:
+        sequential: Runs agents one after another in the calling thread.
+        thread: Runs independent agents concurrently on a shared thread pool.
+        asyncio: Runs agents as asyncio tasks through ``BaseAgent.ainvoke``, which moves
+            synchronous agents to a worker thread unless they override it.
+
+    Per-agent timeouts are enforced in the thread and asyncio modes; retries apply in all modes.
+    When ``metrics`` is given, every agent call is measured through it.
+    """
+    def __init__(self, graph: AgentGraph, mode: str = "sequential", max_workers: Optional[int] = None,
+                 metrics: Optional[AgentMetrics] = None):
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode '{mode}', expected one of {EXECUTION_MODES}")
+        self.graph = graph
+        self.mode = mode
+        self.metrics = metrics
+        self._pool = ThreadPoolExecutor(max_workers=max_workers) if mode == "thread" else None
+        self._plans: Dict[Any, List[AgentNode]] = {}
+
+    def run(self, artifacts: Dict[str, Any], targets: Iterable[str]) -> Dict[str, Any]:
+        """
+        Produces ``targets`` from the given artifacts.
+
+        Args:
+            artifacts (Dict[str, Any]): Initially available artifacts, e.g. ``{"product": ...}``.
+            targets (Iterable[str]): Names of the artifacts to produce.
+
+        Returns:
+            Dict[str, Any]: All available and produced artifacts.
+        """
+        artifacts = dict(artifacts)
+        plan = self._plan(artifacts, targets)
+        if self.mode == "thread":
+            self._run_threaded(plan, artifacts)
+        elif self.mode == "asyncio":
+            # asyncio is only imported by the runs that use it, as it is slow to import.
+            import asyncio
+            asyncio.run(self._run_async(plan, artifacts))
+        else:
+            for node in plan:
+                artifacts[node.output] = self._call(node, artifacts)
+        return artifacts
+
+    async def run_async(self, artifacts: Dict[str, Any], targets: Iterable[str]) -> Dict[str, Any]:
+        """
+        Coroutine variant of ``run`` for callers that already own an event loop.
+        """
+        artifacts = dict(artifacts)
+        await self._run_async(self._plan(artifacts, targets), artifacts)
+        return artifacts
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+
+    def _plan(self, artifacts: Dict[str, Any], targets: Iterable[str]) -> List[AgentNode]:
+        key = (self.graph.revision, frozenset(artifacts), tuple(targets))
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = self._plans[key] = self.graph.plan(key[1], key[2])
+        return plan
+
+    def _invoke(self, node: AgentNode, artifacts: Dict[str, Any]) -> Any:
+        if self.metrics is None:
+            return node.agent.invoke(artifacts)
+        inputs = [artifacts[name] for name in node.inputs]
+        return self.metrics.measure(node.name, node.agent.invoke, artifacts, inputs)
+
+    async def _ainvoke(self, node: AgentNode, artifacts: Dict[str, Any]) -> Any:
+        import asyncio
+        if type(node.agent).ainvoke is BaseAgent.ainvoke:
+            # Plain synchronous agent: measure it inside its worker thread.
+            return await asyncio.to_thread(self._invoke, node, artifacts)
+        if self.metrics is None:
+            return await node.agent.ainvoke(artifacts)
+        inputs = [artifacts[name] for name in node.inputs]
+        return await self.metrics.measure_async(node.name, node.agent.ainvoke, artifacts, inputs)
+
+    def _call(self, node: AgentNode, artifacts: Dict[str, Any]) -> Any:
+        for attempt in range(node.retries + 1):
+            _log_start(node)
+            try:
+                return self._invoke(node, artifacts)
+            except Exception as e:
+                if attempt == node.retries:
+                    raise
+                _log_retry(node, e, attempt + 1)
+
+    def _ready(self, pending: List[AgentNode], artifacts: Dict[str, Any]) -> List[AgentNode]:
+        return [node for node in pending if all(dep in artifacts for dep in node.inputs)]
+
+    def _run_threaded(self, plan: List[AgentNode], artifacts: Dict[str, Any]) -> None:
+        pending = list(plan)
+        running: Dict[Future, AgentNode] = {}
+        attempts: Dict[str, int] = {}
+        deadlines: Dict[Future, float] = {}
+
+        def submit(node: AgentNode) -> None:
+            _log_start(node)
+            future = self._pool.submit(self._invoke, node, artifacts)
+            running[future] = node
+            if node.timeout is not None:
+                deadlines[future] = time.monotonic() + node.timeout
+
+        def retry_or_raise(node: AgentNode, error: BaseException) -> None:
+            attempts[node.name] = attempts.get(node.name, 0) + 1
+            if attempts[node.name] > node.retries:
+                raise error
+            _log_retry(node, error, attempts[node.name])
+            submit(node)
+
+        while pending or running:
+            for node in self._ready(pending, artifacts):
+                pending.remove(node)
+                submit(node)
+            timeout = None
+            if deadlines:
+                timeout = max(0.0, min(deadlines.values()) - time.monotonic())
+            done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+            for future in list(running):
+                node = running[future]
+                deadline = deadlines.get(future)
+                if future in done:
+                    del running[future]
+                    deadlines.pop(future, None)
+                    error = future.exception()
+                    if error is None:
+                        artifacts[node.output] = future.result()
+                    else:
+                        retry_or_raise(node, error)
+                elif deadline is not None and now >= deadline:
+                    # The thread cannot be interrupted; its late result is discarded.
+                    del running[future]
+                    del deadlines[future]
+                    retry_or_raise(node, AgentTimeoutError(
+                        f"Agent {node.name} timed out after {node.timeout}s"))
+
+    async def _run_async(self, plan: List[AgentNode], artifacts: Dict[str, Any]) -> None:
+        import asyncio
+
+        async def attempt(node: AgentNode) -> Any:
+            try:
+                return await asyncio.wait_for(self._ainvoke(node, artifacts), node.timeout)
+            except asyncio.TimeoutError:
+                raise AgentTimeoutError(f"Agent {node.name} timed out after {node.timeout}s") from None
+
+        async def execute(node: AgentNode) -> None:
+            for dep in node.inputs:
+                if dep in tasks:
+                    await tasks[dep]
+            for n in range(node.retries + 1):
+                _log_start(node)
+                try:
+                    artifacts[node.output] = await attempt(node)
+                    return
+                except Exception as e:
+                    if n == node.retries:
+                        raise
+                    _log_retry(node, e, n + 1)
+
+        tasks: Dict[str, asyncio.Task] = {}
+        for node in plan:
+            tasks[node.output] = asyncio.ensure_future(execute(node))
+        try:
+            await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
@@ -0,0 +1,317 @@
+import functools
+import json
+import logging
+import os
+import re
+import zlib
+from typing import Callable, Dict, Any, IO, Iterator, List, Optional, Tuple
+
+from .encoding import PageEncoding
+from .sinks import (COMPRESSIONS, EncodedPages, OutputSink, _lines, _open_compressed, _open_decompressed,
+                    shard_location, zstandard)
+
+logger = logging.getLogger(__name__)
+
+_EXTENSIONS = {"zstd": ".kfrag.zst", "gzip": ".kfrag.gz", "none": ".kfrag"}
+# Every JSON string token, scanned from the start of a document so matches never begin inside one.
+_STRING_RE = re.compile(rb'("[^"\\]*(?:\\.[^"\\]*)*")')
+# Text is cut after punctuation followed by a space, so product values quoted inside
+# longer sentences ("..., simply: <how to use>") become fragments of their own. An escape
+# sequence never ends in one of these characters, so the cuts always fall between escapes.
+_SPLIT_RE = re.compile(rb'(?<=[,:;.?!]) ')
+_FRAGMENT_PREFIX = b'["f","'
+
+_json = json.JSONEncoder(separators=(',', ':')).encode
+
+
+class FragmentWriter:
+    """
+    Writes products to one fragment file, storing every distinct text fragment and page shape once.
+
+    The file is JSONL with three kinds of lines, each definition preceding its first use:
+
+        ["f","<text>"]                          the next fragment (ids count from 0)
+        ["s",["<json>", ...]]                   the next page shape: the JSON between string values
+        ["p",<key>,{<page>:[<shape>,<leaf>,...]}]   a product
+
+    A page is taken apart as encoded: its string values, in document order, become leaves,
+    and everything between them (punctuation, keys, other values) is its shape. A leaf is a
+    fragment id or, for text cut into several fragments, the list of their ids. Fragments
+    keep the JSON escaping of the page, so pages are rebuilt byte for byte without being
+    decoded. Static questions, headings, categories and keys are then stored once per file,
+    and a product line holds little more than integers.
+
+    To bound memory, the writer forgets the texts it has seen once it remembers
+    ``max_texts`` of them; texts seen again after that are defined again.
+
+    Attributes:
+        path (str): Fragment file, written to ``<path>.tmp`` and renamed into place on ``close``
+            (or removed by ``discard``).
+        products (int): Products written.
+        input_bytes (int): Size of the encoded pages handed over.
+        output_bytes (int): Uncompressed size written.
+    """
+    def __init__(self, path: str, compression: str = "none", max_texts: int = 1 << 20):
+        self.path = path
+        self.max_texts = max_texts
+        self.products = 0
+        self.input_bytes = 0
+        self.output_bytes = 0
+        self._file: IO[bytes] = _open_compressed(path + ".tmp", compression)
+        self._texts: Dict[bytes, Any] = {}
+        self._shapes: Dict[Tuple[bytes, ...], int] = {}
+        self._count = 0
+        self._pending: List[bytes] = []
+
+    def add(self, key: str, encoded: EncodedPages) -> None:
+        """Appends the encoded pages of one product."""
+        record = {}
+        texts = self._texts
+        for name, data in encoded.items():
+            parts = _STRING_RE.split(data)
+            structure = [parts[0]]
+            leaves: List[Any] = [0]
+            for i in range(1, len(parts), 2):
+                token, following = parts[i], parts[i + 1]
+                if following[:1] == b':':
+                    structure[-1] += token + following
+                    continue
+                # Whole texts are looked up first: most repeat verbatim.
+                content = token[1:-1]
+                leaf = texts.get(content)
+                leaves.append(leaf if leaf is not None else self._text(content))
+                structure.append(following)
+            signature = tuple(structure)
+            shape = self._shapes.get(signature)
+            if shape is None:
+                shape = self._shapes[signature] = len(self._shapes)
+                self._pending.append(b'["s",' + _json([p.decode('utf-8') for p in structure]).encode('utf-8') + b']\n')
+            leaves[0] = shape
+            record[name] = leaves
+            self.input_bytes += len(data)
+        self._pending.append(b'["p",' + _json(key).encode('utf-8') + b',' + _json(record).encode('ascii') + b']\n')
+        data = b''.join(self._pending)
+        self._pending.clear()
+        self._file.write(data)
+        self.products += 1
+        self.output_bytes += len(data)
+
+    def close(self) -> None:
+        self._file.close()
+        os.replace(self.path + ".tmp", self.path)
+
+    def discard(self) -> None:
+        """Closes the writer and removes its temporary file, leaving ``path`` as it was."""
+        self._file.close()
+        os.remove(self.path + ".tmp")
+
+    def _text(self, text: bytes) -> Any:
+        # Defines a text not seen before, reusing the fragments it shares with others.
+        if len(self._texts) >= self.max_texts:
+            self._texts.clear()
+        parts = _SPLIT_RE.split(text)
+        if len(parts) == 1:
+            return self._define(text)
+        last = len(parts) - 1
+        ids = []
+        for n, part in enumerate(parts):
+            if n < last:
+                part += b' '
+            fragment = self._texts.get(part)
+            if type(fragment) is not int:
+                fragment = self._define(part)
+            ids.append(fragment)
+        self._texts[text] = ids
+        return ids
+
+    def _define(self, text: bytes) -> int:
+        fragment = self._texts[text] = self._count
+        self._count += 1
+        self._pending.append(_FRAGMENT_PREFIX + text + b'"]\n')
+        return fragment
+
+
+class FragmentTable:
+    """
+    The fragments and shapes read so far from a fragment file, and the pages rebuilt from them.
+    """
+    def __init__(self):
+        self.fragments: List[bytes] = []
+        self.shapes: List[List[bytes]] = []
+
+    def read(self, line: bytes) -> Optional[Tuple[str, Dict[str, List[Any]]]]:
+        """
+        Takes in one line of a fragment file. Returns ``(key, record)`` for a product line.
+
+        Raises:
+            ValueError: If the line is not part of a fragment file.
+        """
+        if line.startswith(_FRAGMENT_PREFIX):
+            self.fragments.append(line[len(_FRAGMENT_PREFIX):-2])
+            return None
+        entry = json.loads(line)
+        kind = entry[0]
+        if kind == "s":
+            pieces = [piece.encode('utf-8') for piece in entry[1]]
+            # Quotes go around every leaf, so they are folded into the pieces next to it.
+            last = len(pieces) - 1
+            self.shapes.append([(b'"' if n else b'') + piece + (b'"' if n < last else b'')
+                                for n, piece in enumerate(pieces)])
+        elif kind == "p":
+            return entry[1], entry[2]
+        else:
+            raise ValueError(f"Unknown fragment file entry '{kind}'")
+        return None
+
+    def encode(self, record: Dict[str, List[Any]]) -> EncodedPages:
+        """Rebuilds the encoded pages of a product record, exactly as they were written."""
+        fragments = self.fragments
+        encoded = {}
+        for name, leaves in record.items():
+            pieces = self.shapes[leaves[0]]
+            parts = [b''] * (2 * len(pieces) - 1)
+            parts[0::2] = pieces
+            parts[1::2] = [fragments[leaf] if type(leaf) is int else b''.join([fragments[i] for i in leaf])
+                           for leaf in leaves[1:]]
+            encoded[name] = b''.join(parts)
+        return encoded
+
+    def rehydrate(self, record: Dict[str, List[Any]]) -> Dict[str, Any]:
+        """Rebuilds the pages of a product record."""
+        return {name: json.loads(data) for name, data in self.encode(record).items()}
+
+
+def iter_fragments(path: str, encoded: bool = False) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Yields ``(key, pages)`` for every product of a fragment file (compressed or not), in
+    file order; with ``encoded``, the pages are the JSON bytes originally written.
+    """
+    table = FragmentTable()
+    rebuild = table.encode if encoded else table.rehydrate
+    with _open_decompressed(path) as raw:
+        for line in _lines(raw):
+            product = table.read(line)
+            if product is not None:
+                yield product[0], rebuild(product[1])
+
+
+class FragmentShard:
+    """
+    Random access to the products of a fragment file.
+
+    Opening the file loads the fragments, the shapes and the compact product records; a
+    product's pages are only rebuilt when asked for.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._table = FragmentTable()
+        self._records: Dict[str, Dict[str, List[Any]]] = {}
+        with _open_decompressed(path) as raw:
+            for line in _lines(raw):
+                product = self._table.read(line)
+                if product is not None:
+                    self._records[product[0]] = product[1]
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._records
+
+    def keys(self) -> List[str]:
+        return list(self._records)
+
+    def get(self, key: str, page: Optional[str] = None) -> Any:
+        """
+        Returns the pages of a product, or only ``page``.
+
+        Raises:
+            KeyError: If the product (or page) is not in the file.
+        """
+        record = self._records[key]
+        if page is not None:
+            return self._table.rehydrate({page: record[page]})[page]
+        return self._table.rehydrate(record)
+
+    def get_encoded(self, key: str) -> EncodedPages:
+        """
+        Returns the pages of a product as the JSON bytes originally written.
+
+        Raises:
+            KeyError: If the product is not in the file.
+        """
+        return self._table.encode(self._records[key])
+
+
+class FragmentSink(OutputSink):
+    """
+    Packs pages into sharded fragment files (see ``FragmentWriter``), read back with
+    ``FragmentShard`` or ``iter_fragments``.
+
+    Products are spread over the shards by a stable hash of their key, as in the JSONL
+    sink, and each shard keeps its own fragment table. Every shard is (re)written on close;
+    a failed run ``discard``s them instead, leaving the shards of the last one in place.
+
+    Attributes:
+        root (str): Output directory.
+        shards (int): Number of shard files.
+        compression (str): "zstd" (requires the ``zstandard`` package), "gzip" or "none".
+    """
+    kind = "fragments"
+    encoding = PageEncoding(compact=True)
+    incremental = False
+
+    def __init__(self, root: str, shards: int = 16, compression: Optional[str] = None):
+        if compression is None:
+            compression = "zstd" if zstandard is not None else "gzip"
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression '{compression}', expected one of {COMPRESSIONS}")
+        if compression == "zstd" and zstandard is None:
+            raise RuntimeError("zstd compression requires the 'zstandard' package")
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        self.root = root
+        self.shards = shards
+        self.compression = compression
+        self._writers: Dict[int, FragmentWriter] = {}
+        os.makedirs(root, exist_ok=True)
+
+    def shard_of(self, key: str) -> int:
+        return zlib.crc32(key.encode('utf-8')) % self.shards
+
+    def shard_path(self, shard: int) -> str:
+        return os.path.join(self.root, f"fragments-{shard:05d}-of-{self.shards:05d}{_EXTENSIONS[self.compression]}")
+
+    def location(self, key: str) -> str:
+        return self.shard_path(self.shard_of(key))
+
+    def locator(self) -> Callable[[str], str]:
+        return functools.partial(shard_location, [self.shard_path(shard) for shard in range(self.shards)])
+
+    def write_many(self, items: List[Tuple[str, EncodedPages]]) -> None:
+        for key, encoded in items:
+            self._writer(self.shard_of(key)).add(key, encoded)
+
+    def close(self) -> None:
+        for shard in range(self.shards):
+            self._writer(shard)
+        products = sum(w.products for w in self._writers.values())
+        input_bytes = sum(w.input_bytes for w in self._writers.values())
+        output_bytes = sum(w.output_bytes for w in self._writers.values())
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+        if products:
+            logger.info(f"Fragment shards: {products} products, {input_bytes} bytes of pages stored in "
+                        f"{output_bytes} bytes ({input_bytes / max(output_bytes, 1):.1f}x before compression)")
+
+    def discard(self) -> None:
+        for writer in self._writers.values():
+            writer.discard()
+        self._writers.clear()
+
+    def _writer(self, shard: int) -> FragmentWriter:
+        writer = self._writers.get(shard)
+        if writer is None:
+            writer = self._writers[shard] = FragmentWriter(self.shard_path(shard), self.compression)
+        return writer
@@ -0,0 +1,316 @@
+import hashlib
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Any, Iterable, List, NamedTuple, Optional, Tuple
+
+from .logs import event
+from .registry import GENERATION_BACKENDS
+
+logger = logging.getLogger(__name__)
+
+# Prompts end with the rule-based text, which a backend rewrites and which is kept when it fails.
+DRAFT_MARKER = "\nDraft: "
+
+DESCRIPTION_PROMPT = ("Rewrite the product description below as engaging marketing copy, in English, "
+                      "in at most three sentences, without inventing facts.\n"
+                      "Product: {name}\nKey ingredients: {key_ingredients}\nBenefits: {benefits}\n"
+                      "Skin type: {skin_type}" + DRAFT_MARKER + "{draft}")
+ANSWER_PROMPT = ("Answer the customer question below about {name} in one or two sentences, in English, "
+                 "using only the facts of the draft answer.\nQuestion: {question}" + DRAFT_MARKER + "{draft}")
+
+
+class GenerationError(RuntimeError):
+    """Raised by a backend when a request fails; the client retries it."""
+
+
+class GenerationBackend(ABC):
+    """
+    A text-generation service. One ``generate`` call is one request, for a batch of prompts.
+
+    Attributes:
+        name (str): Identifies the backend (and model) in the response cache and build fingerprint.
+    """
+    name = ''
+
+    @abstractmethod
+    def generate(self, prompts: List[str]) -> List[str]:
+        """
+        Returns the text generated for each prompt, in order.
+
+        Raises:
+            GenerationError: If the request fails.
+        """
+
+
+class StubBackend(GenerationBackend):
+    """
+    Offline backend for tests and benchmarks: answers each prompt with its draft, passed
+    through ``transform``, after a simulated request latency.
+
+    Attributes:
+        latency (float): Seconds per request.
+        per_prompt (float): Additional seconds per prompt of a request.
+        failure_rate (float): Share of requests that fail with a GenerationError.
+        transform (Callable[[str], str]): Applied to the drafts (unchanged by default).
+        requests (int): Requests received, failed ones included.
+    """
+    name = "stub"
+
+    def __init__(self, latency: float = 0.0, per_prompt: float = 0.0, failure_rate: float = 0.0,
+                 transform: Callable[[str], str] = str, seed: int = 0):
+        self.latency = latency
+        self.per_prompt = per_prompt
+        self.failure_rate = failure_rate
+        self.transform = transform
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def generate(self, prompts: List[str]) -> List[str]:
+        with self._lock:
+            self.requests += 1
+            failed = self._random.random() < self.failure_rate
+        time.sleep(self.latency + self.per_prompt * len(prompts))
+        if failed:
+            raise GenerationError("Simulated backend failure")
+        return [self.transform(prompt.rpartition(DRAFT_MARKER)[2]) for prompt in prompts]
+
+
+class ResponseCache:
+    """
+    On-disk cache of generated texts, keyed by a hash of the backend name and the prompt.
+
+    The cache is a SQLite database in WAL mode, shared by the threads of a client and by
+    pool worker processes.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, text TEXT NOT NULL) "
+                           "WITHOUT ROWID")
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(backend: str, prompt: str) -> str:
+        return hashlib.sha256(f"{backend}\0{prompt}".encode('utf-8')).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        found = {}
+        with self._lock:
+            # Stays below SQLite's limit on the number of query parameters.
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                found.update(self._conn.execute(
+                    f"SELECT key, text FROM responses WHERE key IN ({','.join('?' * len(chunk))})", chunk))
+        return found
+
+    def put_many(self, items: Iterable[Tuple[str, str]]) -> None:
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO responses (key, text) VALUES (?, ?)", items)
+            self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class GenerationClient:
+    """
+    Sends prompts to a backend in batches, with a bounded number of requests in flight.
+
+    Prompts answered by the response cache never reach the backend, and a prompt already
+    waiting or in flight is not sent again. The remaining prompts, from every calling
+    thread, are queued and sent in batches of up to ``batch_size``; a partial batch leaves
+    after ``max_wait`` seconds. At most ``max_in_flight`` requests run at a time. A failed
+    request is retried ``retries`` times, after ``backoff`` seconds, doubled at each attempt;
+    its prompts then get no text, and callers keep their rule-based text.
+
+    Callers that handle one product at a time only fill batches when they run concurrently
+    (e.g. the pipeline's generate stage); ``prefetch`` sends the prompts of many products at once.
+
+    Attributes:
+        backend (GenerationBackend): Where the prompts are sent.
+        cache (Optional[ResponseCache]): Generated texts kept across runs.
+        stats (Dict[str, int]): Prompts asked, answered from the cache, coalesced with
+            one already pending, generated and failed; requests sent and retried.
+    """
+    def __init__(self, backend: GenerationBackend, cache: Optional[ResponseCache] = None, batch_size: int = 16,
+                 max_in_flight: int = 4, retries: int = 2, backoff: float = 0.1, max_wait: float = 0.005):
+        if batch_size < 1 or max_in_flight < 1:
+            raise ValueError("batch_size and max_in_flight must be at least 1")
+        self.backend = backend
+        self.cache = cache
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
+        self.retries = retries
+        self.backoff = backoff
+        self.max_wait = max_wait
+        self.stats = dict.fromkeys(("prompts", "cached", "coalesced", "generated", "failed",
+                                    "requests", "retries"), 0)
+        self._lock = threading.Condition()
+        self._queue: List[Tuple[str, str, Future]] = []
+        self._pending: Dict[str, Future] = {}
+        self._prefetched: Dict[str, Optional[str]] = {}
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pid: Optional[int] = None
+
+    def generate_many(self, prompts: List[str]) -> List[Optional[str]]:
+        """
+        Returns the generated text of each prompt, or None where generation failed.
+        """
+        keys = [ResponseCache.key(self.backend.name, prompt) for prompt in prompts]
+        prefetched = self._prefetched
+        if prefetched:
+            found = {key: prefetched[key] for key in keys if key in prefetched}
+            if len(found) == len(keys):
+                return [found[key] for key in keys]
+        missing = list({key for key in keys if key not in prefetched})
+        found = self.cache.get_many(missing) if self.cache is not None else {}
+        futures: Dict[str, Future] = {}
+        with self._lock:
+            self._start()
+            for key, prompt in zip(keys, prompts):
+                if key in prefetched:
+                    found[key] = prefetched[key]
+                    continue
+                self.stats["prompts"] += 1
+                if key in found:
+                    self.stats["cached"] += 1
+                elif key in futures or key in self._pending:
+                    futures.setdefault(key, self._pending.get(key))
+                    self.stats["coalesced"] += 1
+                else:
+                    future = futures[key] = self._pending[key] = Future()
+                    self._queue.append((key, prompt, future))
+            if futures:
+                self._lock.notify()
+        texts = dict(found)
+        for key, future in futures.items():
+            texts[key] = future.result()
+        return [texts[key] for key in keys]
+
+    def generate(self, prompt: str) -> Optional[str]:
+        return self.generate_many([prompt])[0]
+
+    def prefetch(self, prompts: Iterable[str]) -> None:
+        """
+        Generates texts ahead of the calls that ask for them, such as all the prompts of a
+        chunk of products in one go. The texts (and failures, which are not retried) are
+        kept in memory until the next prefetch.
+        """
+        prompts = list(dict.fromkeys(prompts))
+        self._prefetched = {}
+        texts = self.generate_many(prompts)
+        self._prefetched = {ResponseCache.key(self.backend.name, prompt): text for prompt, text in zip(prompts, texts)}
+
+    def close(self) -> None:
+        """Sends the queued prompts and waits for the requests in flight."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+            self._lock.notify_all()
+        if pool is not None:
+            self._dispatcher.join()
+            pool.shutdown()
+        if self.cache is not None:
+            self.cache.close()
+
+    def _start(self) -> None:
+        # Threads do not survive a fork, so pool workers start their own.
+        if self._pool is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._pool = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="generation")
+            self._slots = threading.BoundedSemaphore(self.max_in_flight)
+            self._dispatcher = threading.Thread(target=self._dispatch, args=(self._pool,), daemon=True,
+                                                name="generation-batcher")
+            self._dispatcher.start()
+
+    def _dispatch(self, pool: ThreadPoolExecutor) -> None:
+        # Forms the batches; runs until the client is closed and its queue is empty.
+        while True:
+            with self._lock:
+                while not self._queue and self._pool is pool:
+                    self._lock.wait()
+                if not self._queue:
+                    return
+                deadline = time.monotonic() + self.max_wait
+                while len(self._queue) < self.batch_size and self._pool is pool:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._lock.wait(remaining)
+                batch = self._queue[:self.batch_size]
+                del self._queue[:self.batch_size]
+            self._slots.acquire()
+            pool.submit(self._send, batch)
+
+    def _send(self, batch: List[Tuple[str, str, Future]]) -> None:
+        try:
+            texts = self._request([prompt for _, prompt, _ in batch])
+            if texts is not None and self.cache is not None:
+                self.cache.put_many((key, text) for (key, _, _), text in zip(batch, texts))
+        except Exception as e:
+            # A failing cache must not leave callers waiting.
+            logger.exception("Generation batch failed: %s", e)
+            texts = None
+        finally:
+            self._slots.release()
+        with self._lock:
+            self.stats["generated" if texts is not None else "failed"] += len(batch)
+            for key, _, _ in batch:
+                del self._pending[key]
+        for n, (_, _, future) in enumerate(batch):
+            future.set_result(texts[n] if texts is not None else None)
+
+    def _request(self, prompts: List[str]) -> Optional[List[str]]:
+        for attempt in range(self.retries + 1):
+            with self._lock:
+                self.stats["requests"] += 1
+            try:
+                texts = self.backend.generate(prompts)
+                if len(texts) != len(prompts):
+                    raise GenerationError(f"Expected {len(prompts)} texts, got {len(texts)}")
+                return texts
+            except Exception as e:
+                if attempt == self.retries:
+                    logger.warning("Generation request of %d prompts failed (%s); keeping the rule-based text",
+                                   len(prompts), e, extra=event("generation.failed", prompts=len(prompts),
+                                                                  error=str(e)))
+                    return None
+                with self._lock:
+                    self.stats["retries"] += 1
+                time.sleep(self.backoff * 2 ** attempt)
+
+
+class GenerationConfig(NamedTuple):
+    """
+    How an Orchestrator builds its GenerationClient. Picklable, so it reaches pool workers.
+    """
+    backend: str = "stub"
+    latency: float = 0.0
+    batch_size: int = 16
+    max_in_flight: int = 4
+    retries: int = 2
+    cache_path: Optional[str] = None
+
+    def build(self) -> GenerationClient:
+        """
+        Raises:
+            ValueError: If the backend is not registered in ``GENERATION_BACKENDS``.
+        """
+        factory = GENERATION_BACKENDS.get(self.backend)
+        if factory is None:
+            raise ValueError(f"Unknown generation backend '{self.backend}', expected one of "
+                             f"{sorted(GENERATION_BACKENDS)}")
+        backend = factory(latency=self.latency) if self.backend == "stub" else factory()
+        cache = ResponseCache(self.cache_path) if self.cache_path else None
+        return GenerationClient(backend, cache, batch_size=self.batch_size, max_in_flight=self.max_in_flight,
+                                retries=self.retries)
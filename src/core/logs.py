@@ -0,0 +1,174 @@
+import atexit
+import json
+import logging
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Any, IO, List, Optional
+
+from .registry import LOG_FORMATS
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener: Optional[QueueListener] = None
+
+
+def event(name: str, **fields: Any) -> Dict[str, Any]:
+    """
+    Builds the ``extra`` of a structured log record: its event type and fields.
+
+    Example:
+        ``logger.error("Product %s failed", key, extra=event("product.failed", key=key))``
+    """
+    return {"event": name, "fields": fields}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats each record as one JSON object: time, level, logger, event type, message, the
+    event's fields and, for exceptions, the traceback.
+    """
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": getattr(record, "event", None),
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a share of the records of each event type, e.g. ``{"agent.start": 0.01}`` keeps one
+    in a hundred agent starts (the first, the 101st, ...) and a rate of 0 drops them all.
+
+    Warnings and errors, and records without a configured event type, are always kept.
+
+    Attributes:
+        rates (Dict[str, float]): Share of records kept, between 0 and 1, by event type.
+        dropped (Dict[str, int]): Records left out so far, by event type.
+    """
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        for name, rate in rates.items():
+            if not 0.0 <= rate <= 1.0:
+                raise ValueError(f"Sampling rate of '{name}' must be between 0 and 1, got {rate}")
+        self.rates = dict(rates)
+        self.dropped: Dict[str, int] = {}
+        # A record is kept whenever a whole credit is available; the first one always is.
+        self._credit = {name: 1.0 if rate > 0 else 0.0 for name, rate in rates.items()}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        name = getattr(record, "event", None)
+        rate = self.rates.get(name)
+        if rate is None or record.levelno >= logging.WARNING:
+            return True
+        with self._lock:
+            credit = self._credit[name]
+            if credit >= 1.0:
+                self._credit[name] = credit - 1.0 + rate
+                return True
+            self._credit[name] = credit + rate
+            self.dropped[name] = self.dropped.get(name, 0) + 1
+        return False
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Hands records to a queue unformatted, so that messages are only formatted, and written,
+    by the listener thread.
+
+    The standard ``QueueHandler`` formats each record before queueing it, so that it can
+    cross process boundaries; records queued here stay in this process, and their
+    arguments must not be changed after logging them.
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def parse_sampling(specs: List[str]) -> Dict[str, float]:
+    """
+    Parses ``EVENT=RATE`` sampling options.
+
+    Raises:
+        ValueError: If a spec is malformed or its rate is not between 0 and 1.
+    """
+    rates = {}
+    for spec in specs:
+        name, _, rate = spec.partition("=")
+        try:
+            rates[name] = float(rate)
+        except ValueError:
+            raise ValueError(f"Invalid log sampling '{spec}', expected EVENT=RATE") from None
+        if not name or not 0.0 <= rates[name] <= 1.0:
+            raise ValueError(f"Invalid log sampling '{spec}', expected EVENT=RATE with 0 <= RATE <= 1")
+    return rates
+
+
+def setup_logging(level: str = "INFO", fmt: str = "text", sampling: Optional[Dict[str, float]] = None,
+                  stream: Optional[IO[str]] = None) -> QueueListener:
+    """
+    Routes all logging through a queue to a background thread that formats and writes it.
+
+    Logging a record then costs the calling thread a queue put, and nothing at all for a
+    level that is not enabled. The listener is stopped, flushing the queue, at exit.
+
+    Args:
+        level (str): Lowest level logged, e.g. "INFO" or "DEBUG".
+        fmt (str): "text" (human-readable lines) or "json" (one JSON object per line, see
+            ``JsonFormatter``).
+        sampling (Optional[Dict[str, float]]): Share of records kept per event type (see
+            ``SamplingFilter``); records are sampled before they are queued.
+        stream (Optional[IO[str]]): Where the records are written (stdout by default).
+
+    Returns:
+        QueueListener: The started listener.
+    """
+    global _listener
+    if fmt not in LOG_FORMATS:
+        raise ValueError(f"Unknown log format '{fmt}', expected one of {LOG_FORMATS}")
+    if _listener is None:
+        atexit.register(stop_logging)
+    stop_logging()
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+    handler = DeferredQueueHandler(queue.SimpleQueue())
+    if sampling:
+        handler.addFilter(SamplingFilter(sampling))
+    root = logging.getLogger()
+    for previous in root.handlers[:]:
+        root.removeHandler(previous)
+    root.addHandler(handler)
+    root.setLevel(level)
+    _listener = QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging() -> None:
+    """Writes out the records still queued and stops the listener thread."""
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+def use_direct_handlers() -> None:
+    """
+    Makes the root logger of a forked worker process write directly, since the listener
+    thread of the parent does not exist in it. Filters on the queue handler are kept.
+    """
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        if isinstance(handler, DeferredQueueHandler) and _listener is not None:
+            root.removeHandler(handler)
+            for output in _listener.handlers:
+                for sampling in handler.filters:
+                    output.addFilter(sampling)
+                root.addHandler(output)
@@ -0,0 +1,219 @@
+import cProfile
+import glob
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from array import array
+from typing import Dict, Any, Callable, List, Optional
+
+METRIC_FIELDS = ("wall_seconds", "cpu_seconds", "peak_alloc_bytes", "input_size", "output_size")
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def payload_size(value: Any) -> int:
+    """
+    Cheap size estimate of an agent payload: total characters of its strings plus
+    one unit per scalar, list item and dict key.
+    """
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(1 + payload_size(k) + payload_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(1 + payload_size(v) for v in value)
+    if hasattr(value, '__dataclass_fields__'):
+        return sum(1 + payload_size(getattr(value, name)) for name in value.__dataclass_fields__)
+    return 1
+
+
+def _quantile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+class AgentMetrics:
+    """
+    Collects per-call timing, memory and payload-size samples for every agent.
+
+    Samples are stored in compact ``array('d')`` buffers so that percentiles over a
+    whole batch are exact. Allocation peaks are tracked with ``tracemalloc`` only when
+    ``trace_memory`` is enabled, as it slows every allocation down noticeably. A peak is
+    the highest memory traced during the call above what was traced when it started.
+    ``tracemalloc`` traces the whole process, so with the thread and asyncio executors the
+    allocations of agents running at the same time count towards each other's peaks.
+
+    Attributes:
+        trace_memory (bool): Whether allocation peaks are recorded.
+    """
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self._samples: Dict[str, Dict[str, array]] = {}
+        self._lock = threading.Lock()
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def measure(self, name: str, fn: Callable[..., Any], arg: Any, inputs: Any) -> Any:
+        """
+        Calls ``fn(arg)`` and records a sample for agent ``name``.
+
+        CPU time is measured for the calling thread only, so samples stay accurate when
+        agents run concurrently on a thread pool.
+
+        Args:
+            name (str): Agent name the sample is recorded under.
+            fn (Callable[..., Any]): The call to measure.
+            arg (Any): Argument passed to ``fn``.
+            inputs (Any): The agent's declared inputs, used for the input size.
+        """
+        start = self._start_tracing()
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        result = fn(arg)
+        cpu = time.thread_time() - cpu
+        wall = time.perf_counter() - wall
+        peak = self._peak(start)
+        self.add(name, (wall, cpu, peak, payload_size(inputs), payload_size(result)))
+        return result
+
+    async def measure_async(self, name: str, fn: Callable[..., Any], arg: Any, inputs: Any) -> Any:
+        """
+        Awaits ``fn(arg)`` and records a sample for agent ``name``.
+
+        The CPU time of a coroutine cannot be attributed to one thread, so process-wide
+        CPU time is recorded instead.
+        """
+        start = self._start_tracing()
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        result = await fn(arg)
+        cpu = time.process_time() - cpu
+        wall = time.perf_counter() - wall
+        peak = self._peak(start)
+        self.add(name, (wall, cpu, peak, payload_size(inputs), payload_size(result)))
+        return result
+
+    def _start_tracing(self) -> int:
+        # Memory already allocated when the agent starts is not part of its peak.
+        if not self.trace_memory:
+            return 0
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+    def _peak(self, start: int) -> int:
+        return max(0, tracemalloc.get_traced_memory()[1] - start) if self.trace_memory else 0
+
+    def add(self, name: str, sample) -> None:
+        with self._lock:
+            series = self._samples.get(name)
+            if series is None:
+                series = self._samples[name] = {field: array('d') for field in METRIC_FIELDS}
+            for field, value in zip(METRIC_FIELDS, sample):
+                series[field].append(value)
+
+    def drain(self) -> Dict[str, Dict[str, bytes]]:
+        """
+        Returns the collected samples in a picklable form and clears them.
+        """
+        snapshot = {name: {field: values.tobytes() for field, values in series.items()}
+                    for name, series in self._samples.items()}
+        self._samples = {}
+        return snapshot
+
+    def absorb(self, snapshot: Dict[str, Dict[str, bytes]]) -> None:
+        """
+        Merges samples produced by ``drain`` in another process.
+        """
+        for name, series in snapshot.items():
+            target = self._samples.setdefault(name, {field: array('d') for field in METRIC_FIELDS})
+            for field, raw in series.items():
+                target[field].frombytes(raw)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Aggregates the samples per agent.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: For each agent, the call count and, for each metric,
+            its sum and p50/p95/p99.
+        """
+        result = {}
+        for name, series in self._samples.items():
+            stats: Dict[str, Any] = {"count": len(series[METRIC_FIELDS[0]])}
+            for field, values in series.items():
+                ordered = sorted(values)
+                stats[field] = {"sum": sum(ordered)}
+                for q in QUANTILES:
+                    stats[field][f"p{int(q * 100)}"] = _quantile(ordered, q)
+            result[name] = stats
+        return result
+
+    def export(self, output_dir: str) -> Dict[str, str]:
+        """
+        Writes ``agent_metrics.json`` and the Prometheus text-format ``agent_metrics.prom``.
+
+        Returns:
+            Dict[str, str]: Paths of the written files, keyed by format.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        summary = self.summary()
+        json_path = os.path.join(output_dir, "agent_metrics.json")
+        with open(json_path, 'w') as f:
+            json.dump(summary, f, indent=2)
+        prom_path = os.path.join(output_dir, "agent_metrics.prom")
+        with open(prom_path, 'w') as f:
+            f.write(self.to_prometheus(summary))
+        return {"json": json_path, "prometheus": prom_path}
+
+    def to_prometheus(self, summary: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+        """
+        Renders the aggregated metrics as Prometheus summaries, one per metric.
+        """
+        summary = self.summary() if summary is None else summary
+        lines = []
+        for field in METRIC_FIELDS:
+            metric = f"kasparro_agent_{field}"
+            lines.append(f"# HELP {metric} Per-call agent {field.replace('_', ' ')}.")
+            lines.append(f"# TYPE {metric} summary")
+            for name, stats in sorted(summary.items()):
+                for q in QUANTILES:
+                    value = stats[field][f"p{int(q * 100)}"]
+                    lines.append(f'{metric}{{agent="{name}",quantile="{q}"}} {value:g}')
+                lines.append(f'{metric}_sum{{agent="{name}"}} {stats[field]["sum"]:g}')
+                lines.append(f'{metric}_count{{agent="{name}"}} {stats["count"]}')
+        return "\n".join(lines) + "\n"
+
+
+def merge_profiles(path: str) -> None:
+    """
+    Folds the per-worker profiles written next to ``path`` (``<path>.<pid>``) into ``path``.
+    """
+    parts = sorted(glob.glob(glob.escape(path) + ".[0-9]*"))
+    if not parts:
+        return
+    sources = ([path] if os.path.exists(path) else []) + parts
+    stats = pstats.Stats(sources[0])
+    for source in sources[1:]:
+        stats.add(source)
+    stats.dump_stats(path)
+    for part in parts:
+        os.remove(part)
+
+
+class WorkerProfiler:
+    """
+    Profiles a pool worker and periodically dumps its stats to ``<path>.<pid>``.
+    """
+    def __init__(self, path: str):
+        self.path = f"{path}.{os.getpid()}"
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+
+    def dump(self) -> None:
+        self.profiler.disable()
+        self.profiler.dump_stats(self.path)
+        self.profiler.enable()
@@ -1,6 +1,7 @@
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, fields
+from typing import Dict, Any, Iterable, Iterator, List, Optional
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Product:
     name: str
     concentration: str
@@ -10,6 +11,52 @@ class Product:
     how_to_use: str
     side_effects: str
     price: str
+    sku: str = ''
 
-    def to_dict(self):
-        return asdict(self)
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in PRODUCT_FIELDS}
+
+
+PRODUCT_FIELDS = tuple(f.name for f in fields(Product))
+
+
+class ProductBatch:
+    """
+    Columnar collection of products: one list per ``Product`` field.
+
+    Holding a large number of products this way avoids a Python object per product.
+    Individual ``Product`` records are only built when indexed or iterated.
+    """
+    __slots__ = ('columns',)
+
+    def __init__(self, columns: Optional[Dict[str, List[str]]] = None):
+        self.columns: Dict[str, List[str]] = columns or {name: [] for name in PRODUCT_FIELDS}
+
+    @classmethod
+    def from_products(cls, products: Iterable[Product]) -> 'ProductBatch':
+        batch = cls()
+        for product in products:
+            batch.append(product)
+        return batch
+
+    def append(self, product: Product) -> None:
+        for name, column in self.columns.items():
+            column.append(getattr(product, name))
+
+    def append_values(self, values: Iterable[str]) -> None:
+        """Appends one product given its field values in ``PRODUCT_FIELDS`` order."""
+        for column, value in zip(self.columns.values(), values):
+            column.append(value)
+
+    def column(self, name: str) -> List[str]:
+        return self.columns[name]
+
+    def __len__(self) -> int:
+        return len(self.columns['name'])
+
+    def __getitem__(self, index: int) -> Product:
+        return Product(*(column[index] for column in self.columns.values()))
+
+    def __iter__(self) -> Iterator[Product]:
+        for values in zip(*self.columns.values()):
+            yield Product(*values)
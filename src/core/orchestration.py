@@ -1,19 +1,43 @@
+from __future__ import annotations
+
+import hashlib
 import json
 import os
+import time
 import logging
-from typing import Dict, Any
-from ..agents.data_parser_agent import DataParserAgent
-from ..agents.question_generator_agent import QuestionGeneratorAgent
-from ..agents.content_logic_agent import ContentLogicAgent
-from ..agents.competitor_agent import CompetitorGenerationAgent
-from ..agents.page_assembler_agent import PageAssemblerAgent
-from ..agents.validation_agent import ValidationAgent
+from typing import TYPE_CHECKING, Dict, Any, Iterable, Iterator, List, Optional, Tuple
+from ..agents.base_agent import BaseAgent
+from .engine import AgentGraph, AgentNode, DagExecutor
+from .logs import event
+from .metrics import AgentMetrics
+from .models import Product
+from .question_bank import QuestionBank
+from .registry import AGENTS, PRODUCERS
+from .cache import BuildCache, code_fingerprint, encode_product, product_digest
+from .dependencies import FieldDependencies, changed_fields
+from .encoding import INDENTED, PageEncoding
+from .sinks import BackgroundWriter, DirectorySink, EncodedPages, OutputSink, write_atomic
+from .tabular import RowError
+from .templates import PAGE_TEMPLATES, pages_schema
+
+# The modules of the other run modes and options are imported by the runs using them.
+if TYPE_CHECKING:
+    from .batch import BatchResult
+    from .checkpoint import ShardSpec
+    from .generation import GenerationClient, GenerationConfig
+    from .search import PageIndex
+    from .variants import VariantRenderer
 
 logger = logging.getLogger(__name__)
 
 class Orchestrator:
     """
     Manages the workflow of agents to generate content.
+
+    The agents are looked up by name in ``AGENTS`` and only those producing what the pages
+    need are imported and constructed: rendering only the FAQ page runs neither the
+    competitor nor the content agent. A plugin agent named in ``agents`` replaces the
+    built-in agent producing the same artifact, or adds one that plugin pages can reference.
     
     Attributes:
         data_parser (DataParserAgent): Agent to parse input data.
@@ -22,22 +46,169 @@ class Orchestrator:
         content_logic (ContentLogicAgent): Agent to generate content logic.
         page_assembler (PageAssemblerAgent): Agent to assemble final pages.
         validator (ValidationAgent): Agent to validate generated pages.
+        graph (AgentGraph): Dependency graph built from the agents' declared inputs and outputs.
+        executor (DagExecutor): Runs the graph sequentially, on a thread pool or with asyncio.
+        options (Dict[str, Any]): Constructor arguments, reused to build orchestrators in pool workers.
+        metrics (Optional[AgentMetrics]): Per-agent timing, memory and size samples, when enabled.
+        dependencies (FieldDependencies): Product fields each page depends on.
+        variants (Optional[VariantRenderer]): Renders the locale and copy variants of the
+            pages, when any are requested.
+        generator (Optional[GenerationClient]): Rewrites the descriptions and FAQ answers
+            through a text-generation backend, when one is configured.
+        pages (List[str]): Names of the rendered pages, registered in ``PAGES``.
+        csv_workers (int): Threads decoding the blocks of CSV and TSV catalogs (0: none, see ``CsvCatalog``).
     """
-    def __init__(self):
-        self.data_parser = DataParserAgent()
-        self.question_generator = QuestionGeneratorAgent()
-        self.competitor_generator = CompetitorGenerationAgent()
-        self.content_logic = ContentLogicAgent()
-        self.page_assembler = PageAssemblerAgent()
-        self.validator = ValidationAgent()
+    def __init__(self, mode: str = "sequential", max_workers: Optional[int] = None,
+                 timeout: Optional[float] = None, retries: int = 0,
+                 metrics: bool = False, trace_memory: bool = False,
+                 question_bank: Optional[str] = None, question_limits: Optional[Dict[str, int]] = None,
+                 competitors: Optional[str] = None, variants: Optional[List[str]] = None,
+                 generation: Optional[GenerationConfig] = None, pages: Optional[List[str]] = None,
+                 agents: Optional[List[str]] = None, csv_workers: int = 0):
+        self.options = {"mode": mode, "max_workers": max_workers, "timeout": timeout, "retries": retries,
+                        "metrics": metrics, "trace_memory": trace_memory,
+                        "question_bank": question_bank, "question_limits": question_limits,
+                        "competitors": competitors, "variants": variants, "generation": generation,
+                        "pages": pages, "agents": agents, "csv_workers": csv_workers}
+        self.csv_workers = csv_workers
+        self.metrics = AgentMetrics(trace_memory=trace_memory) if metrics else None
+        self.generator: Optional[GenerationClient] = generation.build() if generation else None
+        self.pages: List[str] = list(dict.fromkeys(pages or PAGE_TEMPLATES))
+        self._agents: Dict[str, BaseAgent] = {}
+        producers = dict(PRODUCERS)
+        for name in agents or ():
+            producers[AGENTS[name].output] = name
+
+        # Walks back from the validated pages (and the parsed product) to the agents they need.
+        needed = set()
+        artifacts = [self.validator.output, self.data_parser.output]
+        while artifacts:
+            name = producers.get(artifacts.pop())
+            if name is not None and name not in needed:
+                needed.add(name)
+                artifacts.extend(self.agent(name).inputs)
+        self.graph = AgentGraph()
+        for name in producers.values():
+            if name in needed:
+                self.add_agent(self.agent(name), timeout=timeout, retries=retries)
+        self.target = self.validator.output
+        self.variants = None
+        if variants:
+            from .variants import VariantRenderer, VariantSpec
+            self.variants = VariantRenderer([VariantSpec.parse(spec) for spec in variants], self.page_assembler.engine,
+                                            self.question_generator.bank, question_limits, self.validator,
+                                            pages=self.pages)
+        self.executor = DagExecutor(self.graph, mode=mode, max_workers=max_workers, metrics=self.metrics)
+        self._fingerprint: Optional[str] = None
+        self._dependencies: Optional[FieldDependencies] = None
+
+    @property
+    def data_parser(self) -> BaseAgent:
+        return self.agent("data_parser")
+
+    @property
+    def question_generator(self) -> BaseAgent:
+        return self.agent("question_generator")
+
+    @property
+    def competitor_generator(self) -> BaseAgent:
+        return self.agent("competitor_generator")
 
-    def run(self, input_file_path: str, output_dir: str) -> None:
+    @property
+    def content_logic(self) -> BaseAgent:
+        return self.agent("content_logic")
+
+    @property
+    def page_assembler(self) -> BaseAgent:
+        return self.agent("page_assembler")
+
+    @property
+    def validator(self) -> BaseAgent:
+        return self.agent("validator")
+
+    def agent(self, name: str) -> BaseAgent:
+        """
+        Returns an agent registered in ``AGENTS``, imported and constructed on first use.
+
+        Raises:
+            KeyError: If no agent (built-in or plugin) has this name.
+        """
+        agent = self._agents.get(name)
+        if agent is None:
+            agent = self._agents[name] = self._build_agent(name, AGENTS[name])
+        return agent
+
+    def _build_agent(self, name: str, factory: Any) -> BaseAgent:
+        options = self.options
+        if name == "question_generator":
+            bank = options["question_bank"]
+            return factory(bank=QuestionBank.load(bank) if bank else None, limits=options["question_limits"],
+                           generator=self.generator)
+        if name == "competitor_generator":
+            from .competitors import CompetitorIndex
+            competitors = options["competitors"]
+            return factory(index=CompetitorIndex.open(competitors) if competitors else None)
+        if name == "content_logic":
+            return factory(generator=self.generator)
+        if name == "page_assembler":
+            return factory(pages=self.pages)
+        if name == "validator":
+            return factory(schema=pages_schema(self.pages))
+        return factory()
+
+    def _runs(self, name: str) -> bool:
+        agent = self._agents.get(name)
+        return agent is not None and any(node.agent is agent for node in self.graph.nodes.values())
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        Digest of everything besides the product that the pages depend on: the code, the
+        question bank and limits, the competitor index, the variants, the generation backend
+        and the selected pages and plugin agents.
+        """
+        if self._fingerprint is None:
+            h = hashlib.sha256(code_fingerprint().encode('utf-8'))
+            h.update(self.question_generator.bank.source.encode('utf-8'))
+            h.update(json.dumps(self.options["question_limits"], sort_keys=True).encode('utf-8'))
+            competitors = self.options["competitors"]
+            if competitors:
+                stat = os.stat(competitors)
+                h.update(f"{os.path.abspath(competitors)}:{stat.st_size}:{stat.st_mtime_ns}".encode('utf-8'))
+            if self.variants is not None:
+                h.update(",".join(self.variants.templates).encode('utf-8'))
+            if self.generator is not None:
+                h.update(f"generator:{self.generator.backend.name}".encode('utf-8'))
+            for option in ("pages", "agents"):
+                if self.options[option]:
+                    h.update(f"{option}:{','.join(self.options[option])}".encode('utf-8'))
+            self._fingerprint = h.hexdigest()
+        return self._fingerprint
+
+    @property
+    def dependencies(self) -> FieldDependencies:
+        if self._dependencies is None or self._dependencies.revision != self.graph.revision:
+            templates = dict(self.page_assembler.templates)
+            if self.variants is not None:
+                templates.update(self.variants.templates)
+            self._dependencies = FieldDependencies(self.graph, templates)
+            if self.variants is not None:
+                self.variants.add_dependencies(self._dependencies)
+        return self._dependencies
+
+    def run(self, input_file_path: str, output_dir: str,
+            cache: Optional[BuildCache] = None, force: bool = False,
+            encoding: PageEncoding = INDENTED, index: Optional[PageIndex] = None) -> None:
         """
         Executes the content generation workflow.
 
         Args:
             input_file_path (str): Path to the input JSON file.
             output_dir (str): Directory to save the generated output.
+            cache (Optional[BuildCache]): Build cache used to skip an unchanged product.
+            force (bool): Regenerate the pages even when the product is cached.
+            encoding (PageEncoding): How the page files are serialised (indented by 2 spaces by default).
+            index (Optional[PageIndex]): Full-text index updated with the pages written.
         """
         logger.info(f"Starting orchestration with input: {input_file_path}")
         
@@ -51,54 +222,370 @@ class Orchestrator:
                 raw_data = json.load(f)
                 
             # 2. Parse Data
-            logger.info("Agent: DataParserAgent working...")
-            product_model = self.data_parser.run(raw_data)
+            product_model = self.parse(raw_data)
             logger.info("Data parsed successfully.")
-            
-            # 3. Generate Questions
-            logger.info("Agent: QuestionGeneratorAgent working...")
-            questions = self.question_generator.run(product_model)
-            logger.info(f"Generated {len(questions)} questions.")
-            
-            # 4. Generate Competitor
-            logger.info("Agent: CompetitorGenerationAgent working...")
-            competitor = self.competitor_generator.run(product_model)
-            logger.info("Competitor generated.")
-
-            # 5. Generate Content Logic
-            logger.info("Agent: ContentLogicAgent working...")
-            # ContentLogicAgent now takes both product and competitor
-            content_blocks = self.content_logic.run(product_model, competitor)
-            logger.info("Content logic blocks generated.")
-            
-            # 6. Assemble Pages
-            logger.info("Agent: PageAssemblerAgent working...")
-            assembly_data = {
-                "product": product_model,
-                "questions": questions,
-                "content_blocks": content_blocks,
-                "competitor": competitor
-            }
-            final_pages = self.page_assembler.run(assembly_data)
-            logger.info("Pages assembled.")
-            
-            # 7. Validate Pages
-            self.validator.run(final_pages)
+
+            from .batch import product_key
+            digest = None
+            previous = None
+            key = product_key(product_model)
+            if cache is not None:
+                digest = product_digest(product_model, self.fingerprint)
+                if not force and cache.contains(digest, output_dir):
+                    logger.info(f"Product unchanged since last build, outputs in {output_dir} are up to date.")
+                    cache.record([], [digest])
+                    return
+                if not force:
+                    previous = cache.previous(output_dir, key, self.fingerprint)
+
+            # 3-7. Generate, assemble and validate pages
+            if previous is not None:
+                final_pages = self.update_pages(previous, product_model, encoding)
+                logger.info(f"Product changed since last build, re-rendered: {', '.join(final_pages) or 'nothing'}")
+            else:
+                final_pages = self.generate_pages(product_model, encoding)
             
             # 8. Save Output
             self._save_output(final_pages, output_dir)
             logger.info(f"All outputs saved to {output_dir}")
+            if index is not None:
+                index.update_encoded([(key, final_pages)])
+            if cache is not None:
+                cache.record([(digest, output_dir)],
+                             products=[(output_dir, key, self.fingerprint, encode_product(product_model))])
+                cache.evict()
 
         except Exception as e:
             logger.exception(f"An error occurred during orchestration: {e}")
             raise
 
-    def _save_output(self, pages: Dict[str, Any], output_dir: str) -> None:
+    def parse(self, raw_data: Dict[str, Any]) -> Product:
+        """
+        Runs the DataParserAgent on a raw record through the executor.
+
+        Records read from CSV/TSV catalogs arrive already parsed (or as the RowError of
+        a rejected row, which is raised here so it is reported like any other failure).
+        """
+        if isinstance(raw_data, Product):
+            return raw_data
+        if isinstance(raw_data, RowError):
+            raise raw_data
+        return self.executor.run({"raw": raw_data}, [self.data_parser.output])[self.data_parser.output]
+
+    def generate_pages(self, product_model: Product, encoding: Optional[PageEncoding] = None) -> Dict[str, Any]:
+        """
+        Runs the generation agents for an already parsed product.
+
+        The agents are scheduled from their declared inputs and outputs, so agents that
+        only depend on the product (question and competitor generation) may run concurrently.
+        The pages of the requested variants are rendered from the same agent outputs.
+
+        Args:
+            product_model (Product): Output of the DataParserAgent.
+            encoding (Optional[PageEncoding]): When given, the validated pages are returned as
+                JSON bytes, rendered straight from the templates in this encoding.
+
+        Returns:
+            Dict[str, Any]: The validated pages (or their encoding), keyed by page name.
+        """
+        if encoding is not None:
+            artifacts = self.executor.run({"product": product_model}, self.page_assembler.inputs)
+            pages = self._assemble(self.page_assembler.templates, artifacts, encoding)
+            self._validate(pages, artifacts)
+        else:
+            artifacts = self.executor.run({"product": product_model}, [self.target])
+            pages = artifacts[self.target]
+        if self.variants is not None:
+            pages = dict(pages, **self.variants.render(artifacts, encoding=encoding))
+        return pages
+
+    def prefetch_generation(self, products: List[Product]) -> None:
+        """
+        Sends the generation prompts of many products at once, so that the agents of each
+        product find their texts ready (see ``GenerationClient.prefetch``).
+        """
+        if self.generator is None or not products:
+            return
+        prompts = []
+        if self._runs("content_logic"):
+            prompts += self.content_logic.description_prompts(products)
+        if self._runs("question_generator"):
+            prompts += self.question_generator.answer_prompts(products)
+        self.generator.prefetch(prompts)
+
+    def update_pages(self, previous: Product, product_model: Product,
+                     encoding: Optional[PageEncoding] = None) -> Dict[str, Any]:
+        """
+        Re-renders only the pages affected by what changed since ``previous`` was rendered.
+
+        Only the agents producing artifacts those pages reference are run: a change
+        that no template or agent reads renders nothing.
+
+        Args:
+            previous (Product): The product as it was when its pages were last rendered.
+            product_model (Product): The product as it is now.
+            encoding (Optional[PageEncoding]): Return the pages as JSON bytes in this encoding.
+
+        Returns:
+            Dict[str, Any]: The validated pages (or their encoding) that changed, keyed by page name.
+        """
+        dependencies = self.dependencies
+        names = dependencies.affected_pages(changed_fields(previous, product_model))
+        if not names:
+            return {}
+        artifacts = self.executor.run({"product": product_model}, dependencies.page_inputs(names))
+        own = [name for name in names if name in self.page_assembler.templates]
+        if encoding is not None:
+            pages = self._assemble(own, artifacts, encoding)
+            self._validate(pages, artifacts)
+        else:
+            pages = self.validator.run_subset(self.page_assembler.render(own, artifacts))
+        if len(own) < len(names):
+            variants = [name for name in names if name not in self.page_assembler.templates]
+            pages.update(self.variants.render(artifacts, variants, encoding))
+        return pages
+
+    def _assemble(self, names: Iterable[str], artifacts: Dict[str, Any], encoding: PageEncoding) -> Dict[str, bytes]:
+        # Renders the pages straight to JSON, measured like the agent call it replaces.
+        assembler = self.page_assembler
+        return self._measure(assembler, lambda data: assembler.encode(names, data, encoding), artifacts)
+
+    def _validate(self, pages: Dict[str, bytes], artifacts: Dict[str, Any]) -> None:
+        # Encoded pages are validated from the values their templates insert, so they are
+        # rendered once (see ``ValidationAgent.run_templates``).
+        templates = self.page_assembler.templates
+        validator = self.validator
+        self._measure(validator, lambda data: validator.run_templates(
+            [(name, templates[name].template) for name in pages], data), artifacts, [pages])
+
+    def _measure(self, agent: BaseAgent, fn: Any, artifacts: Dict[str, Any], inputs: Any = None) -> Any:
+        if self.metrics is None:
+            return fn(artifacts)
+        if inputs is None:
+            inputs = [artifacts[name] for name in agent.inputs if name in artifacts]
+        return self.metrics.measure(type(agent).__name__, fn, artifacts, inputs)
+
+    def add_agent(self, agent: BaseAgent, name: Optional[str] = None,
+                  timeout: Optional[float] = None, retries: int = 0) -> AgentNode:
+        """
+        Registers an additional agent in the dependency graph.
+
+        The agent is wired in through its ``inputs`` and ``output`` declarations.
+
+        Args:
+            agent (BaseAgent): The agent to register.
+            name (Optional[str]): Node name, defaults to the agent class name.
+            timeout (Optional[float]): Seconds allowed per attempt.
+            retries (int): Additional attempts after a failure or timeout.
+
+        Returns:
+            AgentNode: The registered node.
+        """
+        node = AgentNode(name or type(agent).__name__, agent, timeout=timeout, retries=retries)
+        self.graph.add(node)
+        return node
+
+    def iter_pages(self, records: Iterable[Tuple[int, Dict[str, Any]]], encoding: Optional[PageEncoding] = None
+                   ) -> Iterator[Tuple[int, str, Optional[Dict[str, Any]], Optional[str]]]:
+        """
+        Lazily runs the full agent chain over a stream of raw records.
+
+        Failures are isolated per record: a record that cannot be parsed or validated
+        yields its error instead of pages, and the stream carries on.
+
+        Args:
+            records (Iterable[Tuple[int, Dict[str, Any]]]): ``(index, raw_record)`` pairs.
+            encoding (Optional[PageEncoding]): Yield the pages as JSON bytes in this encoding.
+
+        Yields:
+            Tuple[int, str, Optional[Dict[str, Any]], Optional[str]]: ``(index, key, pages, error)``,
+            where exactly one of ``pages`` and ``error`` is None.
+        """
+        from .batch import product_key
+        for index, raw in records:
+            key = f"record-{index}"
+            try:
+                product_model = self.parse(raw)
+                key = product_key(product_model, index)
+                yield index, key, self.generate_pages(product_model, encoding), None
+            except Exception as e:
+                yield index, key, None, f"{type(e).__name__}: {e}"
+
+    def run_stream(self, input_file_path: str, output_dir: str,
+                   sink: Optional[OutputSink] = None, encoding: Optional[PageEncoding] = None) -> BatchResult:
+        """
+        Executes the workflow over a catalog with memory bounded by a single record.
+
+        Records are read incrementally from a JSONL file or JSON array, pushed through
+        the agents one at a time and appended to ``<page_name>.jsonl`` files in
+        ``output_dir`` as soon as they are rendered.
+
+        Args:
+            input_file_path (str): Path to the catalog file.
+            output_dir (str): Directory to save the generated output.
+            sink (Optional[OutputSink]): Write through this sink (on a background thread)
+                instead of the per-page JSONL files. It is closed when the run completes.
+            encoding (Optional[PageEncoding]): How the pages in the JSONL files are serialised
+                (single-line by default). A sink uses its own encoding.
+
+        Returns:
+            BatchResult: Summary of the run, including throughput and failures.
+        """
+        from .batch import BatchResult, RecordOutcome, collect
+        from .streaming import JsonlPageWriter, iter_records
+        logger.info(f"Starting streaming orchestration with input: {input_file_path}")
+        if not os.path.exists(input_file_path):
+            logger.error(f"Input file not found: {input_file_path}")
+            raise FileNotFoundError(input_file_path)
+
+        result = BatchResult()
+        start = time.perf_counter()
+        writer = BackgroundWriter(sink) if sink is not None else JsonlPageWriter(output_dir, encoding)
+        with writer:
+            records = enumerate(iter_records(input_file_path, csv_workers=self.csv_workers))
+            for index, key, pages, error in self.iter_pages(records, writer.encoding):
+                if pages is not None:
+                    writer.write_encoded(key, pages)
+                collect(result, [RecordOutcome(index, key, error)])
+        result.elapsed = time.perf_counter() - start
+        logger.info(result.summary(), extra=event("run.summary", mode="stream", **result.fields()))
+        return result
+
+    def run_pipeline(self, input_file_path: str, output_dir: str, sink: Optional[OutputSink] = None,
+                     stage_workers: Optional[Dict[str, int]] = None, queue_size: int = 64) -> BatchResult:
+        """
+        Executes the workflow over a catalog as a staged pipeline in this process.
+
+        Records go through the stages parse, generate (questions, competitor and content
+        blocks), assemble, validate (and encode) and write, each with its own worker
+        threads and a bounded queue in front of it, so a slow sink throttles the reading of
+        the catalog. The per-stage utilization, backpressure and queue depths are logged
+        when the run completes (see ``StagedPipeline.stats``).
+
+        Args:
+            input_file_path (str): Path to the catalog file.
+            output_dir (str): Directory to save the generated output.
+            sink (Optional[OutputSink]): Where pages are written; defaults to one directory per
+                product under ``output_dir``. It is closed when the run completes.
+            stage_workers (Optional[Dict[str, int]]): Worker threads per stage (default 1). The
+                write stage of a sink that is not ``parallel_safe`` always has one worker.
+            queue_size (int): Capacity of the queue in front of each stage.
+
+        Returns:
+            BatchResult: Summary of the run, with the per-stage statistics in ``stages``.
+
+        Raises:
+            ValueError: If ``stage_workers`` names an unknown stage or a count below 1.
+        """
+        from .batch import BatchResult, RecordOutcome, collect, product_key
+        from .pipeline import PIPELINE_STAGES, Stage, StagedPipeline
+        from .streaming import iter_records
+        logger.info(f"Starting pipeline orchestration with input: {input_file_path}")
+        if not os.path.exists(input_file_path):
+            logger.error(f"Input file not found: {input_file_path}")
+            raise FileNotFoundError(input_file_path)
+        workers = dict.fromkeys(PIPELINE_STAGES, 1)
+        for name, count in (stage_workers or {}).items():
+            if name not in workers:
+                raise ValueError(f"Unknown pipeline stage '{name}', expected one of {PIPELINE_STAGES}")
+            if count < 1:
+                raise ValueError(f"Stage '{name}' needs at least one worker")
+            workers[name] = count
+        sink = sink if sink is not None else DirectorySink(output_dir)
+        if workers["write"] > 1 and not sink.parallel_safe:
+            logger.warning(f"{type(sink).__name__} takes one writer at a time; using 1 write worker")
+            workers["write"] = 1
+        encoding = sink.encoding
+        generated = [node.output for node in self.graph.nodes.values()
+                     if node.output not in (self.data_parser.output, self.page_assembler.output, self.target)]
+
+        def parse(artifacts: Dict[str, Any]) -> Dict[str, Any]:
+            product_model = self.parse(artifacts["raw"])
+            return {"product": product_model, "key": product_key(product_model, artifacts["index"])}
+
+        def assemble(artifacts: Dict[str, Any]) -> Dict[str, Any]:
+            artifacts["encoded"] = self._assemble(self.page_assembler.templates, artifacts, encoding)
+            return artifacts
+
+        def validate(artifacts: Dict[str, Any]) -> Dict[str, Any]:
+            self._validate(artifacts["encoded"], artifacts)
+            if self.variants is not None:
+                artifacts["encoded"].update(self.variants.render(artifacts, encoding=encoding))
+            return artifacts
+
+        def write(artifacts: Dict[str, Any]) -> Dict[str, Any]:
+            sink.write_encoded(artifacts["key"], artifacts["encoded"])
+            return {"key": artifacts["key"]}
+
+        functions = {
+            "parse": parse,
+            "generate": lambda artifacts: self.executor.run(artifacts, generated),
+            "assemble": assemble,
+            "validate": validate,
+            "write": write,
+        }
+        pipeline = StagedPipeline([Stage(name, functions[name], workers[name]) for name in PIPELINE_STAGES],
+                                  queue_size=queue_size)
+        result = BatchResult()
+        start = time.perf_counter()
+        with sink:
+            raws = iter_records(input_file_path, csv_workers=self.csv_workers)
+            records = ((index, {"raw": raw, "index": index}) for index, raw in enumerate(raws))
+            for index, value, error in pipeline.run(records):
+                collect(result, [RecordOutcome(index, value.get("key", f"record-{index}"), error)])
+        result.elapsed = time.perf_counter() - start
+        result.stages = pipeline.stats()
+        logger.info(result.summary(), extra=event("run.summary", mode="pipeline", **result.fields()))
+        logger.info(f"Pipeline stages:\n{pipeline.report()}", extra=event("pipeline.stages", stages=result.stages))
+        return result
+
+    def run_batch(self, input_file_path: str, output_dir: str,
+                  workers: Optional[int] = None, chunk_size: int = 64,
+                  cache: Optional[BuildCache] = None, force: bool = False,
+                  profile_path: Optional[str] = None, sink: Optional[OutputSink] = None,
+                  shard: Optional[ShardSpec] = None, resume: bool = False,
+                  checkpoint_every: int = 1000) -> BatchResult:
+        """
+        Executes the workflow for every product in a JSON array or JSONL catalog.
+
+        By default each product is written to its own subdirectory of ``output_dir``. A
+        failing record is reported in the result and does not stop the rest of the batch.
+
+        Args:
+            input_file_path (str): Path to the catalog file.
+            output_dir (str): Directory to save the generated output.
+            workers (Optional[int]): Number of worker processes (defaults to the CPU count).
+            chunk_size (int): Number of records handed to a worker at a time.
+            cache (Optional[BuildCache]): Build cache used to skip unchanged products.
+            force (bool): Regenerate every product even when it is cached.
+            profile_path (Optional[str]): When set, pool workers profile themselves and dump
+                their stats to ``<profile_path>.<pid>`` (see ``metrics.merge_profiles``).
+            sink (Optional[OutputSink]): Alternative output sink, closed when the run completes.
+            shard (Optional[ShardSpec]): Only process this shard of the catalog (see ``ShardSpec``).
+            resume (bool): Skip the products completed by an earlier, interrupted run.
+            checkpoint_every (int): Completed products between two progress manifest checkpoints.
+
+        Returns:
+            BatchResult: Summary of the run, including throughput and failures.
+        """
+        logger.info(f"Starting batch orchestration with input: {input_file_path}")
+        if not os.path.exists(input_file_path):
+            logger.error(f"Input file not found: {input_file_path}")
+            raise FileNotFoundError(input_file_path)
+
+        from .batch import run_batch
+        result = run_batch(self, input_file_path, output_dir, workers=workers, chunk_size=chunk_size,
+                           cache=cache, force=force, profile_path=profile_path, sink=sink,
+                           shard=shard, resume=resume, checkpoint_every=checkpoint_every)
+        logger.info(result.summary(), extra=event("run.summary", mode="batch", **result.fields()))
+        return result
+
+    def _save_output(self, pages: EncodedPages, output_dir: str) -> None:
         """
         Saves the generated pages to the output directory.
 
         Args:
-            pages (Dict[str, Any]): Dictionary of generated pages.
+            pages (EncodedPages): The encoded pages, keyed by page name.
             output_dir (str): Directory to save the files.
         """
         if not os.path.exists(output_dir):
@@ -108,8 +595,7 @@ class Orchestrator:
             filename = f"{name}.json"
             path = os.path.join(output_dir, filename)
             try:
-                with open(path, 'w') as f:
-                    json.dump(content, f, indent=2)
+                write_atomic(path, content)
                 logger.info(f"Saved {filename}")
             except IOError as e:
                 logger.error(f"Failed to save {filename}: {e}")
@@ -0,0 +1,240 @@
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+from .registry import PIPELINE_STAGES
+
+_STOP = object()
+_POLL_SECONDS = 0.1
+
+
+@dataclass
+class Stage:
+    """
+    One step of a StagedPipeline: ``fn`` maps an item's value to its next value.
+    """
+    name: str
+    fn: Callable[[Any], Any]
+    workers: int = 1
+
+
+@dataclass
+class StageStats:
+    """
+    Counters of one stage worker (or, summed, of a whole stage).
+
+    Attributes:
+        items (int): Items that went through the stage, including failed ones.
+        errors (int): Items for which the stage raised.
+        busy_seconds (float): Time spent in the stage function.
+        starved_seconds (float): Time spent waiting for input.
+        blocked_seconds (float): Time spent waiting for room in the next queue (backpressure).
+        depth_sum (int): Sum of the input queue depths seen when taking an item.
+        depth_max (int): Deepest input queue seen.
+    """
+    items: int = 0
+    errors: int = 0
+    busy_seconds: float = 0.0
+    starved_seconds: float = 0.0
+    blocked_seconds: float = 0.0
+    depth_sum: int = 0
+    depth_max: int = 0
+
+    def add(self, other: 'StageStats') -> None:
+        self.items += other.items
+        self.errors += other.errors
+        self.busy_seconds += other.busy_seconds
+        self.starved_seconds += other.starved_seconds
+        self.blocked_seconds += other.blocked_seconds
+        self.depth_sum += other.depth_sum
+        self.depth_max = max(self.depth_max, other.depth_max)
+
+
+class StagedPipeline:
+    """
+    Runs items through a chain of stages, each on its own threads, with bounded queues in between.
+
+    A stage whose output queue is full blocks, which in turn fills the queue in front of
+    it, so a slow last stage throttles the reading of the input instead of letting items
+    pile up: at most ``queue_size`` items wait in front of each stage. An item for which a
+    stage raises is not passed to the later stages' functions; it travels on with its error
+    so that every input item comes out of ``run`` exactly once, in completion order.
+
+    Attributes:
+        stages (List[Stage]): The stages, in order.
+        queue_size (int): Capacity of each queue between stages.
+    """
+    def __init__(self, stages: List[Stage], queue_size: int = 64):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        if queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
+        self.stages = stages
+        self.queue_size = queue_size
+        self._queues: List[queue.Queue] = []
+        self._worker_stats: Dict[str, List[StageStats]] = {}
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+
+    def run(self, items: Iterable[Tuple[int, Any]]) -> Iterator[Tuple[int, Any, Optional[str]]]:
+        """
+        Feeds ``(index, value)`` pairs through the stages.
+
+        Yields:
+            Tuple[int, Any, Optional[str]]: ``(index, value, error)`` for every item, where
+            ``value`` is the last stage's output, or the value the failing stage was given.
+
+        Raises:
+            Exception: Whatever reading ``items`` raised, once the items read before it are out.
+        """
+        self._queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        self._worker_stats = {stage.name: [StageStats() for _ in range(stage.workers)] for stage in self.stages}
+        self._cancelled.clear()
+        self._started, self._finished = time.perf_counter(), None
+        feed_error: List[BaseException] = []
+        threads = [threading.Thread(target=self._feed, args=(items, feed_error), name="pipeline-feed", daemon=True)]
+        for position, stage in enumerate(self.stages):
+            remaining = [stage.workers]
+            for worker in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=self._work, args=(position, self._worker_stats[stage.name][worker], remaining),
+                    name=f"pipeline-{stage.name}-{worker}", daemon=True))
+        for thread in threads:
+            thread.start()
+        output = self._queues[-1]
+        try:
+            while True:
+                item = output.get()
+                if item is _STOP:
+                    break
+                yield item
+        finally:
+            self._cancelled.set()
+            for thread in threads:
+                thread.join()
+            self._finished = time.perf_counter()
+        if feed_error:
+            raise feed_error[0]
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns, per stage: workers, items, errors, utilization (busy share of the stage's
+        worker time), starved and blocked shares, and the mean and maximum input queue depth.
+
+        May be called while the pipeline runs. A stage near full utilization whose upstream
+        stages are blocked is the bottleneck: rendering when it is a CPU stage, I/O when it
+        is the write stage. Busy time is wall time, so it includes waiting for the GIL while
+        other stages compute.
+        """
+        if self._started is None:
+            return {}
+        elapsed = (self._finished or time.perf_counter()) - self._started
+        result = {}
+        for stage in self.stages:
+            total = StageStats()
+            for worker in self._worker_stats[stage.name]:
+                total.add(worker)
+            capacity = elapsed * stage.workers or 1.0
+            result[stage.name] = {
+                "workers": stage.workers,
+                "items": total.items,
+                "errors": total.errors,
+                "utilization": total.busy_seconds / capacity,
+                "starved": total.starved_seconds / capacity,
+                "blocked": total.blocked_seconds / capacity,
+                "queue_depth_mean": total.depth_sum / total.items if total.items else 0.0,
+                "queue_depth_max": total.depth_max,
+            }
+        return result
+
+    def report(self) -> str:
+        """Renders ``stats`` as a table."""
+        lines = [f"{'stage':<10} {'workers':>7} {'items':>8} {'util':>6} {'starved':>7} {'blocked':>7} "
+                 f"{'queue':>6} {'max':>4}"]
+        for name, s in self.stats().items():
+            lines.append(f"{name:<10} {s['workers']:>7} {s['items']:>8} {s['utilization']:>6.0%} "
+                         f"{s['starved']:>7.0%} {s['blocked']:>7.0%} {s['queue_depth_mean']:>6.1f} "
+                         f"{s['queue_depth_max']:>4}")
+        return "\n".join(lines)
+
+    def _put(self, target: queue.Queue, item: Any) -> bool:
+        # Blocks while the queue is full, unless the consumer went away.
+        while not self._cancelled.is_set():
+            try:
+                target.put(item, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, source: queue.Queue) -> Any:
+        while not self._cancelled.is_set():
+            try:
+                return source.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                continue
+        return _STOP
+
+    def _feed(self, items: Iterable[Tuple[int, Any]], errors: List[BaseException]) -> None:
+        first = self._queues[0]
+        try:
+            for index, value in items:
+                if not self._put(first, (index, value, None)):
+                    return
+        except BaseException as e:
+            errors.append(e)
+        for _ in range(self.stages[0].workers):
+            self._put(first, _STOP)
+
+    def _work(self, position: int, stats: StageStats, remaining: List[int]) -> None:
+        stage = self.stages[position]
+        source, target = self._queues[position], self._queues[position + 1]
+        clock = time.perf_counter
+        while True:
+            waited = clock()
+            depth = source.qsize()
+            item = self._get(source)
+            started = clock()
+            stats.starved_seconds += started - waited
+            if item is _STOP:
+                break
+            stats.items += 1
+            stats.depth_sum += depth
+            if depth > stats.depth_max:
+                stats.depth_max = depth
+            index, value, error = item
+            if error is None:
+                try:
+                    value = stage.fn(value)
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                    stats.errors += 1
+            done = clock()
+            stats.busy_seconds += done - started
+            if not self._put(target, (index, value, error)):
+                return
+            stats.blocked_seconds += clock() - done
+        # The last worker of a stage passes the end of the input on.
+        with self._lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            following = self.stages[position + 1].workers if position + 1 < len(self.stages) else 1
+            for _ in range(following):
+                self._put(target, _STOP)
+
+
+def stages_to_prometheus(stats: Dict[str, Dict[str, Any]]) -> str:
+    """Renders ``StagedPipeline.stats`` as Prometheus gauges labelled by stage."""
+    lines = []
+    for field in ("items", "errors", "utilization", "starved", "blocked", "queue_depth_mean", "queue_depth_max"):
+        metric = f"kasparro_pipeline_{field}"
+        lines.append(f"# HELP {metric} Per-stage pipeline {field.replace('_', ' ')}.")
+        lines.append(f"# TYPE {metric} gauge")
+        for name, s in stats.items():
+            lines.append(f'{metric}{{stage="{name}"}} {s[field]:g}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,282 @@
+import json
+import sys
+from dataclasses import dataclass, field
+from operator import attrgetter
+from string import Formatter
+from typing import Dict, Any, Iterable, List, Optional, Tuple, Union
+
+from .models import Product, ProductBatch, PRODUCT_FIELDS
+
+# Declarative question bank. Question and answer texts are str.format templates over
+# Product fields; "requires" lists fields that must be non-empty for the question to
+# apply and "contains" maps fields to a (case-insensitive) substring they must include.
+DEFAULT_QUESTIONS: List[Dict[str, Any]] = [
+    # Usage Category
+    {"category": "Usage", "question": "How often should I use {name}?",
+     "answer": "For best results, follow the usage instructions: {how_to_use}."},
+    {"category": "Usage", "question": "Can I use this in my morning routine?",
+     "answer": "Yes, it is suitable for morning use. {how_to_use}"},
+    {"category": "Usage", "question": "Is it complicated to apply?",
+     "answer": "No, simply: {how_to_use}"},
+
+    # Ingredients Category
+    {"category": "Ingredients", "question": "What are the key ingredients?",
+     "answer": "The key ingredients are {key_ingredients}."},
+    {"category": "Ingredients", "question": "Does it contain Vitamin C?",
+     "answer": "Yes, check the ingredient list: {key_ingredients}"},
+    {"category": "Ingredients", "question": "Are the ingredients safe?",
+     "answer": "It is formulated with {key_ingredients}"},
+
+    # Benefits Category
+    {"category": "Benefits", "question": "What will this do for my skin?",
+     "answer": "It helps with: {benefits}."},
+    {"category": "Benefits", "question": "Will it brighten my skin?",
+     "answer": "Yes, one of the main benefits is: {benefits}."},
+    {"category": "Benefits", "question": "Why should I choose this serum?",
+     "answer": "Because it offers: {benefits}."},
+
+    # Safety Category
+    {"category": "Safety", "question": "Is this safe for sensitive skin?",
+     "answer": "Please check the side effects: {side_effects}."},
+    {"category": "Safety", "question": "Are there side effects?",
+     "answer": "You might experience: {side_effects}."},
+    {"category": "Safety", "question": "Can I use it every day?",
+     "answer": "Refer to usage instructions: {how_to_use}"},
+
+    # Purchase/General
+    {"category": "Purchase", "question": "What is the price?",
+     "answer": "It is priced at {price}."},
+    {"category": "General", "question": "Is this a good value?",
+     "answer": "At {price}, it offers great benefits like {benefits}."},
+    {"category": "General", "question": "Who is this for?",
+     "answer": "It is designed for skin types: {skin_type}."},
+]
+
+
+def compile_text(source: str) -> Tuple[str, Tuple[str, ...]]:
+    """
+    Translates a question template into f-string source over local field variables.
+
+    Returns:
+        Tuple[str, Tuple[str, ...]]: The Python expression and the product fields it references.
+
+    Raises:
+        ValueError: If the template references an unknown field or uses format specs.
+    """
+    parts = []
+    names: List[str] = []
+    for literal, name, spec, conversion in Formatter().parse(source):
+        parts.append(literal.replace('{', '{{').replace('}', '}}'))
+        if name is None:
+            continue
+        if name not in PRODUCT_FIELDS:
+            raise ValueError(f"Unknown product field '{name}' in question template: {source!r}")
+        if spec or conversion:
+            raise ValueError(f"Format specs are not supported in question templates: {source!r}")
+        if name not in names:
+            names.append(name)
+        parts.append(f"{{{name}}}")
+    text = ''.join(parts)
+    if not names:
+        return repr(sys.intern(text.replace('{{', '{').replace('}}', '}'))), ()
+    return 'f' + repr(text), tuple(names)
+
+
+@dataclass(frozen=True)
+class QuestionSpec:
+    """
+    One entry of the question bank.
+
+    Attributes:
+        category (str): FAQ category, e.g. "Usage".
+        question (str): Question template.
+        answer (str): Answer template.
+        requires (Tuple[str, ...]): Fields that must be non-empty for the question to apply.
+        contains (Dict[str, str]): Substrings (case-insensitive) that fields must contain.
+    """
+    category: str
+    question: str
+    answer: str
+    requires: Tuple[str, ...] = ()
+    contains: Dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'QuestionSpec':
+        return cls(category=data['category'], question=data['question'], answer=data['answer'],
+                   requires=tuple(data.get('requires', ())), contains=dict(data.get('contains', {})))
+
+
+def _apply_limits(questions: List[Dict[str, str]], limits: Dict[str, int]) -> List[Dict[str, str]]:
+    counts: Dict[str, int] = {}
+    kept = []
+    for q in questions:
+        category = q["category"]
+        if category in limits:
+            seen = counts.get(category, 0)
+            if seen >= limits[category]:
+                continue
+            counts[category] = seen + 1
+        kept.append(q)
+    return kept
+
+
+class QuestionBank:
+    """
+    A declarative set of FAQ questions compiled into a single generator function.
+
+    The whole bank is translated once into Python source: every question becomes a
+    dict literal whose static texts are shared constants and whose dynamic texts are
+    f-strings over the product's fields, guarded by the question's predicate.
+
+    Attributes:
+        specs (List[QuestionSpec]): The questions, in bank order.
+        fields (Tuple[str, ...]): Product fields referenced by any template or predicate.
+        source (str): The generated Python source, for inspection.
+    """
+    def __init__(self, specs: Iterable[QuestionSpec]):
+        self.specs: List[QuestionSpec] = list(specs)
+        referenced = set()
+        body = []
+        for spec in self.specs:
+            question, question_fields = compile_text(spec.question)
+            answer, answer_fields = compile_text(spec.answer)
+            conditions = []
+            for name in spec.requires:
+                conditions.append(name)
+            for name, needle in spec.contains.items():
+                conditions.append(f"{needle.lower()!r} in str({name}).lower()")
+            for name in list(spec.requires) + list(spec.contains):
+                if name not in PRODUCT_FIELDS:
+                    raise ValueError(f"Unknown product field '{name}' in question predicate")
+            referenced.update(question_fields, answer_fields, spec.requires, spec.contains)
+            entry = (f"{{'category': {sys.intern(spec.category)!r}, "
+                     f"'question': {question}, 'answer': {answer}}}")
+            if conditions:
+                body.append(f"    if {' and '.join(conditions)}:")
+                body.append(f"        out.append({entry})")
+            else:
+                body.append(f"    out.append({entry})")
+        self.fields: Tuple[str, ...] = tuple(name for name in PRODUCT_FIELDS if name in referenced)
+        header = f"def _generate({', '.join(PRODUCT_FIELDS)}):"
+        if any(line.startswith("    if ") for line in body):
+            lines = [header, "    out = []"] + body + ["    return out"]
+        else:
+            # No predicates: build the whole list in a single literal.
+            entries = [line[len("    out.append("):-1] for line in body]
+            lines = [header, "    return [", *(f"        {entry}," for entry in entries), "    ]"]
+        self.source = "\n".join(lines)
+        namespace: Dict[str, Any] = {}
+        exec(compile(self.source, "<question_bank>", "exec"), namespace)
+        self._generate = namespace["_generate"]
+        self._values = attrgetter(*PRODUCT_FIELDS)
+
+    @classmethod
+    def from_dicts(cls, entries: Iterable[Dict[str, Any]]) -> 'QuestionBank':
+        return cls([QuestionSpec.from_dict(entry) for entry in entries])
+
+    @classmethod
+    def load(cls, path: str) -> 'QuestionBank':
+        """
+        Loads a question bank from a JSON file holding a list of question entries.
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dicts(json.load(f))
+
+    def __len__(self) -> int:
+        return len(self.specs)
+
+    def generate(self, product: Product, limits: Optional[Dict[str, int]] = None) -> List[Dict[str, str]]:
+        """
+        Renders the applicable questions for one product.
+
+        Args:
+            product (Product): The product.
+            limits (Optional[Dict[str, int]]): Maximum number of questions per category.
+
+        Returns:
+            List[Dict[str, str]]: ``{"category", "question", "answer"}`` entries in bank order.
+        """
+        questions = self._generate(*self._values(product))
+        return _apply_limits(questions, limits) if limits else questions
+
+    def generate_batch(self, products: Union[ProductBatch, Iterable[Product]],
+                       limits: Optional[Dict[str, int]] = None) -> List[List[Dict[str, str]]]:
+        """
+        Renders the FAQ entries of many products in one pass.
+
+        A ProductBatch is consumed column-wise, without building a Product per row.
+
+        Args:
+            products (Union[ProductBatch, Iterable[Product]]): The products.
+            limits (Optional[Dict[str, int]]): Maximum number of questions per category.
+
+        Returns:
+            List[List[Dict[str, str]]]: The questions of each product, in input order.
+        """
+        generate = self._generate
+        if isinstance(products, ProductBatch):
+            rows = zip(*products.columns.values())
+        else:
+            rows = map(self._values, products)
+        results = [generate(*values) for values in rows]
+        if limits:
+            results = [_apply_limits(questions, limits) for questions in results]
+        return results
+
+
+DEFAULT_QUESTION_BANK = QuestionBank.from_dicts(DEFAULT_QUESTIONS)
+
+# Question banks of the other locales. Categories stay untranslated: they are the keys of
+# the per-category question limits.
+LOCALE_QUESTIONS: Dict[str, List[Dict[str, Any]]] = {
+    "en": DEFAULT_QUESTIONS,
+    "fr": [
+        {"category": "Usage", "question": "À quelle fréquence utiliser {name} ?",
+         "answer": "Pour de meilleurs résultats, suivez le mode d'emploi : {how_to_use}."},
+        {"category": "Usage", "question": "Puis-je l'utiliser le matin ?",
+         "answer": "Oui, il convient à une utilisation le matin. {how_to_use}"},
+        {"category": "Usage", "question": "Est-il compliqué à appliquer ?",
+         "answer": "Non, il suffit de : {how_to_use}"},
+        {"category": "Ingredients", "question": "Quels sont les ingrédients clés ?",
+         "answer": "Les ingrédients clés sont : {key_ingredients}."},
+        {"category": "Ingredients", "question": "Contient-il de la vitamine C ?",
+         "answer": "Oui, consultez la liste des ingrédients : {key_ingredients}"},
+        {"category": "Ingredients", "question": "Les ingrédients sont-ils sûrs ?",
+         "answer": "Il est formulé avec {key_ingredients}"},
+        {"category": "Benefits", "question": "Qu'apporte-t-il à ma peau ?",
+         "answer": "Il aide à : {benefits}."},
+        {"category": "Benefits", "question": "Va-t-il illuminer ma peau ?",
+         "answer": "Oui, l'un de ses principaux bénéfices est : {benefits}."},
+        {"category": "Benefits", "question": "Pourquoi choisir ce sérum ?",
+         "answer": "Parce qu'il offre : {benefits}."},
+        {"category": "Safety", "question": "Convient-il aux peaux sensibles ?",
+         "answer": "Consultez les effets secondaires : {side_effects}."},
+        {"category": "Safety", "question": "Y a-t-il des effets secondaires ?",
+         "answer": "Vous pourriez ressentir : {side_effects}."},
+        {"category": "Safety", "question": "Puis-je l'utiliser tous les jours ?",
+         "answer": "Reportez-vous au mode d'emploi : {how_to_use}"},
+        {"category": "Purchase", "question": "Quel est son prix ?",
+         "answer": "Son prix est de {price}."},
+        {"category": "General", "question": "Est-ce un bon rapport qualité-prix ?",
+         "answer": "À {price}, il offre de beaux bénéfices comme {benefits}."},
+        {"category": "General", "question": "À qui s'adresse-t-il ?",
+         "answer": "Il est conçu pour les types de peau : {skin_type}."},
+    ],
+}
+
+_LOCALE_BANKS: Dict[str, QuestionBank] = {"en": DEFAULT_QUESTION_BANK}
+
+
+def locale_question_bank(locale: str) -> QuestionBank:
+    """
+    Returns the built-in question bank of a locale, compiled on first use.
+
+    Raises:
+        ValueError: If the locale has no question bank.
+    """
+    bank = _LOCALE_BANKS.get(locale)
+    if bank is None:
+        if locale not in LOCALE_QUESTIONS:
+            raise ValueError(f"No question bank for locale '{locale}', expected one of {sorted(LOCALE_QUESTIONS)}")
+        bank = _LOCALE_BANKS[locale] = QuestionBank.from_dicts(LOCALE_QUESTIONS[locale])
+    return bank
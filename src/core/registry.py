@@ -0,0 +1,115 @@
+import importlib
+from collections.abc import Mapping
+from typing import Dict, Any, Iterator, Optional
+
+# Choices offered on the command line. They are defined here, and re-exported by the modules
+# implementing them, so that parsing the arguments (or printing --help) imports nothing else.
+EXECUTION_MODES = ("sequential", "thread", "asyncio")
+PIPELINE_STAGES = ("parse", "generate", "assemble", "validate", "write")
+SINKS = ("dir", "jsonl", "sqlite", "fragments")
+COMPRESSIONS = ("zstd", "gzip", "none")
+JSON_BACKENDS = ("json", "orjson")
+LOG_FORMATS = ("text", "json")
+
+
+class Registry(Mapping):
+    """
+    Components looked up by name, imported only when first looked up.
+
+    Built-ins are ``"module:attribute"`` targets, with modules relative to the ``src.core``
+    package, so listing the names or checking one imports nothing. Plugins are entry points
+    of installed packages, in ``group``::
+
+        [project.entry-points."kasparro.agents"]
+        reviews = "my_package.agents:ReviewAgent"
+
+    They are discovered the first time a name is not a built-in, or when all the names are
+    listed. A built-in name always refers to the built-in.
+
+    Attributes:
+        group (str): Entry point group of the plugins.
+    """
+    def __init__(self, group: str, builtins: Dict[str, str]):
+        self.group = group
+        self._targets: Dict[str, Any] = dict(builtins)
+        self._loaded: Dict[str, Any] = {}
+        self._plugins: Optional[Dict[str, Any]] = None
+
+    def register(self, name: str, target: Any) -> None:
+        """Adds a component, as a ``"module:attribute"`` target or as the object itself."""
+        self._targets[name] = target
+        self._loaded.pop(name, None)
+
+    def __getitem__(self, name: str) -> Any:
+        value = self._loaded.get(name)
+        if value is None:
+            if name in self._targets:
+                target = self._targets[name]
+                value = _resolve(target) if isinstance(target, str) else target
+            elif name in self.plugins():
+                value = self.plugins()[name].load()
+            else:
+                raise KeyError(name)
+            self._loaded[name] = value
+        return value
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._targets or name in self.plugins()
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._targets
+        yield from (name for name in self.plugins() if name not in self._targets)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def builtins(self) -> Iterator[str]:
+        """Iterates over the names registered in this process, without looking for plugins."""
+        return iter(self._targets)
+
+    def plugins(self) -> Dict[str, Any]:
+        """Returns the entry points of the installed plugins, by name."""
+        if self._plugins is None:
+            from importlib.metadata import entry_points
+            self._plugins = {entry.name: entry for entry in entry_points(group=self.group)}
+        return self._plugins
+
+
+def _resolve(target: str) -> Any:
+    module, _, attribute = target.partition(":")
+    return getattr(importlib.import_module(module, __package__), attribute)
+
+
+# The agents an Orchestrator can run. Plugin agents are constructed without arguments.
+AGENTS = Registry("kasparro.agents", {
+    "data_parser": "..agents.data_parser_agent:DataParserAgent",
+    "question_generator": "..agents.question_generator_agent:QuestionGeneratorAgent",
+    "competitor_generator": "..agents.competitor_agent:CompetitorGenerationAgent",
+    "content_logic": "..agents.content_logic_agent:ContentLogicAgent",
+    "page_assembler": "..agents.page_assembler_agent:PageAssemblerAgent",
+    "validator": "..agents.validation_agent:ValidationAgent",
+})
+
+# The built-in agent producing each artifact, so that the agents a run needs are known
+# without importing the others.
+PRODUCERS = {
+    "product": "data_parser",
+    "questions": "question_generator",
+    "competitor": "competitor_generator",
+    "content_blocks": "content_logic",
+    "pages": "page_assembler",
+    "validated_pages": "validator",
+}
+
+# The page templates. A plugin page is a template in the format of ``PAGE_TEMPLATES``; it is
+# validated when a schema is registered for it in ``PAGE_SCHEMAS``.
+PAGES = Registry("kasparro.pages", {
+    "faq_page": ".templates:FAQ_TEMPLATE",
+    "product_page": ".templates:PRODUCT_PAGE_TEMPLATE",
+    "comparison_page": ".templates:COMPARISON_PAGE_TEMPLATE",
+})
+
+# Text-generation backends (see ``GenerationBackend``), called with keyword options.
+GENERATION_BACKENDS = Registry("kasparro.generation_backends", {
+    "stub": ".generation:StubBackend",
+})
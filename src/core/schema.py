@@ -0,0 +1,132 @@
+from dataclasses import dataclass, field
+from typing import Dict, Any, Iterable, List, Optional
+
+# Subset of JSON Schema understood by CompiledSchema.
+SCHEMA_TYPES = {
+    "object": "type({v}) is dict",
+    "array": "isinstance({v}, (list, tuple))",
+    "string": "type({v}) is str",
+    "number": "isinstance({v}, (int, float)) and type({v}) is not bool",
+    "boolean": "type({v}) is bool",
+}
+SCHEMA_KEYWORDS = {"type", "required", "properties", "items", "minItems", "minLength", "description"}
+
+
+class CompiledSchema:
+    """
+    A declarative schema translated once into a single Python validator function.
+
+    Supports the JSON Schema keywords ``type`` (object, array, string, number, boolean),
+    ``required``, ``properties``, ``items``, ``minItems`` and ``minLength``. Every violation
+    is collected, each reported as ``"<path>: <problem>"``; checks below a value of the
+    wrong type are skipped.
+
+    Attributes:
+        schema (Dict[str, Any]): The declarative schema.
+        source (str): The generated Python source, for inspection.
+    """
+    def __init__(self, schema: Dict[str, Any], root: str = "$"):
+        self.schema = schema
+        self._depth = 0
+        lines = ["def _validate(v0):", "    errors = []"]
+        self._emit(schema, "v0", _escape(root), 1, lines)
+        lines.append("    return errors")
+        self.source = "\n".join(lines)
+        namespace: Dict[str, Any] = {}
+        exec(compile(self.source, "<schema>", "exec"), namespace)
+        self._validate = namespace["_validate"]
+
+    def validate(self, value: Any) -> List[str]:
+        """
+        Returns every violation found in ``value``; an empty list means it is valid.
+        """
+        return self._validate(value)
+
+    def validate_batch(self, values: Iterable[Any], keys: Optional[Iterable[str]] = None) -> 'ValidationReport':
+        """
+        Validates many values in one call.
+
+        Args:
+            values (Iterable[Any]): The values, e.g. the pages of every product.
+            keys (Optional[Iterable[str]]): Identifier of each value (defaults to its index).
+
+        Returns:
+            ValidationReport: The number of values checked and the violations per failing key.
+        """
+        validate = self._validate
+        report = ValidationReport()
+        keys = iter(keys) if keys is not None else None
+        for index, value in enumerate(values):
+            key = next(keys) if keys is not None else str(index)
+            errors = validate(value)
+            report.checked += 1
+            if errors:
+                report.failures[key] = errors
+        return report
+
+    def _emit(self, schema: Dict[str, Any], var: str, path: str, level: int, lines: List[str]) -> None:
+        unknown = set(schema) - SCHEMA_KEYWORDS
+        if unknown:
+            raise ValueError(f"Unsupported schema keywords at {path}: {sorted(unknown)}")
+        pad = "    " * level
+
+        def error(message: str) -> str:
+            return f"{pad}errors.append(f{path + ': ' + message!r})"
+
+        kind = schema.get("type")
+        if kind is not None:
+            if kind not in SCHEMA_TYPES:
+                raise ValueError(f"Unsupported schema type '{kind}' at {path}")
+            lines.append(f"{pad}if not ({SCHEMA_TYPES[kind].format(v=var)}):")
+            lines.append("    " + error(f"expected {kind}, got {{type({var}).__name__}}"))
+            lines.append(f"{pad}else:")
+            level += 1
+            pad = "    " * level
+        checks_start = len(lines)
+
+        if "minLength" in schema or "minItems" in schema:
+            limit = schema.get("minItems", schema.get("minLength"))
+            unit = "items" if "minItems" in schema else "characters"
+            lines.append(f"{pad}if len({var}) < {int(limit)}:")
+            lines.append("    " + error(f"expected at least {int(limit)} {unit}, got {{len({var})}}"))
+        for name in schema.get("required", ()):
+            lines.append(f"{pad}if {name!r} not in {var}:")
+            lines.append("    " + error(f"missing required key {name!r}"))
+        for name, subschema in schema.get("properties", {}).items():
+            self._depth += 1
+            child = f"v{self._depth}"
+            lines.append(f"{pad}if {name!r} in {var}:")
+            lines.append(f"{pad}    {child} = {var}[{name!r}]")
+            self._emit(subschema, child, f"{path}.{_escape(name)}", level + 1, lines)
+        if "items" in schema:
+            self._depth += 1
+            child, index = f"v{self._depth}", f"i{self._depth}"
+            lines.append(f"{pad}for {index}, {child} in enumerate({var}):")
+            self._emit(schema["items"], child, f"{path}[{{{index}}}]", level + 1, lines)
+
+        if len(lines) == checks_start:
+            lines.append(f"{pad}pass")
+
+
+def _escape(text: str) -> str:
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+@dataclass
+class ValidationReport:
+    """
+    Outcome of validating a batch.
+
+    Attributes:
+        checked (int): Number of values validated.
+        failures (Dict[str, List[str]]): Violations of every invalid value, keyed by its identifier.
+    """
+    checked: int = 0
+    failures: Dict[str, List[str]] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.failures
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"checked": self.checked, "failed": len(self.failures), "failures": self.failures}
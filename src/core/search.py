@@ -0,0 +1,295 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Any, Callable, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .sinks import EncodedPages, OutputSink
+
+# Text indexed for each page type, as (field, key path) pairs; "*" walks every item of a list.
+# Variant pages (e.g. "faq_page.fr") are indexed like the page they are a variant of.
+INDEXED_TEXT: Dict[str, Tuple[Tuple[str, Tuple[str, ...]], ...]] = {
+    "faq_page": (
+        ("question", ("sections", "*", "q_and_a", "*", "question")),
+        ("answer", ("sections", "*", "q_and_a", "*", "answer")),
+    ),
+    "product_page": (
+        ("title", ("title",)),
+        ("price", ("price",)),
+        ("description", ("description",)),
+        ("benefits", ("benefits_list", "*")),
+        ("usage", ("usage_instructions",)),
+        ("ingredients", ("ingredients_highlight",)),
+    ),
+    "comparison_page": (
+        ("title", ("title",)),
+        ("verdict", ("verdict",)),
+    ),
+}
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS products (id INTEGER PRIMARY KEY, key TEXT NOT NULL UNIQUE)",
+    "CREATE TABLE IF NOT EXISTS fields (id INTEGER PRIMARY KEY, page TEXT NOT NULL, field TEXT NOT NULL, "
+    "UNIQUE (page, field))",
+    "CREATE TABLE IF NOT EXISTS texts (id INTEGER PRIMARY KEY, digest BLOB NOT NULL UNIQUE)",
+    # Diacritics are folded, so "creme" finds "crème".
+    "CREATE VIRTUAL TABLE IF NOT EXISTS text_index USING fts5(text, tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TABLE IF NOT EXISTS entries (product INTEGER NOT NULL, field INTEGER NOT NULL, text INTEGER NOT NULL, "
+    "PRIMARY KEY (product, field, text)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS entries_text ON entries (text)",
+)
+
+
+class SearchHit(NamedTuple):
+    """A page text matching a query, with the matched terms in [brackets]."""
+    product_id: str
+    page: str
+    field: str
+    snippet: str
+
+
+def _texts(page: Any, path: Tuple[str, ...]) -> List[str]:
+    values = [page]
+    for part in path:
+        if part == "*":
+            values = [item for value in values if isinstance(value, list) for item in value]
+        else:
+            values = [value[part] for value in values if isinstance(value, dict) and part in value]
+    return [value for value in values if isinstance(value, str) and value]
+
+
+def page_texts(name: str, page: Any) -> List[Tuple[str, str]]:
+    """Returns the ``(field, text)`` pairs indexed for a page (none for unknown page types)."""
+    return [(field, text) for field, path in INDEXED_TEXT.get(name.partition(".")[0], ())
+            for text in _texts(page, path)]
+
+
+def quote(text: str) -> str:
+    """Turns literal text into an FTS5 phrase query, e.g. ``2-3 drops`` into ``"2-3 drops"``."""
+    return '"' + text.replace('"', '""') + '"'
+
+
+class PageIndex:
+    """
+    Full-text index of the generated pages: FAQ questions and answers, product page fields
+    and comparison verdicts, in a SQLite FTS5 table.
+
+    Most texts repeat across products (static questions, answers quoting the same side
+    effects, shared ingredient lists), so every distinct text is stored and indexed once, in
+    ``text_index``, and ``entries`` maps each product and (page, field), by integer id, to the
+    texts it holds. Indexing a page replaces the entries of that product and page only, so
+    partially re-rendered products are updated in place; texts no longer used by any page
+    are dropped by ``prune``.
+
+    The connection may be used from a BackgroundWriter thread, but only from one thread at
+    a time for writing.
+
+    Attributes:
+        path (str): Location of the SQLite index.
+        max_texts (int): Text ids remembered in memory to skip lookups; forgotten beyond it.
+    """
+    def __init__(self, path: str, max_texts: int = 1 << 20):
+        self.path = path
+        self.max_texts = max_texts
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+        self._lock = threading.Lock()
+        # Known texts map to their id without hashing them again.
+        self._ids: Dict[str, int] = {}
+        self._fields: Dict[Tuple[str, str], int] = {}
+        self._page_fields: Dict[str, Tuple[int, ...]] = {}
+        for field_id, page, field in self._conn.execute("SELECT id, page, field FROM fields"):
+            self._fields[page, field] = field_id
+
+    def update(self, items: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        """
+        Indexes the pages of several products, in one transaction.
+
+        Args:
+            items (Iterable[Tuple[str, Dict[str, Any]]]): ``(product_id, pages)`` pairs; only
+                the given pages of each product are replaced.
+        """
+        conn = self._conn
+        with self._lock, conn:
+            deleted = []
+            rows = []
+            for key, pages in items:
+                product = self._product_id(key)
+                for name, page in pages.items():
+                    deleted += [(product, field_id) for field_id in self._fields_of(name)]
+                    for field, text in page_texts(name, page):
+                        rows.append((product, self._field_id(name, field), self._text_id(text)))
+            conn.executemany("DELETE FROM entries WHERE product = ? AND field = ?", deleted)
+            conn.executemany("INSERT OR IGNORE INTO entries (product, field, text) VALUES (?, ?, ?)", rows)
+
+    def update_encoded(self, items: Iterable[Tuple[str, EncodedPages]]) -> None:
+        """Indexes pages encoded as JSON bytes (see ``update``)."""
+        self.update((key, {name: json.loads(data) for name, data in encoded.items()
+                           if name.partition(".")[0] in INDEXED_TEXT})
+                    for key, encoded in items)
+
+    def remove(self, product_id: str) -> None:
+        """Drops every indexed page of a product."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries WHERE product = (SELECT id FROM products WHERE key = ?)",
+                               (product_id,))
+
+    def prune(self) -> int:
+        """
+        Drops the texts that no page uses any more.
+
+        Returns:
+            int: Number of texts dropped.
+        """
+        with self._lock, self._conn:
+            unused = "SELECT id FROM texts WHERE NOT EXISTS (SELECT 1 FROM entries WHERE text = texts.id)"
+            self._conn.execute(f"DELETE FROM text_index WHERE rowid IN ({unused})")
+            count = self._conn.execute(f"DELETE FROM texts WHERE id IN ({unused})").rowcount
+            self._ids.clear()
+        return count
+
+    def search(self, query: str, page: Optional[str] = None, field: Optional[str] = None,
+               limit: int = 20) -> List[SearchHit]:
+        """
+        Finds the indexed texts matching a query, best matches first.
+
+        Args:
+            query (str): FTS5 query, e.g. ``niacinamide``, ``vitamin AND tingling``,
+                ``"sensitive skin"`` or ``hyal*`` (see ``quote`` for literal text).
+            page (Optional[str]): Only search this page type, e.g. "faq_page" or "faq_page.fr".
+            field (Optional[str]): Only search this field, e.g. "answer" or "verdict".
+            limit (int): Maximum number of hits.
+
+        Raises:
+            ValueError: If the query is not valid FTS5 syntax.
+        """
+        hits = []
+        for snippet, entries in self._matches(query, page, field, "p.key, f.page, f.field",
+                                              "snippet(text_index, 0, '[', ']', '...', 16)"):
+            for product_id, page_name, field_name in entries:
+                hits.append(SearchHit(product_id, page_name, field_name, snippet))
+                if len(hits) == limit:
+                    return hits
+        return hits
+
+    def products(self, query: str, page: Optional[str] = None, field: Optional[str] = None,
+                 limit: int = 100) -> List[str]:
+        """Returns the products with a text matching the query, best matches first (see ``search``)."""
+        products: Dict[str, None] = {}
+        for _, entries in self._matches(query, page, field, "DISTINCT p.key", "NULL"):
+            for (product_id,) in entries:
+                products[product_id] = None
+                if len(products) == limit:
+                    return list(products)
+        return list(products)
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM products "
+                                  "WHERE EXISTS (SELECT 1 FROM entries WHERE product = products.id)").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _product_id(self, key: str) -> int:
+        cursor = self._conn.execute("INSERT OR IGNORE INTO products (key) VALUES (?)", (key,))
+        if cursor.rowcount:
+            return cursor.lastrowid
+        return self._conn.execute("SELECT id FROM products WHERE key = ?", (key,)).fetchone()[0]
+
+    def _field_id(self, page: str, field: str) -> int:
+        field_id = self._fields.get((page, field))
+        if field_id is None:
+            field_id = self._fields[page, field] = self._conn.execute(
+                "INSERT INTO fields (page, field) VALUES (?, ?)", (page, field)).lastrowid
+            self._page_fields.pop(page, None)
+        return field_id
+
+    def _fields_of(self, page: str) -> Tuple[int, ...]:
+        field_ids = self._page_fields.get(page)
+        if field_ids is None:
+            field_ids = self._page_fields[page] = tuple(
+                self._field_id(page, field) for field, _ in INDEXED_TEXT.get(page.partition(".")[0], ()))
+        return field_ids
+
+    def _text_id(self, text: str) -> int:
+        text_id = self._ids.get(text)
+        if text_id is None:
+            if len(self._ids) >= self.max_texts:
+                self._ids.clear()
+            digest = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+            cursor = self._conn.execute("INSERT OR IGNORE INTO texts (digest) VALUES (?)", (digest,))
+            if cursor.rowcount:
+                text_id = cursor.lastrowid
+                self._conn.execute("INSERT INTO text_index (rowid, text) VALUES (?, ?)", (text_id, text))
+            else:
+                (text_id,) = self._conn.execute("SELECT id FROM texts WHERE digest = ?", (digest,)).fetchone()
+            self._ids[text] = text_id
+        return text_id
+
+    def _matches(self, query: str, page: Optional[str], field: Optional[str], columns: str,
+                 extra: str) -> Iterator[Tuple[Any, List[Tuple[Any, ...]]]]:
+        # Walks the matching texts best first, with the entries of each; stops when the caller does.
+        sql = (f"SELECT {columns} FROM entries e JOIN products p ON p.id = e.product "
+               "JOIN fields f ON f.id = e.field WHERE e.text = ?")
+        filters: List[Any] = []
+        if page is not None:
+            sql += " AND f.page = ?"
+            filters.append(page)
+        if field is not None:
+            sql += " AND f.field = ?"
+            filters.append(field)
+        try:
+            texts = self._conn.execute(f"SELECT rowid, {extra} FROM text_index WHERE text_index MATCH ? "
+                                       "ORDER BY rank", (query,))
+            for text_id, value in texts:
+                entries = self._conn.execute(sql, [text_id, *filters]).fetchall()
+                if entries:
+                    yield value, entries
+        except sqlite3.OperationalError as e:
+            raise ValueError(f"Invalid search query '{query}': {e} (quote literal text, e.g. '\"2-3 drops\"')") from None
+
+
+class IndexingSink(OutputSink):
+    """
+    Writes through another sink and indexes the pages it stores.
+
+    The index has a single writer, so the wrapper is never ``parallel_safe``: batch workers
+    hand their pages to the parent process, which writes and indexes them.
+    """
+    def __init__(self, sink: OutputSink, index: PageIndex):
+        self.sink = sink
+        self.index = index
+        self.kind = sink.kind
+        self.encoding = sink.encoding
+        self.incremental = sink.incremental
+
+    def location(self, key: str) -> str:
+        return self.sink.location(key)
+
+    def locator(self) -> Callable[[str], str]:
+        return self.sink.locator()
+
+    def write_many(self, items: List[Tuple[str, EncodedPages]]) -> None:
+        self.sink.write_many(items)
+        self.index.update_encoded(items)
+
+    def flush(self) -> None:
+        self.sink.flush()
+
+    def close(self) -> None:
+        try:
+            self.sink.close()
+        finally:
+            self.index.close()
+
+    def discard(self) -> None:
+        try:
+            self.sink.discard()
+        finally:
+            self.index.close()
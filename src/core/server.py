@@ -0,0 +1,279 @@
+import json
+import logging
+import os
+import socketserver
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, Tuple
+
+from .batch import product_key
+from .cache import product_digest
+from .encoding import SINGLE_LINE, PageEncoding
+from .metrics import _quantile
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 1 << 20
+
+
+class RenderService:
+    """
+    Renders pages on demand with one warm Orchestrator.
+
+    Results are cached by product digest in an LRU of encoded responses. Concurrent
+    requests for the same product are coalesced: the first one renders and the
+    others wait for its result.
+
+    Attributes:
+        orchestrator (Orchestrator): Orchestrator whose agents render the pages.
+        cache_size (int): Maximum number of cached responses.
+        counters (Dict[str, int]): Requests served per outcome (hit, miss, coalesced, error).
+        encoding (PageEncoding): How the pages in responses are serialised.
+    """
+    def __init__(self, orchestrator, cache_size: int = 1024, latency_window: int = 10000,
+                 encoding: PageEncoding = SINGLE_LINE):
+        self.orchestrator = orchestrator
+        self.cache_size = cache_size
+        self.encoding = encoding
+        self.counters = {"hit": 0, "miss": 0, "coalesced": 0, "error": 0}
+        self.started = time.time()
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._latencies: deque = deque(maxlen=latency_window)
+        self._lock = threading.Lock()
+
+    def parse(self, body: bytes) -> Product:
+        """
+        Decodes a request body into a Product.
+
+        Raises:
+            ValueError: If the body is not a JSON object or not a valid product.
+        """
+        try:
+            raw = json.loads(body)
+            if not isinstance(raw, dict):
+                raise ValueError("expected a JSON object")
+            return self.orchestrator.parse(raw)
+        except Exception:
+            self._count("error")
+            raise
+
+    def render(self, product: Product) -> Tuple[bytes, str]:
+        """
+        Returns the encoded ``{"key", "pages"}`` response for a product and how it was
+        served: "hit", "miss" or "coalesced".
+
+        Raises:
+            Exception: Whatever the agents raised (e.g. ValueError when validation fails).
+        """
+        start = time.perf_counter()
+        digest = product_digest(product)
+        with self._lock:
+            body = self._cache.get(digest)
+            if body is not None:
+                self._cache.move_to_end(digest)
+                self.counters["hit"] += 1
+                return body, "hit"
+            future = self._inflight.get(digest)
+            owner = future is None
+            if owner:
+                future = self._inflight[digest] = Future()
+
+        if not owner:
+            try:
+                body = future.result()
+            except Exception:
+                self._count("error")
+                raise
+            self._count("coalesced")
+            return body, "coalesced"
+
+        try:
+            encoding = self.encoding
+            pages = self.orchestrator.generate_pages(product, encoding)
+            body = encoding.envelope((("key", encoding.string(product_key(product)).encode('utf-8')),
+                                      ("pages", encoding.envelope(pages.items()))))
+        except Exception as e:
+            with self._lock:
+                del self._inflight[digest]
+                self.counters["error"] += 1
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._cache[digest] = body
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            del self._inflight[digest]
+            self.counters["miss"] += 1
+            self._latencies.append(time.perf_counter() - start)
+        future.set_result(body)
+        return body, "miss"
+
+    def health(self) -> Dict[str, Any]:
+        return {"status": "ok", "uptime_seconds": round(time.time() - self.started, 3),
+                "cache_entries": len(self._cache)}
+
+    def to_prometheus(self) -> str:
+        """
+        Renders the service counters, the render latency of recent cache misses and,
+        when enabled, the per-agent metrics in Prometheus text format.
+        """
+        with self._lock:
+            counters = dict(self.counters)
+            latencies = sorted(self._latencies)
+            entries = len(self._cache)
+        lines = ["# HELP kasparro_serve_requests_total Render requests by outcome.",
+                 "# TYPE kasparro_serve_requests_total counter"]
+        for outcome, count in counters.items():
+            lines.append(f'kasparro_serve_requests_total{{outcome="{outcome}"}} {count}')
+        lines += ["# HELP kasparro_serve_render_seconds Render latency of recent cache misses.",
+                  "# TYPE kasparro_serve_render_seconds summary"]
+        for q in (0.5, 0.95, 0.99):
+            lines.append(f'kasparro_serve_render_seconds{{quantile="{q}"}} {_quantile(latencies, q):g}')
+        lines.append(f"kasparro_serve_render_seconds_sum {sum(latencies):g}")
+        lines.append(f"kasparro_serve_render_seconds_count {len(latencies)}")
+        lines += ["# HELP kasparro_serve_cache_entries Cached responses.",
+                  "# TYPE kasparro_serve_cache_entries gauge",
+                  f"kasparro_serve_cache_entries {entries}"]
+        text = "\n".join(lines) + "\n"
+        if self.orchestrator.metrics is not None:
+            text += self.orchestrator.metrics.to_prometheus()
+        return text
+
+    def _count(self, outcome: str) -> None:
+        with self._lock:
+            self.counters[outcome] += 1
+
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    """
+    HTTP API of the RenderService:
+
+        POST /render    Product JSON in, ``{"key", "pages"}`` out (header X-Cache: hit/miss/coalesced).
+        GET  /healthz   Liveness and cache size.
+        GET  /metrics   Prometheus text format.
+    """
+    protocol_version = "HTTP/1.1"
+    server_version = "KasparroRender/1.0"
+
+    @property
+    def service(self) -> RenderService:
+        return self.server.service
+
+    def do_GET(self) -> None:
+        if self.path == "/healthz":
+            self._send(200, json.dumps(self.service.health()).encode('utf-8'))
+        elif self.path == "/metrics":
+            self._send(200, self.service.to_prometheus().encode('utf-8'), "text/plain; version=0.0.4")
+        else:
+            self._error(404, f"Unknown path {self.path}")
+
+    def do_POST(self) -> None:
+        if self.path != "/render":
+            self._error(404, f"Unknown path {self.path}")
+            return
+        length = self._content_length()
+        if length is None:
+            return
+        try:
+            product = self.service.parse(self.rfile.read(length))
+        except Exception as e:
+            self._error(400, f"Invalid product: {e}")
+            return
+        try:
+            body, outcome = self.service.render(product)
+        except ValueError as e:
+            self._error(422, str(e))
+            return
+        except Exception as e:
+            logger.error(f"Render failed: {type(e).__name__}: {e}")
+            self._error(500, f"{type(e).__name__}: {e}")
+            return
+        self._send(200, body, headers={"X-Cache": outcome})
+
+    def _content_length(self) -> Optional[int]:
+        # Rejects the request (and drops the connection, whose unread body would be taken
+        # for the next request) unless it declares a valid body size within the limit.
+        header = self.headers.get("Content-Length")
+        if header is None:
+            status, message = 411, "Content-Length required"
+        else:
+            try:
+                length = int(header)
+            except ValueError:
+                length = -1
+            if 0 <= length <= MAX_BODY_BYTES:
+                return length
+            if length > MAX_BODY_BYTES:
+                status, message = 413, "Request body too large"
+            else:
+                status, message = 400, f"Invalid Content-Length {header!r}"
+        self._error(status, message, headers={"Connection": "close"})
+        return None
+
+    def _error(self, status: int, message: str, headers: Optional[Dict[str, str]] = None) -> None:
+        self._send(status, json.dumps({"error": message}).encode('utf-8'), headers=headers)
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json",
+              headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self) -> str:
+        # Unix socket peers have no address.
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+class _TcpRenderServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class _UnixRenderServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(service: RenderService, host: str = "127.0.0.1", port: int = 8080,
+                socket_path: Optional[str] = None) -> socketserver.BaseServer:
+    """
+    Binds a threaded HTTP server for ``service`` on a TCP port or, when ``socket_path``
+    is given, on a Unix domain socket.
+    """
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = _UnixRenderServer(socket_path, RenderRequestHandler)
+    else:
+        server = _TcpRenderServer((host, port), RenderRequestHandler)
+    server.service = service
+    return server
+
+
+def serve(orchestrator, host: str = "127.0.0.1", port: int = 8080, socket_path: Optional[str] = None,
+          cache_size: int = 1024, encoding: PageEncoding = SINGLE_LINE) -> None:
+    """
+    Serves on-demand renders until interrupted.
+    """
+    server = make_server(RenderService(orchestrator, cache_size, encoding=encoding), host, port, socket_path)
+    where = socket_path or f"http://{host}:{server.server_address[1]}"
+    logger.info(f"Serving renders on {where} (POST /render, GET /healthz, GET /metrics)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+        logger.info("Server stopped")
@@ -0,0 +1,428 @@
+import functools
+import gzip
+import json
+import os
+import queue
+import sqlite3
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Callable, IO, Iterator, List, Optional, Tuple
+
+from .encoding import INDENTED, SINGLE_LINE, PageEncoding
+from .registry import COMPRESSIONS, SINKS
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+# Pages encoded as JSON bytes, keyed by page type.
+EncodedPages = Dict[str, bytes]
+
+_EXTENSIONS = {"zstd": ".jsonl.zst", "gzip": ".jsonl.gz", "none": ".jsonl"}
+
+
+def encode_pages(pages: Dict[str, Any], encoding: PageEncoding = SINGLE_LINE) -> EncodedPages:
+    """
+    Serialises every page to JSON bytes.
+
+    Encoding is separate from writing so that batch workers can do it in parallel and
+    hand finished bytes to a single writer. Pages rendered by the orchestrator are usually
+    encoded straight from their templates instead (see ``Orchestrator.generate_pages``).
+    """
+    return {name: encoding.encode(content) for name, content in pages.items()}
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    """
+    Writes ``data`` to a temporary file next to ``path`` and renames it into place,
+    so readers never observe a partially written file.
+    """
+    tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class OutputSink(ABC):
+    """
+    Destination for rendered pages.
+
+    Attributes:
+        kind (str): Name of the sink on the command line (see ``SINKS``).
+        encoding (PageEncoding): How pages are serialised for this sink. It may be replaced
+            on an instance (see ``open_sink``).
+        parallel_safe (bool): Whether several processes may write through their own
+            instances of the sink at the same time.
+        incremental (bool): Whether pages written by an earlier run stay in place, so a
+            build cache may skip unchanged products.
+    """
+    kind = ''
+    encoding: PageEncoding = SINGLE_LINE
+    parallel_safe = False
+    incremental = True
+
+    def write(self, key: str, pages: Dict[str, Any]) -> str:
+        """
+        Encodes and writes the pages of one product.
+
+        Returns:
+            str: The location the pages were written to.
+        """
+        return self.write_encoded(key, encode_pages(pages, self.encoding))
+
+    def write_encoded(self, key: str, encoded: EncodedPages) -> str:
+        self.write_many([(key, encoded)])
+        return self.location(key)
+
+    @abstractmethod
+    def write_many(self, items: List[Tuple[str, EncodedPages]]) -> None:
+        """Writes the encoded pages of several products."""
+
+    @abstractmethod
+    def location(self, key: str) -> str:
+        """Returns where the pages of ``key`` are stored (recorded by the build cache)."""
+
+    @abstractmethod
+    def locator(self) -> Callable[[str], str]:
+        """Returns a picklable equivalent of ``location``, for use in pool workers."""
+
+    def flush(self) -> None:
+        """Returns once everything written so far is stored."""
+
+    def close(self) -> None:
+        pass
+
+    def discard(self) -> None:
+        """
+        Closes the sink after a failed run, dropping what it has not published yet.
+
+        Sinks storing every write at once have nothing to drop and just close.
+        """
+        self.close()
+
+    def __enter__(self) -> 'OutputSink':
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is not None:
+            self.discard()
+        else:
+            self.close()
+
+
+class DirectorySink(OutputSink):
+    """
+    The original layout: one indented ``<page>.json`` file per page, in a directory per product.
+    """
+    kind = "dir"
+    encoding = INDENTED
+    parallel_safe = True
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def location(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def locator(self) -> Callable[[str], str]:
+        return functools.partial(os.path.join, self.root)
+
+    def write_many(self, items: List[Tuple[str, EncodedPages]]) -> None:
+        for key, encoded in items:
+            directory = self.location(key)
+            os.makedirs(directory, exist_ok=True)
+            for name, data in encoded.items():
+                write_atomic(os.path.join(directory, f"{name}.json"), data)
+
+
+def shard_location(paths: List[str], key: str) -> str:
+    """Returns the shard of ``key`` among ``paths``, selected by the stable hash the sharded sinks use."""
+    return paths[zlib.crc32(key.encode('utf-8')) % len(paths)]
+
+
+def _open_compressed(path: str, compression: str) -> IO[bytes]:
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=3).stream_writer(open(path, 'wb'), closefd=True)
+    if compression == "gzip":
+        return gzip.open(path, 'wb', compresslevel=6)
+    return open(path, 'wb')
+
+
+def _open_decompressed(path: str) -> IO[bytes]:
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"Reading {path} requires the 'zstandard' package")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    if path.endswith(".gz"):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+class ShardedJsonlSink(OutputSink):
+    """
+    Packs pages into a fixed number of compressed JSONL shards.
+
+    Each product becomes one line ``{"key": <key>, "pages": {<page>: <page>, ...}}`` in the
+    shard selected by a stable hash of its key. Shards are written to temporary files and
+    renamed into place on ``close``, so readers never see a partial shard. Every shard is
+    (re)written on close, even when empty, so no shard of an earlier run survives. A failed
+    run ``discard``s its temporary files instead, leaving the shards of the last one in place.
+
+    Attributes:
+        root (str): Output directory.
+        shards (int): Number of shard files.
+        compression (str): "zstd" (requires the ``zstandard`` package), "gzip" or "none".
+    """
+    kind = "jsonl"
+    incremental = False
+
+    def __init__(self, root: str, shards: int = 16, compression: Optional[str] = None):
+        if compression is None:
+            compression = "zstd" if zstandard is not None else "gzip"
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression '{compression}', expected one of {COMPRESSIONS}")
+        if compression == "zstd" and zstandard is None:
+            raise RuntimeError("zstd compression requires the 'zstandard' package")
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        self.root = root
+        self.shards = shards
+        self.compression = compression
+        self._files: Dict[int, IO[bytes]] = {}
+        os.makedirs(root, exist_ok=True)
+
+    def shard_of(self, key: str) -> int:
+        return zlib.crc32(key.encode('utf-8')) % self.shards
+
+    def shard_path(self, shard: int) -> str:
+        return os.path.join(self.root, f"pages-{shard:05d}-of-{self.shards:05d}{_EXTENSIONS[self.compression]}")
+
+    def location(self, key: str) -> str:
+        return self.shard_path(self.shard_of(key))
+
+    def locator(self) -> Callable[[str], str]:
+        return functools.partial(shard_location, [self.shard_path(shard) for shard in range(self.shards)])
+
+    def write_many(self, items: List[Tuple[str, EncodedPages]]) -> None:
+        lines: Dict[int, List[bytes]] = {}
+        for key, encoded in items:
+            pages = self.encoding.envelope(encoded.items())
+            line = self.encoding.envelope((("key", self.encoding.string(key).encode('utf-8')), ("pages", pages))) + b'\n'
+            lines.setdefault(self.shard_of(key), []).append(line)
+        for shard, chunk in lines.items():
+            f = self._files.get(shard)
+            if f is None:
+                f = self._files[shard] = _open_compressed(self.shard_path(shard) + ".tmp", self.compression)
+            f.write(b''.join(chunk))
+
+    def close(self) -> None:
+        for shard in range(self.shards):
+            if shard not in self._files:
+                self._files[shard] = _open_compressed(self.shard_path(shard) + ".tmp", self.compression)
+        for shard, f in self._files.items():
+            f.close()
+            os.replace(self.shard_path(shard) + ".tmp", self.shard_path(shard))
+        self._files.clear()
+
+    def discard(self) -> None:
+        for shard, f in self._files.items():
+            f.close()
+            os.remove(self.shard_path(shard) + ".tmp")
+        self._files.clear()
+
+
+def iter_shard(path: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Yields ``(key, pages)`` for every product stored in a JSONL shard (compressed or not).
+    """
+    with _open_decompressed(path) as raw:
+        for line in _lines(raw):
+            record = json.loads(line)
+            yield record["key"], record["pages"]
+
+
+def _lines(raw: IO[bytes], read_size: int = 1 << 16) -> Iterator[bytes]:
+    # zstandard's stream reader does not support line iteration.
+    pending = b''
+    while True:
+        block = raw.read(read_size)
+        if not block:
+            break
+        pending += block
+        *complete, pending = pending.split(b'\n')
+        yield from (line for line in complete if line)
+    if pending:
+        yield pending
+
+
+def _constant(value: str, key: str) -> str:
+    return value
+
+
+class SqliteSink(OutputSink):
+    """
+    Stores pages in a SQLite table keyed by ``(product_id, page_type)``.
+
+    Each ``write_many`` call is one transaction, so a batch of products is either fully
+    stored or not at all. Rewriting a product replaces its rows. The connection may be
+    used from a BackgroundWriter thread, but only from one thread at a time.
+    """
+    kind = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "product_id TEXT NOT NULL, page_type TEXT NOT NULL, body TEXT NOT NULL, "
+            "PRIMARY KEY (product_id, page_type)) WITHOUT ROWID")
+        self._conn.commit()
+
+    def location(self, key: str) -> str:
+        return self.path
+
+    def locator(self) -> Callable[[str], str]:
+        return functools.partial(_constant, self.path)
+
+    def write_many(self, items: List[Tuple[str, EncodedPages]]) -> None:
+        rows = [(key, name, data.decode('utf-8')) for key, encoded in items for name, data in encoded.items()]
+        with self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO pages (product_id, page_type, body) VALUES (?, ?, ?)", rows)
+
+    def read(self, key: str) -> Dict[str, Any]:
+        """Returns the stored pages of one product, keyed by page type."""
+        rows = self._conn.execute("SELECT page_type, body FROM pages WHERE product_id = ?", (key,))
+        return {name: json.loads(body) for name, body in rows}
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class BackgroundWriter(OutputSink):
+    """
+    Moves the I/O of another sink to a background thread.
+
+    Writes are queued (blocking once ``max_pending`` products are waiting) and the thread
+    hands them to the wrapped sink in batches of up to ``batch_size``. An error raised by
+    the wrapped sink is re-raised on the next write or on ``close``.
+    """
+    _STOP = object()
+
+    def __init__(self, sink: OutputSink, max_pending: int = 1024, batch_size: int = 256):
+        self.sink = sink
+        self.kind = sink.kind
+        self.encoding = sink.encoding
+        self.incremental = sink.incremental
+        self.batch_size = batch_size
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._error: Optional[BaseException] = None
+        self._discarded = False
+        self._thread = threading.Thread(target=self._drain, name="sink-writer", daemon=True)
+        self._thread.start()
+
+    def location(self, key: str) -> str:
+        return self.sink.location(key)
+
+    def locator(self) -> Callable[[str], str]:
+        return self.sink.locator()
+
+    def write_encoded(self, key: str, encoded: EncodedPages) -> str:
+        self._check()
+        self._queue.put((key, encoded))
+        return self.sink.location(key)
+
+    def write_many(self, items: List[Tuple[str, EncodedPages]]) -> None:
+        for key, encoded in items:
+            self.write_encoded(key, encoded)
+
+    def flush(self) -> None:
+        self._queue.join()
+        self._check()
+
+    def close(self) -> None:
+        self._stop()
+        self.sink.close()
+        self._check()
+
+    def discard(self) -> None:
+        # The run failed: the writes still queued are dropped, and so are the sink's errors.
+        self._discarded = True
+        self._stop()
+        self._error = None
+        self.sink.discard()
+
+    def _stop(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
+
+    def _check(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _drain(self) -> None:
+        stop = False
+        while not stop:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is self._STOP:
+                batch.pop()
+                stop = True
+            if batch and self._error is None and not self._discarded:
+                try:
+                    self.sink.write_many(batch)
+                except BaseException as e:
+                    self._error = e
+            for _ in range(len(batch) + stop):
+                self._queue.task_done()
+
+
+def open_sink(kind: str, output_dir: str, shards: int = 16, compression: Optional[str] = None,
+              compact: bool = False, backend: str = "json") -> OutputSink:
+    """
+    Builds the sink selected on the command line.
+
+    Args:
+        kind (str): "dir" (one JSON file per page), "jsonl" (compressed shards), "sqlite" or
+            "fragments" (compressed shards of deduplicated pages, see ``FragmentSink``).
+        output_dir (str): Output directory; the SQLite sink writes ``<output_dir>/pages.sqlite``.
+        shards (int): Number of shards of the JSONL and fragment sinks.
+        compression (Optional[str]): Compression of the JSONL and fragment sinks (zstd when
+            available, else gzip).
+        compact (bool): Write compact JSON instead of the sink's default layout.
+        backend (str): JSON backend, "json" or "orjson" (see ``PageEncoding``).
+
+    Raises:
+        ValueError: If the sink kind is unknown.
+    """
+    if kind == "dir":
+        sink = DirectorySink(output_dir)
+    elif kind == "jsonl":
+        sink = ShardedJsonlSink(output_dir, shards=shards, compression=compression)
+    elif kind == "sqlite":
+        sink = SqliteSink(os.path.join(output_dir, "pages.sqlite"))
+    elif kind == "fragments":
+        from .fragments import FragmentSink
+        sink = FragmentSink(output_dir, shards=shards, compression=compression)
+    else:
+        raise ValueError(f"Unknown sink '{kind}', expected one of {SINKS}")
+    if compact or backend != "json":
+        sink.encoding = sink.encoding.adjusted(compact, backend)
+    return sink
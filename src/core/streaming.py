@@ -0,0 +1,219 @@
+import itertools
+import json
+import os
+import logging
+from typing import Dict, Any, Iterator, IO, Optional
+
+from .encoding import PageEncoding, SINGLE_LINE
+from .tabular import CsvCatalog, RowError, is_tabular
+
+logger = logging.getLogger(__name__)
+
+_READ_SIZE = 1 << 16
+_WHITESPACE = ' \t\n\r'
+# Longest literal or number tail a buffer may cut, "-Infinity".
+_MAX_TOKEN = 9
+
+
+def iter_records(path: str, read_size: int = _READ_SIZE, csv_workers: int = 0) -> Iterator[Dict[str, Any]]:
+    """
+    Yields raw product records from a JSON or JSONL file without loading it whole.
+
+    The file may hold a JSON array of products, a single product object, or a
+    sequence of objects (one per line, as in JSONL). Only one record, plus the
+    current read buffer, is held in memory at a time. JSONL is decoded line by line,
+    and reading only continues past a line (or buffer) for a record cut off by its end,
+    so a malformed record is reported without reading the rest of the file. In JSONL, it
+    is yielded as a RowError, and reading resumes at the next line starting an object.
+
+    ``.csv`` and ``.tsv`` files are read through ``CsvCatalog`` instead, which yields
+    already parsed Products, and a RowError for every rejected row.
+
+    Args:
+        path (str): Path to the input file.
+        read_size (int): Number of characters read from the file per refill.
+        csv_workers (int): Threads decoding the blocks of a CSV or TSV file (0: decoded as read).
+
+    Yields:
+        Dict[str, Any]: Raw product records, in file order.
+
+    Raises:
+        ValueError: If the JSON array is invalid, once the invalid record is reached.
+    """
+    if is_tabular(path):
+        yield from CsvCatalog(path, workers=csv_workers)
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        yield from _iter_values(f, read_size)
+
+
+def _iter_values(f: IO[str], read_size: int) -> Iterator[Any]:
+    head = ''
+    while not head.lstrip(_WHITESPACE):
+        chunk = f.read(read_size)
+        if not chunk:
+            return
+        head += chunk
+    start = _skip(head, 0)
+    if head[start] == '[':
+        yield from _iter_array(f, head[start + 1:], read_size)
+    else:
+        yield from _iter_lines(f, head)
+
+
+def _iter_lines(f: IO[str], head: str) -> Iterator[Any]:
+    # JSONL, or objects spanning lines. A value is only carried over to the next line while
+    # it stops at the end of the lines read: tokens never span lines, so any other error
+    # is in the current record, which is reported as a RowError. The rest of that record is
+    # then dropped: decoding resumes at the next line starting a record with a '{' in its
+    # first column, so no value is ever decoded from the middle of an object.
+    decoder = json.JSONDecoder()
+    lines = head.splitlines(keepends=True)
+    if not lines[-1].endswith('\n'):
+        lines[-1] += f.readline()
+    pending = ''
+    skipping = False
+    first = 1
+    for number, line in enumerate(itertools.chain(lines, f), 1):
+        if skipping:
+            if not line.startswith('{'):
+                continue
+            skipping = False
+        if not pending:
+            first = number
+        text = pending + line
+        pending = ''
+        pos = _skip(text, 0)
+        while pos < len(text):
+            try:
+                value, end = decoder.raw_decode(text, pos)
+            except json.JSONDecodeError as e:
+                if e.pos >= len(text):
+                    pending = text[pos:]
+                    first += text.count('\n', 0, pos)
+                    break
+                yield RowError(first + e.lineno - 1, f"invalid JSON record, column {e.colno}: {e.msg}")
+                # A record cut off by a line starting the next one: that one is still read.
+                resync = text.find('\n{', max(e.pos, pos + 1) - 1)
+                if resync >= 0:
+                    pos = resync + 1
+                    continue
+                skipping = True
+                break
+            yield value
+            pos = _skip(text, end)
+    if pending:
+        yield RowError(first, "truncated JSON record at the end of the file")
+
+
+def _iter_array(f: IO[str], buf: str, read_size: int) -> Iterator[Any]:
+    decoder = json.JSONDecoder()
+    pos = 0
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buf, pos, eof
+        chunk = f.read(read_size)
+        if not chunk:
+            eof = True
+            return False
+        buf = buf[pos:] + chunk
+        pos = 0
+        return True
+
+    def next_char() -> str:
+        # Skips whitespace; returns the next character, or '' at the end of the file.
+        nonlocal pos
+        while True:
+            pos = _skip(buf, pos)
+            if pos < len(buf) or not fill():
+                return buf[pos:pos + 1]
+
+    if next_char() == ']':
+        pos += 1
+    else:
+        while True:
+            char = next_char()
+            if char in (']', ','):
+                raise ValueError(f"Expected a record instead of '{char}' in JSON array")
+            if not char:
+                raise ValueError("Unterminated JSON array")
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError as e:
+                    # Read on only if the record may be cut off by the end of the buffer.
+                    if not eof and _cut_off(e, buf) and fill():
+                        continue
+                    raise ValueError(f"Invalid JSON record in array: {e.msg}") from e
+                # A number at the end of the buffer may continue in the next read.
+                if end == len(buf) and not eof and not isinstance(value, (dict, list, str)):
+                    if fill():
+                        continue
+                break
+            pos = end
+            yield value
+            char = next_char()
+            if char == ']':
+                pos += 1
+                break
+            if char != ',':
+                raise ValueError("Expected ',' or ']' after a record in JSON array"
+                                 if char else "Unterminated JSON array")
+            pos += 1
+    if next_char():
+        raise ValueError("Unexpected data after JSON array")
+
+
+def _skip(text: str, pos: int) -> int:
+    while pos < len(text) and text[pos] in _WHITESPACE:
+        pos += 1
+    return pos
+
+
+def _cut_off(error: json.JSONDecodeError, buf: str) -> bool:
+    # Errors of a truncated value are raised at the end of the buffer, at the start of the
+    # string running up to it, or on the number or literal it ends with (at most 9 characters).
+    return error.pos >= len(buf) - _MAX_TOKEN or error.msg.startswith("Unterminated string")
+
+
+class JsonlPageWriter:
+    """
+    Appends rendered pages to one JSONL file per page type as they are produced.
+
+    Each line holds ``{"key": <product key>, "page": <page>}``.
+
+    Attributes:
+        encoding (PageEncoding): How pages are serialised; must be single-line.
+    """
+    def __init__(self, output_dir: str, encoding: Optional[PageEncoding] = None):
+        self.output_dir = output_dir
+        self.encoding = encoding or SINGLE_LINE
+        if self.encoding.indent is not None:
+            raise ValueError("JSONL pages cannot be indented")
+        self._files: Dict[str, IO[bytes]] = {}
+        os.makedirs(output_dir, exist_ok=True)
+
+    def write(self, key: str, pages: Dict[str, Any]) -> None:
+        self.write_encoded(key, {name: self.encoding.encode(content) for name, content in pages.items()})
+
+    def write_encoded(self, key: str, encoded: Dict[str, bytes]) -> None:
+        prefix = self.encoding.string(key).encode('utf-8')
+        for name, data in encoded.items():
+            f = self._files.get(name)
+            if f is None:
+                f = open(os.path.join(self.output_dir, f"{name}.jsonl"), 'wb')
+                self._files[name] = f
+            f.write(self.encoding.envelope((("key", prefix), ("page", data))))
+            f.write(b'\n')
+
+    def close(self) -> None:
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+    def __enter__(self) -> 'JsonlPageWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,222 @@
+import csv
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, IO, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from .models import Product, ProductBatch, PRODUCT_FIELDS
+
+TABULAR_EXTENSIONS = {".csv": ",", ".tsv": "\t"}
+
+# Normalised header (same rule as DataParserAgent) -> Product field.
+HEADER_FIELDS = {
+    "product_name": "name",
+    "concentration": "concentration",
+    "skin_type": "skin_type",
+    "key_ingredients": "key_ingredients",
+    "benefits": "benefits",
+    "how_to_use": "how_to_use",
+    "side_effects": "side_effects",
+    "price": "price",
+    "sku": "sku",
+    "id": "sku",
+}
+REQUIRED_HEADERS = ("product_name", "price", "benefits")
+
+
+class RowError(ValueError):
+    """A row that could not be turned into a product, with its line number in the file."""
+    def __init__(self, line: int, message: str):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+        self.message = message
+
+    def __reduce__(self):
+        return type(self), (self.line, self.message)
+
+
+class CsvBatch(NamedTuple):
+    """Products decoded from one block of rows, the line of each product, and the rejected rows."""
+    products: ProductBatch
+    lines: Sequence[int]
+    errors: List[RowError]
+
+
+def is_tabular(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in TABULAR_EXTENSIONS
+
+
+class HeaderMapping:
+    """
+    The header of a CSV/TSV file resolved once into Product field positions.
+
+    Attributes:
+        width (int): Number of columns every row must have.
+        columns (Tuple[Optional[int], ...]): Column index of each ``PRODUCT_FIELDS`` entry,
+            or None when the file has no such column.
+        required (Tuple[Tuple[str, int], ...]): Required fields and their column index.
+    """
+    def __init__(self, header: List[str]):
+        normalized = [name.strip().lstrip('﻿').lower().replace(" ", "_") for name in header]
+        positions = {name: index for index, name in enumerate(normalized)}
+        missing = [name for name in REQUIRED_HEADERS if name not in positions]
+        if missing:
+            raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+        by_field: Dict[str, int] = {}
+        for name, index in positions.items():
+            field = HEADER_FIELDS.get(name)
+            if field is not None and not (name == "id" and "sku" in positions):
+                by_field[field] = index
+        self.width = len(header)
+        self.columns: Tuple[Optional[int], ...] = tuple(by_field.get(field) for field in PRODUCT_FIELDS)
+        self.required = tuple((name, positions[name]) for name in REQUIRED_HEADERS)
+
+    def to_batch(self, rows: List[List[str]], transposed: Optional[List[Tuple[str, ...]]] = None) -> ProductBatch:
+        """Transposes validated rows into a ProductBatch, filling absent fields with ''."""
+        if transposed is None:
+            transposed = list(zip(*rows)) if rows else [()] * self.width
+        empty = [''] * len(rows)
+        return ProductBatch({field: list(transposed[index]) if index is not None else list(empty)
+                             for field, index in zip(PRODUCT_FIELDS, self.columns)})
+
+
+def _read_blocks(f: IO[str], block_size: int, line: int) -> Iterator[Tuple[int, str]]:
+    """
+    Yields ``(first line number, text)`` blocks of whole lines that never end inside a quoted field.
+
+    A block whose quote count is odd ends inside a quoted field (a doubled quote counts
+    twice), so it is extended line by line until the count is even again.
+    """
+    while True:
+        text = f.read(block_size)
+        if not text:
+            return
+        if not text.endswith('\n'):
+            text += f.readline()
+        quotes = text.count('"')
+        while quotes % 2:
+            extra = f.readline()
+            if not extra:
+                break
+            text += extra
+            quotes += extra.count('"')
+        yield line, text
+        line += text.count('\n')
+
+
+def _lines(text: str) -> io.StringIO:
+    # Split on '\n' only, as the line numbers are counted.
+    return io.StringIO(text, newline='\n')
+
+
+class CsvCatalog:
+    """
+    Reads products from a CSV or TSV export.
+
+    The header is resolved once per file; rows are then decoded block by block straight
+    into columnar ProductBatches, optionally on a thread pool. Rows with the wrong number
+    of fields, empty required fields or malformed quoting are reported as RowErrors with
+    their line number and do not stop the rest of the file.
+
+    Attributes:
+        path (str): The file.
+        delimiter (str): Field delimiter (tab for ``.tsv``, comma otherwise).
+        mapping (HeaderMapping): The resolved header.
+    """
+    def __init__(self, path: str, delimiter: Optional[str] = None, block_size: int = 1 << 22,
+                 workers: int = 0):
+        self.path = path
+        self.delimiter = delimiter or TABULAR_EXTENSIONS.get(os.path.splitext(path)[1].lower(), ",")
+        self.block_size = block_size
+        self.workers = workers
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            header = next(csv.reader(f, delimiter=self.delimiter), None)
+        if header is None:
+            raise ValueError(f"{path} is empty")
+        self.mapping = HeaderMapping(header)
+
+    def iter_batches(self) -> Iterator[CsvBatch]:
+        """
+        Yields the products of the file block by block, in file order.
+        """
+        with open(self.path, 'r', encoding='utf-8', newline='') as f:
+            header = csv.reader(f, delimiter=self.delimiter)
+            next(header)
+            blocks = _read_blocks(f, self.block_size, header.line_num + 1)
+            if self.workers <= 0:
+                for start, lines in blocks:
+                    yield self._decode(start, lines)
+                return
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                pending = []
+                for start, lines in blocks:
+                    pending.append(pool.submit(self._decode, start, lines))
+                    if len(pending) >= self.workers * 2:
+                        yield pending.pop(0).result()
+                for future in pending:
+                    yield future.result()
+
+    def __iter__(self) -> Iterator[Union[Product, RowError]]:
+        """
+        Yields a Product for every valid row and a RowError for every rejected one, in file order.
+        """
+        for batch in self.iter_batches():
+            errors = iter(batch.errors)
+            error = next(errors, None)
+            for line, product in zip(batch.lines, batch.products):
+                while error is not None and error.line < line:
+                    yield error
+                    error = next(errors, None)
+                yield product
+            if error is not None:
+                yield error
+            yield from errors
+
+    def _decode(self, start: int, text: str) -> CsvBatch:
+        mapping = self.mapping
+        # Fast path: one row per line, every row well formed. The checks run column-wise.
+        reader = csv.reader(_lines(text), delimiter=self.delimiter, strict=True)
+        try:
+            rows = list(reader)
+        except csv.Error:
+            rows = None
+        if (rows is not None and reader.line_num == len(rows)
+                and all(len(row) == mapping.width for row in rows)):
+            transposed = list(zip(*rows)) if rows else [()] * mapping.width
+            if not any('' in transposed[index] for _, index in mapping.required):
+                return CsvBatch(mapping.to_batch(rows, transposed), range(start, start + len(rows)), [])
+        return self._decode_rows(start, _lines(text).readlines())
+
+    def _decode_rows(self, start: int, lines: List[str]) -> CsvBatch:
+        """Row-by-row decoding that locates and reports every rejected row."""
+        mapping = self.mapping
+        width = mapping.width
+        required = mapping.required
+        rows: List[List[str]] = []
+        row_lines: List[int] = []
+        errors: List[RowError] = []
+        offset = 0
+        while offset < len(lines):
+            reader = csv.reader(lines[offset:], delimiter=self.delimiter, strict=True)
+            consumed = 0
+            try:
+                for row in reader:
+                    line = start + offset + consumed
+                    consumed = reader.line_num
+                    if not row:
+                        continue
+                    if len(row) != width:
+                        errors.append(RowError(line, f"expected {width} fields, got {len(row)}"))
+                        continue
+                    empty = [name for name, index in required if not row[index]]
+                    if empty:
+                        errors.append(RowError(line, f"empty required field(s): {', '.join(empty)}"))
+                        continue
+                    rows.append(row)
+                    row_lines.append(line)
+                break
+            except csv.Error as e:
+                # Skip the malformed line and carry on with a fresh reader.
+                errors.append(RowError(start + offset + consumed, str(e)))
+                offset += max(reader.line_num, consumed + 1)
+        return CsvBatch(mapping.to_batch(rows), row_lines, errors)
@@ -1,6 +1,288 @@
 import json
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, List, Callable, Tuple
 import re
+from .encoding import PageEncoding
+from .models import Product, PRODUCT_FIELDS
+from .schema import SCHEMA_KEYWORDS, CompiledSchema
+
+_PLACEHOLDER_RE = re.compile(r"\{\{\s*([\w\.]+)\s*\}\}")
+
+RenderFn = Callable[[Dict[str, Any]], Any]
+
+
+def _field(record: Any, name: str) -> Any:
+    """
+    Retrieve a field of a dataclass record (e.g. a Product), raising KeyError otherwise.
+    """
+    if name in getattr(type(record), '__dataclass_fields__', ()):
+        return getattr(record, name)
+    raise KeyError(name)
+
+
+def _resolve(path: Tuple[str, ...], context: Dict[str, Any]) -> Any:
+    """
+    Retrieve a value from the context using a pre-split key path.
+    """
+    current = context
+    for part in path:
+        try:
+            current = current[part] if isinstance(current, dict) else _field(current, part)
+        except KeyError:
+            return None
+    return current
+
+
+class CompiledTemplate:
+    """
+    A template turned into a reusable render plan by ``TemplateEngine.compile``.
+
+    The template is analysed once and translated into a single Python function:
+    static values become literals, each distinct placeholder is resolved once from a
+    pre-split key path, whole-value placeholders return the resolved object as-is and
+    interpolated strings are concatenated from their literal and placeholder segments.
+
+    Attributes:
+        paths (Tuple[Tuple[str, ...], ...]): Key path of every distinct placeholder,
+            e.g. ``("product", "price")``; tells which parts of the context the output depends on.
+    """
+    def __init__(self, template: Any):
+        self.template = template
+        self._paths: Dict[Tuple[str, ...], str] = {}
+        self._constants: Dict[str, Any] = {}
+        body = self._emit(template)
+        lines = ["def _render(ctx):"]
+        for path, var in self._paths.items():
+            lines += ["    try:", f"        {var} = ctx[{path[0]!r}]"]
+            for part in path[1:]:
+                lookup = f"{var}[{part!r}] if isinstance({var}, dict) else _field({var}, {part!r})"
+                if part in PRODUCT_FIELDS:
+                    # Fast path for the most common record type.
+                    lookup = f"{var}.{part} if type({var}) is _Product else ({lookup})"
+                lines.append(f"        {var} = {lookup}")
+            lines += ["    except KeyError:", f"        {var} = None"]
+        lines.append(f"    return {body}")
+        self.paths: Tuple[Tuple[str, ...], ...] = tuple(self._paths)
+        self.source = "\n".join(lines)
+        namespace = dict(self._constants, _field=_field, _Product=Product, **self._helpers())
+        exec(compile(self.source, "<template>", "exec"), namespace)
+        self._render: RenderFn = namespace["_render"]
+
+    def render(self, context: Dict[str, Any]) -> Any:
+        """
+        Render the template using the context.
+        """
+        return self._render(context)
+
+    def _helpers(self) -> Dict[str, Any]:
+        return {}
+
+    def _var(self, key: str) -> str:
+        path = tuple(key.split('.'))
+        if path not in self._paths:
+            self._paths[path] = f"_v{len(self._paths)}"
+        return self._paths[path]
+
+    def _emit(self, node: Any) -> str:
+        if isinstance(node, dict):
+            items = ", ".join(f"{self._constant(k)}: {self._emit(v)}" for k, v in node.items())
+            return "{" + items + "}"
+        if isinstance(node, list):
+            return "[" + ", ".join(self._emit(item) for item in node) + "]"
+        if isinstance(node, str):
+            return self._emit_string(node)
+        return self._constant(node)
+
+    def _constant(self, value: Any) -> str:
+        if value is None or isinstance(value, (str, bool, int, float)):
+            return repr(value)
+        name = f"_c{len(self._constants)}"
+        self._constants[name] = value
+        return name
+
+    def _emit_string(self, text: str) -> str:
+        match = _PLACEHOLDER_RE.fullmatch(text)
+        if match:
+            var = self._var(match.group(1))
+            return f"({var} if {var} is not None else {text!r})"
+
+        if not _PLACEHOLDER_RE.search(text):
+            return repr(text)
+
+        parts = []
+        pos = 0
+        for match in _PLACEHOLDER_RE.finditer(text):
+            if match.start() > pos:
+                parts.append(repr(text[pos:match.start()]))
+            var = self._var(match.group(1))
+            parts.append(f"(str({var}) if {var} is not None else {match.group(0)!r})")
+            pos = match.end()
+        if pos < len(text):
+            parts.append(repr(text[pos:]))
+        return "(" + " + ".join(parts) + ")"
+
+
+class JsonTemplate(CompiledTemplate):
+    """
+    A template compiled to render straight to serialised JSON.
+
+    The output equals ``encoding.encode(CompiledTemplate(template).render(context))``
+    without building the rendered object first: every part of the template without a
+    placeholder is encoded once, at compile time, and only placeholder values are
+    escaped or serialised per render.
+    """
+    def __init__(self, template: Any, encoding: PageEncoding):
+        self.encoding = encoding
+        super().__init__(template)
+
+    def render(self, context: Dict[str, Any]) -> bytes:
+        return self._render(context).encode('utf-8')
+
+    def _helpers(self) -> Dict[str, Any]:
+        # The encoding's functions themselves, saving a method call per placeholder.
+        return {"_dump": self.encoding._dump, "_escape": self.encoding._escape}
+
+    def _emit(self, node: Any, level: int = 0) -> str:
+        segments = self._segments(node, level)
+        merged: List[str] = []
+        literal = ""
+        for is_code, text in segments:
+            if is_code:
+                if literal:
+                    merged.append(repr(literal))
+                    literal = ""
+                merged.append(text)
+            else:
+                literal += text
+        if literal:
+            merged.append(repr(literal))
+        if len(merged) == 1:
+            return merged[0]
+        return "''.join((" + ", ".join(merged) + "))"
+
+    def _segments(self, node: Any, level: int) -> List[Tuple[bool, str]]:
+        """Splits the JSON text of ``node`` into literal (False) and code (True) segments."""
+        encoding = self.encoding
+        if not _has_placeholder(node):
+            return [(False, encoding.dumps(node, level))]
+        if isinstance(node, str):
+            return self._string_segments(node, level)
+        inner, close = encoding.newline(level + 1), encoding.newline(level)
+        separator = encoding.item_separator + inner
+        if isinstance(node, dict):
+            items = [[(False, encoding.string(str(key)) + encoding.key_separator)] + self._segments(value, level + 1)
+                     for key, value in node.items()]
+            opening, closing = "{", "}"
+        else:
+            items = [self._segments(item, level + 1) for item in node]
+            opening, closing = "[", "]"
+        segments = [(False, opening + inner)]
+        for index, item in enumerate(items):
+            if index:
+                segments.append((False, separator))
+            segments += item
+        segments.append((False, close + closing))
+        return segments
+
+    def _dump_code(self, var: str, level: int) -> str:
+        """Returns the code serialising the value of a whole-value placeholder."""
+        return f"_dump({var}, {level})"
+
+    def _string_segments(self, text: str, level: int) -> List[Tuple[bool, str]]:
+        encoding = self.encoding
+        match = _PLACEHOLDER_RE.fullmatch(text)
+        if match:
+            var = self._var(match.group(1))
+            return [(True, f"({self._dump_code(var, level)} if {var} is not None else {encoding.string(text)!r})")]
+        segments = [(False, '"')]
+        pos = 0
+        for match in _PLACEHOLDER_RE.finditer(text):
+            if match.start() > pos:
+                segments.append((False, encoding.escape(text[pos:match.start()])))
+            var = self._var(match.group(1))
+            segments.append((True, f"(_escape(str({var})) if {var} is not None "
+                                   f"else {encoding.escape(match.group(0))!r})"))
+            pos = match.end()
+        if pos < len(text):
+            segments.append((False, encoding.escape(text[pos:])))
+        segments.append((False, '"'))
+        return segments
+
+
+def _has_placeholder(node: Any) -> bool:
+    if isinstance(node, str):
+        return _PLACEHOLDER_RE.search(node) is not None
+    if isinstance(node, dict):
+        return any(_has_placeholder(value) for value in node.values())
+    if isinstance(node, list):
+        return any(_has_placeholder(item) for item in node)
+    return False
+
+
+class TemplateSchema:
+    """
+    A page schema checked against the render context of a template, without rendering it.
+
+    The template and the schema are walked together once: the parts of the template
+    without a placeholder are validated then, and so are interpolated strings, which
+    always render to strings at least as long as their literal text. Per render, only the
+    values of whole-value placeholders (e.g. ``"{{ questions }}"``) are validated, against
+    the schema of the position they fill, so pages rendered straight to JSON (see
+    ``JsonTemplate``) are validated without being rendered a second time. The violations
+    are those of the rendered page, each reported once per render.
+
+    Attributes:
+        errors (List[str]): Violations of the template itself, reported by every render.
+    """
+    def __init__(self, schema: Dict[str, Any], template: Any, root: str = "$"):
+        self.errors: List[str] = []
+        self._checks: List[Tuple[CompiledTemplate, CompiledSchema]] = []
+        self._walk(schema, template, root)
+
+    def validate(self, context: Dict[str, Any]) -> List[str]:
+        """
+        Returns every violation of the page the template renders from ``context``.
+        """
+        errors = list(self.errors)
+        for template, schema in self._checks:
+            errors += schema.validate(template.render(context))
+        return errors
+
+    def _walk(self, schema: Dict[str, Any], node: Any, path: str) -> None:
+        unknown = set(schema) - SCHEMA_KEYWORDS
+        if unknown:
+            raise ValueError(f"Unsupported schema keywords at {path}: {sorted(unknown)}")
+        if not _has_placeholder(node):
+            self.errors += CompiledSchema(schema, path).validate(node)
+            return
+        kind = schema.get("type")
+        limit = schema.get("minItems", schema.get("minLength"))
+        if isinstance(node, str):
+            if not _PLACEHOLDER_RE.fullmatch(node) and kind in (None, "string") and \
+                    len(_PLACEHOLDER_RE.sub('', node)) >= (limit or 0) and "items" not in schema:
+                return
+            self._checks.append((CompiledTemplate(node), CompiledSchema(schema, path)))
+            return
+        if isinstance(node, dict) and "items" in schema:
+            # Would iterate over the keys: left to the rendered value.
+            self._checks.append((CompiledTemplate(node), CompiledSchema(schema, path)))
+            return
+        if kind is not None and kind != ("object" if isinstance(node, dict) else "array"):
+            self.errors.append(f"{path}: expected {kind}, got {type(node).__name__}")
+            return
+        if limit is not None and len(node) < limit:
+            unit = "items" if "minItems" in schema else "characters"
+            self.errors.append(f"{path}: expected at least {int(limit)} {unit}, got {len(node)}")
+        if isinstance(node, dict):
+            for name in schema.get("required", ()):
+                if name not in node:
+                    self.errors.append(f"{path}: missing required key {name!r}")
+            for name, subschema in schema.get("properties", {}).items():
+                if name in node:
+                    self._walk(subschema, node[name], f"{path}.{name}")
+        elif "items" in schema:
+            for index, item in enumerate(node):
+                self._walk(schema["items"], item, f"{path}[{index}]")
+
 
 class TemplateEngine:
     """
@@ -10,6 +292,18 @@ class TemplateEngine:
     where fields can be populated by agents.
     """
     
+    def compile(self, template: Dict[str, Any]) -> CompiledTemplate:
+        """
+        Compile a template into a render plan that can be reused across many contexts.
+        """
+        return CompiledTemplate(template)
+
+    def compile_json(self, template: Dict[str, Any], encoding: PageEncoding) -> JsonTemplate:
+        """
+        Compile a template into a render plan producing JSON bytes in the given encoding.
+        """
+        return JsonTemplate(template, encoding)
+
     def render(self, template: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
         """
         Recursively render a dictionary template using the context.
@@ -30,7 +324,7 @@ class TemplateEngine:
         return the object directly.
         """
         # Check if text is exactly a placeholder like "{{ key }}"
-        match = re.fullmatch(r"\{\{\s*([\w\.]+)\s*\}\}", text)
+        match = _PLACEHOLDER_RE.fullmatch(text)
         if match:
             key = match.group(1)
             val = self._get_value(key, context)
@@ -42,20 +336,13 @@ class TemplateEngine:
             val = self._get_value(key, context)
             return str(val) if val is not None else match.group(0)
         
-        return re.sub(r"\{\{\s*([\w\.]+)\s*\}\}", replace, text)
+        return _PLACEHOLDER_RE.sub(replace, text)
 
     def _get_value(self, key: str, context: Dict[str, Any]) -> Any:
         """
         Retrieve value from context using dot notation (e.g. "product.name").
         """
-        parts = key.split('.')
-        current = context
-        for part in parts:
-            if isinstance(current, dict) and part in current:
-                current = current[part]
-            else:
-                return None
-        return current
+        return _resolve(tuple(key.split('.')), context)
 
 # Define Templates
 FAQ_TEMPLATE = {
@@ -86,3 +373,158 @@ COMPARISON_PAGE_TEMPLATE = {
     },
     "verdict": "{{ content_blocks.comparison_verdict }}"
 }
+
+PAGE_TEMPLATES = {
+    "faq_page": FAQ_TEMPLATE,
+    "product_page": PRODUCT_PAGE_TEMPLATE,
+    "comparison_page": COMPARISON_PAGE_TEMPLATE,
+}
+
+# French templates. The description, comparison rows and verdict are built from the
+# product and competitor fields, since the content blocks are English text.
+FAQ_TEMPLATE_FR = {
+    "page_title": "FAQ - {{ product.name }}",
+    "meta_description": "Questions fréquentes sur {{ product.name }}.",
+    "sections": [
+        {
+            "heading": "Questions courantes",
+            "q_and_a": "{{ questions }}"
+        }
+    ]
+}
+
+PRODUCT_PAGE_TEMPLATE_FR = {
+    "title": "{{ product.name }}",
+    "price": "{{ product.price }}",
+    "description": "Découvrez {{ product.name }}. Formulé avec {{ product.key_ingredients }}, il apporte : "
+                   "{{ product.benefits }}. Idéal pour les peaux {{ product.skin_type }}.",
+    "benefits_list": "{{ content_blocks.benefits }}",
+    "usage_instructions": "{{ product.how_to_use }}",
+    "ingredients_highlight": "{{ product.key_ingredients }}"
+}
+
+COMPARISON_PAGE_TEMPLATE_FR = {
+    "title": "{{ product.name }} ou {{ competitor.name }}",
+    "comparison_table": {
+        "headers": ["Caractéristique", "{{ product.name }}", "{{ competitor.name }}"],
+        "rows": [
+            ["Prix", "{{ product.price }}", "{{ competitor.price }}"],
+            ["Ingrédients clés", "{{ product.key_ingredients }}", "{{ competitor.ingredients }}"],
+            ["Bénéfices", "{{ product.benefits }}", "{{ competitor.benefits }}"]
+        ]
+    },
+    "verdict": "{{ product.name }} met en avant {{ product.key_ingredients }}, "
+               "tandis que {{ competitor.name }} mise sur {{ competitor.ingredients }}."
+}
+
+# Template set of each locale; every set renders the pages of PAGE_TEMPLATES and is
+# validated against the same schemas. Locale question banks live in ``question_bank``.
+LOCALE_TEMPLATES = {
+    "en": PAGE_TEMPLATES,
+    "fr": {
+        "faq_page": FAQ_TEMPLATE_FR,
+        "product_page": PRODUCT_PAGE_TEMPLATE_FR,
+        "comparison_page": COMPARISON_PAGE_TEMPLATE_FR,
+    },
+}
+
+# A/B copy variants: overrides of a locale's templates, by locale, variant and page.
+# Nested objects are merged key by key; any other value replaces the template's.
+COPY_VARIANTS = {
+    "en": {
+        "b": {
+            "faq_page": {
+                "page_title": "{{ product.name }}: Your Questions Answered",
+                "sections": [{"heading": "What Customers Ask", "q_and_a": "{{ questions }}"}],
+            },
+            "product_page": {"title": "Meet {{ product.name }}"},
+        },
+    },
+    "fr": {
+        "b": {
+            "faq_page": {
+                "page_title": "{{ product.name }} : vos questions, nos réponses",
+                "sections": [{"heading": "Ce que nos clients demandent", "q_and_a": "{{ questions }}"}],
+            },
+            "product_page": {"title": "Découvrez {{ product.name }}"},
+        },
+    },
+}
+
+# Page schemas, checked by the ValidationAgent (see ``schema.CompiledSchema``). They sit
+# next to the templates so that a template change and its schema change travel together.
+FAQ_PAGE_SCHEMA = {
+    "type": "object",
+    "required": ["page_title", "sections"],
+    "properties": {
+        "page_title": {"type": "string"},
+        "meta_description": {"type": "string"},
+        "sections": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "required": ["heading", "q_and_a"],
+                "properties": {
+                    "heading": {"type": "string"},
+                    "q_and_a": {
+                        "type": "array",
+                        "minItems": 5,
+                        "items": {
+                            "type": "object",
+                            "required": ["category", "question", "answer"],
+                            "properties": {
+                                "category": {"type": "string"},
+                                "question": {"type": "string", "minLength": 1},
+                                "answer": {"type": "string"},
+                            },
+                        },
+                    },
+                },
+            },
+        },
+    },
+}
+
+PRODUCT_PAGE_SCHEMA = {
+    "type": "object",
+    "required": ["title", "price", "description", "benefits_list"],
+    "properties": {
+        "title": {"type": "string"},
+        "description": {"type": "string"},
+        "benefits_list": {"type": "array", "items": {"type": "string"}},
+    },
+}
+
+COMPARISON_PAGE_SCHEMA = {
+    "type": "object",
+    "required": ["title", "comparison_table", "verdict"],
+    "properties": {
+        "title": {"type": "string"},
+        "comparison_table": {
+            "type": "object",
+            "required": ["headers", "rows"],
+            "properties": {
+                "headers": {"type": "array", "minItems": 3, "items": {"type": "string"}},
+                "rows": {"type": "array", "items": {"type": "array", "minItems": 3}},
+            },
+        },
+        "verdict": {"type": "string"},
+    },
+}
+
+PAGE_SCHEMAS = {
+    "faq_page": FAQ_PAGE_SCHEMA,
+    "product_page": PRODUCT_PAGE_SCHEMA,
+    "comparison_page": COMPARISON_PAGE_SCHEMA,
+}
+
+
+def pages_schema(names: Iterable[str]) -> Dict[str, Any]:
+    """Returns the schema of a ``pages`` artifact holding the named pages (unchecked if not in PAGE_SCHEMAS)."""
+    schemas = {name: PAGE_SCHEMAS[name] for name in names if name in PAGE_SCHEMAS}
+    return {"type": "object", "required": list(schemas), "properties": schemas}
+
+
+# Schema of the ``pages`` artifact as a whole.
+PAGES_SCHEMA = pages_schema(PAGE_SCHEMAS)
@@ -0,0 +1,175 @@
+from typing import Dict, Any, Iterable, List, NamedTuple, Optional, Tuple
+
+from .dependencies import FieldDependencies
+from .encoding import PageEncoding
+from .question_bank import QuestionBank, locale_question_bank
+from .templates import COPY_VARIANTS, LOCALE_TEMPLATES, CompiledTemplate, JsonTemplate, TemplateEngine
+
+DEFAULT_LOCALE = "en"
+DEFAULT_COPY = "default"
+
+
+class VariantSpec(NamedTuple):
+    """
+    A locale and A/B copy variant whose pages are rendered next to the default pages.
+    """
+    locale: str
+    copy: str = DEFAULT_COPY
+
+    @classmethod
+    def parse(cls, text: str) -> 'VariantSpec':
+        """
+        Parses ``LOCALE`` or ``LOCALE:VARIANT``, e.g. ``fr`` or ``en:b``.
+
+        Raises:
+            ValueError: If the locale or the copy variant is not registered.
+        """
+        locale, _, copy = text.partition(":")
+        if locale not in LOCALE_TEMPLATES:
+            raise ValueError(f"Unknown locale '{locale}', expected one of {sorted(LOCALE_TEMPLATES)}")
+        spec = cls(locale, copy or DEFAULT_COPY)
+        if spec.copy != DEFAULT_COPY and spec.copy not in COPY_VARIANTS.get(locale, {}):
+            raise ValueError(f"Unknown copy variant '{spec.copy}' for locale '{locale}', expected one of "
+                             f"{sorted(COPY_VARIANTS.get(locale, {}))}")
+        return spec
+
+    @property
+    def suffix(self) -> str:
+        return self.locale if self.copy == DEFAULT_COPY else f"{self.locale}-{self.copy}"
+
+    def page_name(self, page: str) -> str:
+        """Returns the name of a page in this variant, e.g. ``faq_page.fr-b``."""
+        return f"{page}.{self.suffix}"
+
+    def templates(self) -> Dict[str, Any]:
+        """Returns the locale's templates with the copy variant's overrides applied."""
+        templates = LOCALE_TEMPLATES[self.locale]
+        if self.copy == DEFAULT_COPY:
+            return templates
+        overrides = COPY_VARIANTS[self.locale][self.copy]
+        return {name: _merge(template, overrides.get(name, {})) for name, template in templates.items()}
+
+
+def _merge(template: Any, overrides: Any) -> Any:
+    if not (isinstance(template, dict) and isinstance(overrides, dict)):
+        return overrides
+    merged = dict(template)
+    for key, value in overrides.items():
+        merged[key] = _merge(template[key], value) if key in template else value
+    return merged
+
+
+class SharedJsonTemplate(JsonTemplate):
+    """
+    A JsonTemplate that serialises each whole-value placeholder value once per render
+    context: the templates rendered with the same context (holding a ``_encoded`` dict)
+    share the JSON text of the values they all insert, like the questions or the benefits.
+    """
+    def _helpers(self) -> Dict[str, Any]:
+        dump = self.encoding._dump
+
+        def shared(value: Any, level: int, encoded: Dict[Tuple[int, int], str]) -> str:
+            # The context keeps every value alive while it is rendered, so ids are unique.
+            key = (id(value), level)
+            text = encoded.get(key)
+            if text is None:
+                text = encoded[key] = dump(value, level)
+            return text
+        return dict(super()._helpers(), _shared=shared)
+
+    def _dump_code(self, var: str, level: int) -> str:
+        return f"_shared({var}, {level}, ctx['_encoded'])"
+
+
+class VariantRenderer:
+    """
+    Renders the pages of several variants of a product from the artifacts of one agent run.
+
+    The agents (parsing, competitor matching, content blocks) run once per product, the
+    questions are generated once per locale, and only the templates are rendered for each
+    variant, with values shared between variants serialised once (see ``SharedJsonTemplate``).
+    A variant's pages are named ``<page>.<locale>[-<variant>]`` and validated
+    against the schema of their page; only the variants of ``pages`` are rendered when given.
+
+    Attributes:
+        specs (List[VariantSpec]): The variants, in order.
+        templates (Dict[str, CompiledTemplate]): The compiled template of each variant page, by name.
+    """
+    def __init__(self, specs: Iterable[VariantSpec], engine: TemplateEngine, bank: QuestionBank,
+                 limits: Optional[Dict[str, int]], validator, pages: Optional[Iterable[str]] = None):
+        self.specs: List[VariantSpec] = list(dict.fromkeys(specs))
+        self.engine = engine
+        self.limits = limits
+        self.validator = validator
+        # The default locale uses the orchestrator's own (possibly custom) question bank.
+        self._banks = {spec.locale: bank if spec.locale == DEFAULT_LOCALE else locale_question_bank(spec.locale)
+                       for spec in self.specs}
+        self._pages: Dict[str, Tuple[VariantSpec, str]] = {}
+        self.templates: Dict[str, CompiledTemplate] = {}
+        pages = None if pages is None else set(pages)
+        for spec in self.specs:
+            for page, template in spec.templates().items():
+                if pages is not None and page not in pages:
+                    continue
+                name = spec.page_name(page)
+                self.templates[name] = engine.compile(template)
+                self._pages[name] = (spec, page)
+        self._json_templates: Dict[PageEncoding, Dict[str, JsonTemplate]] = {}
+
+    def render(self, artifacts: Dict[str, Any], names: Optional[Iterable[str]] = None,
+               encoding: Optional[PageEncoding] = None) -> Dict[str, Any]:
+        """
+        Renders and validates the variant pages (all of them, or only ``names``).
+
+        Args:
+            artifacts (Dict[str, Any]): The product's artifacts; at least those the
+                templates of the rendered pages reference.
+            names (Optional[Iterable[str]]): Variant page names to render.
+            encoding (Optional[PageEncoding]): Return the pages as JSON bytes in this encoding.
+
+        Returns:
+            Dict[str, Any]: The pages (or their encoding), keyed by variant page name.
+
+        Raises:
+            ValueError: If a page fails validation.
+        """
+        json_templates = self._compiled_json(encoding) if encoding is not None else None
+        contexts: Dict[str, Dict[str, Any]] = {}
+        encoded: Dict[Tuple[int, int], str] = {}
+        pages = {}
+        for name in (self.templates if names is None else names):
+            spec, page = self._pages[name]
+            context = contexts.get(spec.locale)
+            if context is None:
+                context = contexts[spec.locale] = dict(artifacts, questions=self._questions(spec.locale, artifacts),
+                                                       _encoded=encoded)
+            if json_templates is None:
+                pages[name] = self.validator.run_subset({page: self.templates[name].render(context)})[page]
+            else:
+                self.validator.run_templates([(page, self.templates[name].template)], context)
+                pages[name] = json_templates[name].render(context)
+        return pages
+
+    def add_dependencies(self, dependencies: FieldDependencies) -> None:
+        """
+        Adds the fields read by the question banks of other locales to the pages that use them.
+
+        ``dependencies`` must have been built with ``templates``; the ``questions`` artifact
+        is otherwise accounted for with the default locale's bank.
+        """
+        for name, template in self.templates.items():
+            spec, _ = self._pages[name]
+            if spec.locale != DEFAULT_LOCALE and any(path[0] == "questions" for path in template.paths):
+                dependencies.pages[name] |= frozenset(self._banks[spec.locale].fields)
+
+    def _questions(self, locale: str, artifacts: Dict[str, Any]) -> Any:
+        if locale == DEFAULT_LOCALE and "questions" in artifacts:
+            return artifacts["questions"]
+        return self._banks[locale].generate(artifacts["product"], self.limits)
+
+    def _compiled_json(self, encoding: PageEncoding) -> Dict[str, JsonTemplate]:
+        templates = self._json_templates.get(encoding)
+        if templates is None:
+            templates = self._json_templates[encoding] = {
+                name: SharedJsonTemplate(template.template, encoding) for name, template in self.templates.items()}
+        return templates
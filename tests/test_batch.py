@@ -0,0 +1,42 @@
+import json
+import os
+from src.core.orchestration import Orchestrator
+
+def _write_catalog(path, records):
+    with open(path, 'w') as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+def test_run_batch_isolates_failures(tmp_path):
+    catalog = tmp_path / "catalog.jsonl"
+    _write_catalog(catalog, [
+        {"Product Name": "Test Cream", "Price": "$50", "Benefits": "Moisturizing"},
+        {"Product Name": "Broken Cream"},
+        {"Product Name": "Other Serum", "Price": "$20", "Benefits": "Brightening", "SKU": "SKU-2"},
+    ])
+    output_dir = tmp_path / "out"
+
+    result = Orchestrator().run_batch(str(catalog), str(output_dir), workers=1)
+
+    assert result.total == 3
+    assert result.succeeded == 2
+    assert [f.index for f in result.failures] == [1]
+    assert "Missing required field: price" in result.failures[0].error
+    assert os.path.exists(output_dir / "test-cream-0" / "faq_page.json")
+    assert os.path.exists(output_dir / "sku-2" / "comparison_page.json")
+
+def test_run_batch_isolates_malformed_lines_and_duplicate_names(tmp_path):
+    catalog = tmp_path / "catalog.jsonl"
+    record = {"Product Name": "Test Cream", "Price": "$50", "Benefits": "Moisturizing"}
+    catalog.write_text("\n".join([json.dumps(record), '{"Product Name": Test Cream}',
+                                  json.dumps(dict(record, Price="$60"))]) + "\n")
+    output_dir = tmp_path / "out"
+
+    result = Orchestrator().run_batch(str(catalog), str(output_dir), workers=1)
+
+    assert (result.total, result.succeeded) == (3, 2)
+    assert [f.index for f in result.failures] == [1]
+    assert "line 2: invalid JSON record" in result.failures[0].error
+    prices = [json.loads((output_dir / key / "product_page.json").read_text())["price"]
+              for key in ("test-cream-0", "test-cream-2")]
+    assert prices == ["$50", "$60"]
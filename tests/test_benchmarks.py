@@ -0,0 +1,23 @@
+import sys
+import pytest
+from benchmarks.run import compare, main
+from benchmarks.synthetic import iter_products
+from src.agents.data_parser_agent import DataParserAgent
+
+def test_synthetic_catalog_is_deterministic_and_parseable():
+    first = list(iter_products(50, seed=7))
+    assert first == list(iter_products(50, seed=7))
+    assert first != list(iter_products(50, seed=8))
+    parser = DataParserAgent()
+    assert all(parser.run(record) for record in first)
+
+def test_compare_flags_regressions_beyond_threshold():
+    baseline = {"results": {"a": {"seconds_per_op": 1.0}, "b": {"seconds_per_op": 1.0}}}
+    current = {"results": {"a": {"seconds_per_op": 1.05}, "b": {"seconds_per_op": 1.5}, "c": {"seconds_per_op": 9.0}}}
+    assert compare(current, baseline, threshold=0.10) == ["b"]
+
+def test_compare_without_a_baseline_exits_with_a_message(tmp_path, monkeypatch):
+    baseline = str(tmp_path / "baseline.json")
+    monkeypatch.setattr(sys, "argv", ["run", "compare", "results.json", "--baseline", baseline])
+    with pytest.raises(SystemExit, match="No baseline at .*; run with --save-baseline first"):
+        main()
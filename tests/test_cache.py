@@ -0,0 +1,54 @@
+import json
+from src.core.cache import BuildCache
+from src.core.orchestration import Orchestrator
+from src.core.sinks import SqliteSink
+
+def test_run_batch_skips_unchanged_products(tmp_path):
+    catalog = tmp_path / "catalog.jsonl"
+    records = [{"Product Name": f"Cream {i}", "Price": "$50", "Benefits": "Moisturizing"} for i in range(3)]
+    catalog.write_text("\n".join(json.dumps(r) for r in records))
+    output_dir = str(tmp_path / "out")
+    cache = BuildCache(str(tmp_path / "cache.sqlite"))
+    orchestrator = Orchestrator()
+
+    first = orchestrator.run_batch(str(catalog), output_dir, workers=1, cache=cache)
+    assert (first.cache_hits, first.cache_misses) == (0, 3)
+
+    records[1]["Price"] = "$55"
+    catalog.write_text("\n".join(json.dumps(r) for r in records))
+    second = orchestrator.run_batch(str(catalog), output_dir, workers=1, cache=cache)
+    assert (second.cache_hits, second.cache_misses) == (2, 1)
+
+    forced = orchestrator.run_batch(str(catalog), output_dir, workers=1, cache=cache, force=True)
+    assert (forced.cache_hits, forced.cache_misses) == (0, 3)
+
+def test_build_cache_evicts_least_recently_used(tmp_path):
+    cache = BuildCache(str(tmp_path / "cache.sqlite"), max_entries=2)
+    for digest in ("a", "b", "c"):
+        (tmp_path / digest).mkdir()
+        cache.record([(digest, str(tmp_path / digest))])
+    cache.record([], ["a"])
+
+    assert cache.evict() == 1
+    assert cache.contains("a", str(tmp_path / "a"))
+    assert not cache.contains("b", str(tmp_path / "b"))
+
+def test_partial_updates_diff_each_product_of_a_shared_sink(tmp_path):
+    catalog = tmp_path / "catalog.jsonl"
+    records = [{"SKU": sku, "Product Name": "Cream", "Price": "$20", "Benefits": "Soothing", "Side Effects": effect}
+               for sku, effect in [("a", "tingling"), ("z", "redness")]]
+    catalog.write_text("\n".join(json.dumps(r) for r in records))
+    cache = BuildCache(str(tmp_path / "cache.sqlite"))
+    orchestrator = Orchestrator()
+    orchestrator.run_batch(str(catalog), str(tmp_path / "out"), workers=1, cache=cache,
+                           sink=SqliteSink(str(tmp_path / "pages.sqlite")))
+
+    # Product A now has the side effects Z was last rendered with.
+    records[0]["Side Effects"] = "redness"
+    catalog.write_text("\n".join(json.dumps(r) for r in records))
+    result = orchestrator.run_batch(str(catalog), str(tmp_path / "out"), workers=1, cache=cache,
+                                    sink=SqliteSink(str(tmp_path / "pages.sqlite")))
+
+    assert (result.cache_hits, result.cache_misses, result.partial_updates) == (1, 1, 1)
+    faq = SqliteSink(str(tmp_path / "pages.sqlite")).read("a")["faq_page"]
+    assert faq == orchestrator.generate_pages(orchestrator.parse(records[0]))["faq_page"]
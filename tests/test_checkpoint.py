@@ -0,0 +1,56 @@
+import json
+import os
+from src.core.checkpoint import BatchManifest, ShardSpec, manifest_path, merge_outputs
+from src.core.orchestration import Orchestrator
+from src.core.sinks import DirectorySink
+
+RECORDS = [{"Product Name": f"Cream {i}", "Price": "$50", "Benefits": "Moisturizing", "SKU": f"sku-{i}"}
+           for i in range(40)]
+
+def _write_catalog(path, records):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+
+class FailingSink(DirectorySink):
+    def __init__(self, root, fail_after):
+        super().__init__(root)
+        self.remaining = fail_after
+
+    def write_many(self, items):
+        self.remaining -= len(items)
+        if self.remaining < 0:
+            raise OSError("disk full")
+        super().write_many(items)
+
+def test_resume_skips_checkpointed_products(tmp_path):
+    catalog = tmp_path / "catalog.jsonl"
+    _write_catalog(catalog, RECORDS)
+    output_dir = tmp_path / "out"
+    orchestrator = Orchestrator()
+    try:
+        orchestrator.run_batch(str(catalog), str(output_dir), workers=1, chunk_size=5, checkpoint_every=10,
+                               sink=FailingSink(str(output_dir), fail_after=25))
+    except OSError:
+        pass
+    completed = BatchManifest.read(manifest_path(str(output_dir))).completed
+    assert completed and len(completed) % 10 == 0
+    assert all(os.path.exists(output_dir / location / "faq_page.json") for location in completed.values())
+
+    result = orchestrator.run_batch(str(catalog), str(output_dir), workers=1, resume=True)
+
+    assert (result.skipped, result.succeeded) == (len(completed), 40 - len(completed))
+    assert len(BatchManifest.read(manifest_path(str(output_dir))).completed) == 40
+    assert len(os.listdir(output_dir)) == 41
+
+def test_shards_partition_the_catalog_and_merge(tmp_path):
+    catalog = tmp_path / "catalog.jsonl"
+    _write_catalog(catalog, RECORDS)
+    shards = [ShardSpec.parse(f"{i}/3") for i in range(3)]
+    sources = [str(tmp_path / f"shard-{shard.index}") for shard in shards]
+    results = [Orchestrator().run_batch(str(catalog), source, workers=1, shard=shard)
+               for shard, source in zip(shards, sources)]
+    assert sum(result.succeeded for result in results) == 40
+
+    merged = merge_outputs(sources, str(tmp_path / "merged"))
+
+    assert sorted(merged.completed) == sorted(f"sku-{i}" for i in range(40))
+    assert sorted(os.listdir(tmp_path / "merged")) == sorted([".batch_manifest.jsonl"] + list(merged.completed))
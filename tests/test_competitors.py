@@ -0,0 +1,69 @@
+import pytest
+from src.agents.competitor_agent import CompetitorGenerationAgent
+from src.core.competitors import CompetitorIndex, parse_price
+from src.core.models import Product
+
+CATALOG = [
+    {"Product Name": "Retinol Night Cream", "Key Ingredients": "Retinol, Peptides", "Benefits": "Firms",
+     "Price": "₹720", "Skin Type": "Dry"},
+    {"Product Name": "Budget C Serum", "Key Ingredients": "Vitamin C", "Benefits": "Brightens",
+     "Price": "₹650", "Skin Type": "Oily"},
+    {"Product Name": "Luxury C Serum", "Key Ingredients": "Vitamin C, hyaluronic  acid", "Benefits": "Glow",
+     "Price": "₹9,999", "Skin Type": "Oily"},
+    {"Product Name": "Twin C Serum", "Key Ingredients": "Vitamin C, Hyaluronic Acid", "Benefits": "Glow",
+     "Price": "₹680", "Skin Type": "Combination"},
+    {"Product Name": "GlowBoost Vitamin C Serum", "Key Ingredients": "Vitamin C, Hyaluronic Acid",
+     "Benefits": "Brightening", "Price": "₹699", "Skin Type": "Oily"},
+]
+PRODUCT = Product(name="GlowBoost Vitamin C Serum", concentration="10%", skin_type="Oily, Combination",
+                  key_ingredients="Vitamin C, Hyaluronic Acid", benefits="Brightening", how_to_use="",
+                  side_effects="", price="₹699")
+
+@pytest.mark.parametrize("text, amount", [("₹1,299", 1299.0), ("$12.99", 12.99), ("€12,50", 12.5),
+                                          ("Rs. 450", 450.0), ("12 345 ₽", 12.0), ("free", None)])
+def test_parse_price(text, amount):
+    assert parse_price(text) == amount
+
+def test_top_k_searches_nearby_prices_for_shared_ingredients(tmp_path):
+    built = CompetitorIndex.build(CATALOG)
+    path = str(tmp_path / "competitors.kcidx")
+    built.save(path)
+    loaded = CompetitorIndex.load(path)
+
+    for index in (built, loaded):
+        names = [c.name for _, c in index.top_k(PRODUCT, k=3)]
+        # The luxury serum is far outside the price window; the product itself is skipped.
+        assert names == ["Twin C Serum", "Budget C Serum"]
+        wide = [c.name for _, c in index.top_k(PRODUCT, k=3, price_window=12)]
+        assert wide == ["Twin C Serum", "Budget C Serum", "Luxury C Serum"]
+    loaded.close()
+
+def test_agent_feeds_the_best_match_and_keeps_the_fallback():
+    competitor = CompetitorGenerationAgent(CompetitorIndex.build(CATALOG), top_k=2).run(PRODUCT)
+    assert competitor["name"] == "Twin C Serum"
+    assert [c["name"] for c in competitor["alternatives"]] == ["Budget C Serum"]
+    assert CompetitorGenerationAgent().run(PRODUCT)["name"] == "Generic Serum B"
+
+def test_build_skips_rejected_catalog_rows(tmp_path, caplog):
+    catalog = tmp_path / "competitors.csv"
+    catalog.write_text("Product Name,Key Ingredients,Benefits,Price,Skin Type\n"
+                       "Twin C Serum,Vitamin C,Glow,₹680,Oily\n"
+                       "Broken Row,Vitamin C\n"
+                       "Budget C Serum,Vitamin C,Brightens,₹650,Oily\n", encoding="utf-8")
+
+    index = CompetitorIndex.open(str(catalog))
+
+    assert [c.name for _, c in index.top_k(PRODUCT, k=3)] == ["Twin C Serum", "Budget C Serum"]
+    assert len(index) == 2
+    assert "line 3: expected 5 fields, got 2" in caplog.text
+
+def test_build_skips_records_that_are_not_objects(tmp_path, caplog):
+    catalog = tmp_path / "competitors.jsonl"
+    catalog.write_text('42\n"Twin C Serum"\n[]\n'
+                       '{"Product Name": "Budget C Serum", "Key Ingredients": "Vitamin C", "Price": "₹650"}\n',
+                       encoding="utf-8")
+
+    index = CompetitorIndex.open(str(catalog))
+
+    assert [c.name for _, c in index.top_k(PRODUCT, k=3)] == ["Budget C Serum"]
+    assert "Competitor record is not an object: 42" in caplog.text
@@ -9,9 +9,9 @@ def test_data_parser_valid_input():
         "Benefits": "Moisturizing"
     }
     result = agent.run(input_data)
-    assert result["name"] == "Test Cream"
-    assert result["price"] == "$50"
-    assert result["benefits"] == "Moisturizing"
+    assert result.name == "Test Cream"
+    assert result.price == "$50"
+    assert result.benefits == "Moisturizing"
 
 def test_data_parser_missing_field():
     agent = DataParserAgent()
@@ -20,3 +20,17 @@ def test_data_parser_missing_field():
     }
     with pytest.raises(ValueError, match="Missing required field: price"):
         agent.run(input_data)
+
+def test_data_parser_batch_is_columnar():
+    agent = DataParserAgent()
+    records = [
+        {"Product Name": "Test Cream", "Price": "$50", "Benefits": "Moisturizing"},
+        {"Product Name": "Broken Cream"},
+        {"Product Name": "Other Serum", "Price": "$20", "Benefits": "Brightening"},
+    ]
+    batch, errors = agent.run_batch(records)
+    assert len(batch) == 2
+    assert batch.column("name") == ["Test Cream", "Other Serum"]
+    assert batch[1] == agent.run(records[2])
+    assert list(batch) == [agent.run(records[0]), agent.run(records[2])]
+    assert errors == [(1, "Missing required field: price")]
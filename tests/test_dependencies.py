@@ -0,0 +1,60 @@
+import json
+import os
+from dataclasses import replace
+from src.core.cache import BuildCache
+from src.core.dependencies import changed_fields
+from src.core.orchestration import Orchestrator
+
+PRODUCT = {"Product Name": "Glow Serum", "Concentration": "10% Vitamin C", "Skin Type": "Oily",
+           "Key Ingredients": "Vitamin C", "Benefits": "Brightening", "How to Use": "Apply daily",
+           "Side Effects": "Mild tingling", "Price": "₹699"}
+
+def test_pages_depend_on_template_and_agent_fields():
+    dependencies = Orchestrator().dependencies
+    assert dependencies.affected_pages(["concentration"]) == []
+    assert dependencies.affected_pages(["side_effects"]) == ["faq_page"]
+    assert dependencies.affected_pages(["how_to_use"]) == ["faq_page", "product_page"]
+    # The built-in FAQ quotes the price.
+    assert dependencies.affected_pages(["price"]) == ["faq_page", "product_page", "comparison_page"]
+
+def test_update_pages_reruns_only_the_agents_of_affected_pages(tmp_path):
+    bank = tmp_path / "bank.json"
+    bank.write_text(json.dumps([{"category": "Usage", "question": f"Question {i}?", "answer": "{how_to_use}"}
+                                for i in range(5)]))
+    orchestrator = Orchestrator(metrics=True, question_bank=str(bank))
+    previous = orchestrator.parse(PRODUCT)
+    product = replace(previous, price="₹749")
+
+    pages = orchestrator.update_pages(previous, product)
+
+    assert changed_fields(previous, product) == ["price"]
+    assert list(pages) == ["product_page", "comparison_page"]
+    full = orchestrator.generate_pages(product)
+    assert pages == {name: full[name] for name in pages}
+    assert orchestrator.metrics.summary()["QuestionGeneratorAgent"]["count"] == 1
+
+def test_run_batch_rewrites_only_affected_pages(tmp_path):
+    catalog = tmp_path / "catalog.jsonl"
+    records = [dict(PRODUCT, SKU=f"sku-{i}") for i in range(3)]
+    catalog.write_text("\n".join(json.dumps(r) for r in records))
+    output_dir = tmp_path / "out"
+    cache = BuildCache(str(tmp_path / "cache.sqlite"))
+    orchestrator = Orchestrator()
+    orchestrator.run_batch(str(catalog), str(output_dir), workers=1, cache=cache)
+    for path in output_dir.rglob("*.json"):
+        os.utime(path, ns=(0, 0))
+
+    records[1]["Side Effects"] = "None reported"
+    records[2]["Concentration"] = "15% Vitamin C"
+    catalog.write_text("\n".join(json.dumps(r) for r in records))
+    result = orchestrator.run_batch(str(catalog), str(output_dir), workers=1, cache=cache)
+
+    assert (result.cache_hits, result.cache_misses, result.partial_updates) == (1, 2, 2)
+    rewritten = sorted(str(path.relative_to(output_dir)) for path in output_dir.rglob("*.json")
+                       if path.stat().st_mtime_ns)
+    assert rewritten == ["sku-1/faq_page.json"]
+    faq = json.loads((output_dir / "sku-1" / "faq_page.json").read_text())
+    assert faq == orchestrator.generate_pages(orchestrator.parse(records[1]))["faq_page"]
+
+    again = orchestrator.run_batch(str(catalog), str(output_dir), workers=1, cache=cache)
+    assert (again.cache_hits, again.cache_misses) == (3, 0)
@@ -0,0 +1,43 @@
+import json
+import pickle
+from src.core.encoding import INDENTED, SINGLE_LINE, PageEncoding
+from src.core.orchestration import Orchestrator
+
+PRODUCT = {"Product Name": "Glow \"Serum\"", "Concentration": "10% Vitamin C", "Skin Type": "Oily, Combination",
+           "Key Ingredients": "Vitamin C, Hyaluronic Acid", "Benefits": "Brightening", "How to Use": "Apply\tdaily",
+           "Side Effects": "Mild tingling", "Price": "₹699"}
+
+def test_encoded_pages_match_json_dumps():
+    orchestrator = Orchestrator()
+    product = orchestrator.parse(PRODUCT)
+    pages = orchestrator.generate_pages(product)
+    for encoding, options in ((INDENTED, {"indent": 2}), (SINGLE_LINE, {}),
+                              (PageEncoding(compact=True), {"separators": (",", ":")})):
+        encoded = orchestrator.generate_pages(product, encoding)
+        assert encoded == {name: json.dumps(page, **options).encode('utf-8') for name, page in pages.items()}
+
+def test_encoded_pages_are_rendered_once(monkeypatch):
+    orchestrator = Orchestrator()
+    product = orchestrator.parse(PRODUCT)
+    pages = orchestrator.generate_pages(product)
+
+    def render(*args):
+        raise AssertionError("page rendered to a dict")
+    monkeypatch.setattr(orchestrator.page_assembler, "run", render)
+    assert orchestrator.generate_pages(product, SINGLE_LINE) == {name: json.dumps(page).encode('utf-8')
+                                                                  for name, page in pages.items()}
+
+def test_encoder_matches_json_dumps_on_nested_values():
+    value = {"a": [1, 2.5, None, True, {}], "b": {"c": [], 3: "é\n"}, "d": []}
+    for indent in (2, 4):
+        assert PageEncoding(indent=indent).dumps(value) == json.dumps(value, indent=indent)
+    assert SINGLE_LINE.dumps(value) == json.dumps(value)
+
+def test_encoding_is_validated_and_picklable():
+    assert pickle.loads(pickle.dumps(INDENTED)).dumps([1]) == "[\n  1\n]"
+    for options in ({"indent": 2, "compact": True}, {"backend": "ujson"}):
+        try:
+            PageEncoding(**options)
+        except ValueError:
+            continue
+        raise AssertionError(f"{options} accepted")
@@ -0,0 +1,55 @@
+import time
+import pytest
+from src.agents.base_agent import BaseAgent
+from src.core.engine import AgentGraph, AgentNode, AgentTimeoutError, DagExecutor
+
+class SleepAgent(BaseAgent):
+    def __init__(self, inputs, output, delay=0.0, failures=0):
+        self.inputs = inputs
+        self.output = output
+        self.delay = delay
+        self.failures = failures
+
+    def run(self, *values):
+        time.sleep(self.delay)
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("flaky")
+        return f"{self.output}({', '.join(values)})"
+
+def _graph(delay=0.0, **node_options):
+    return AgentGraph([
+        AgentNode("a", SleepAgent(("product",), "a", delay), **node_options),
+        AgentNode("b", SleepAgent(("product",), "b", delay), **node_options),
+        AgentNode("c", SleepAgent(("a", "b"), "c")),
+    ])
+
+@pytest.mark.parametrize("mode", ["sequential", "thread", "asyncio"])
+def test_executor_produces_targets(mode):
+    artifacts = DagExecutor(_graph(), mode=mode).run({"product": "p"}, ["c"])
+    assert artifacts["c"] == "c(a(p), b(p))"
+
+@pytest.mark.parametrize("mode", ["thread", "asyncio"])
+def test_independent_agents_run_concurrently(mode):
+    start = time.perf_counter()
+    DagExecutor(_graph(delay=0.2), mode=mode).run({"product": "p"}, ["c"])
+    assert time.perf_counter() - start < 0.35
+
+@pytest.mark.parametrize("mode", ["sequential", "thread", "asyncio"])
+def test_failing_agent_is_retried(mode):
+    graph = AgentGraph([AgentNode("a", SleepAgent(("product",), "a", failures=1), retries=1)])
+    assert DagExecutor(graph, mode=mode).run({"product": "p"}, ["a"])["a"] == "a(p)"
+
+@pytest.mark.parametrize("mode", ["thread", "asyncio"])
+def test_slow_agent_times_out(mode):
+    graph = AgentGraph([AgentNode("a", SleepAgent(("product",), "a", delay=0.5), timeout=0.05)])
+    with pytest.raises(AgentTimeoutError):
+        DagExecutor(graph, mode=mode).run({"product": "p"}, ["a"])
+
+def test_plan_rejects_cycles():
+    graph = AgentGraph([
+        AgentNode("a", SleepAgent(("b",), "a")),
+        AgentNode("b", SleepAgent(("a",), "b")),
+    ])
+    with pytest.raises(ValueError, match="cycle"):
+        graph.plan([], ["a"])
@@ -0,0 +1,44 @@
+import json
+from src.core.encoding import SINGLE_LINE
+from src.core.fragments import FragmentShard, FragmentSink, FragmentWriter, iter_fragments
+
+INTRO = ("Answers to the questions customers ask most about this product. For skin concerns, "
+         "ask a dermatologist before use; results vary between skin types.")
+
+def _pages(i):
+    name = f"Cream {i} \"Night\" édition"
+    return {
+        "faq_page": {"title": f"FAQ - {name}", "intro": INTRO, "questions": [
+            {"question": "Is it safe for sensitive skin?", "answer": f"Yes, {name} is gentle. Patch test first."},
+            {"question": "How much does it cost?", "answer": f"It costs ${i}.00, taxes included."}]},
+        "product_page": {"name": name, "price": f"${i}.00", "rating": 4.5, "in_stock": True, "tags": ["vegan", None]},
+    }
+
+def _encoded(i):
+    return {name: SINGLE_LINE.encode(page) for name, page in _pages(i).items()}
+
+def test_pages_round_trip_byte_for_byte(tmp_path):
+    sink = FragmentSink(str(tmp_path), shards=2, compression="gzip")
+    sink.write_many([(f"sku-{i}", _encoded(i)) for i in range(20)])
+    sink.close()
+
+    shards = [FragmentShard(sink.shard_path(shard)) for shard in range(2)]
+    assert sum(len(shard) for shard in shards) == 20
+    shard = next(s for s in shards if "sku-7" in s)
+    assert shard.get("sku-7") == _pages(7)
+    assert shard.get("sku-7", "product_page") == _pages(7)["product_page"]
+    assert shard.get_encoded("sku-7") == _encoded(7)
+    read = {key: encoded for s in shards for key, encoded in iter_fragments(s.path, encoded=True)}
+    assert read == {f"sku-{i}": _encoded(i) for i in range(20)}
+
+def test_shared_text_is_stored_once(tmp_path):
+    writer = FragmentWriter(str(tmp_path / "pages.kfrag"))
+    for i in range(50):
+        writer.add(f"sku-{i}", _encoded(i))
+    writer.close()
+
+    text = (tmp_path / "pages.kfrag").read_text()
+    assert text.count("Is it safe for sensitive skin?") == 1
+    assert text.count("Patch test first.") == 1
+    assert writer.output_bytes * 1.5 < writer.input_bytes
+    assert [json.loads(line)[0] for line in text.splitlines()].count("s") == 2
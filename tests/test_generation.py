@@ -0,0 +1,84 @@
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from src.agents.content_logic_agent import ContentLogicAgent
+from src.agents.question_generator_agent import QuestionGeneratorAgent
+from src.core.generation import DRAFT_MARKER, GenerationBackend, GenerationClient, ResponseCache, StubBackend
+from src.core.models import Product
+
+PRODUCT = Product(name="GlowBoost Serum", concentration="10% Vitamin C", skin_type="Oily",
+                  key_ingredients="Vitamin C", benefits="Brightening", how_to_use="Apply 2 drops",
+                  side_effects="Mild tingling", price="$50")
+COMPETITOR = {"name": "Rival", "ingredients": "Niacinamide", "benefits": "Hydration", "price": "$40"}
+
+class RecordingBackend(StubBackend):
+    def __init__(self, **kwargs):
+        super().__init__(latency=0.01, **kwargs)
+        self.batches = []
+        self.in_flight = self.max_in_flight = 0
+        self._count = threading.Lock()
+
+    def generate(self, prompts):
+        with self._count:
+            self.batches.append(len(prompts))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            return super().generate(prompts)
+        finally:
+            with self._count:
+                self.in_flight -= 1
+
+def test_agents_use_generated_text_and_cache_it(tmp_path):
+    cache_path = str(tmp_path / "responses.sqlite")
+    client = GenerationClient(StubBackend(transform=str.upper), ResponseCache(cache_path))
+    description = ContentLogicAgent(generator=client).run(PRODUCT, COMPETITOR)["description"]
+    questions = QuestionGeneratorAgent(generator=client).run(PRODUCT)
+    client.close()
+
+    assert description == ContentLogicAgent().run(PRODUCT, COMPETITOR)["description"].upper()
+    assert [q["answer"] for q in questions] == [q["answer"].upper() for q in QuestionGeneratorAgent().run(PRODUCT)]
+
+    # A later run is served from the response cache, without reaching the (now failing) backend.
+    backend = StubBackend(failure_rate=1.0)
+    client = GenerationClient(backend, ResponseCache(cache_path), retries=0)
+    assert QuestionGeneratorAgent(generator=client).run(PRODUCT) == questions
+    assert backend.requests == 0 and client.stats["cached"] == len(questions)
+    client.close()
+
+def test_failed_requests_are_retried_then_fall_back_to_rule_based_text():
+    backend = StubBackend(failure_rate=1.0, transform=str.upper)
+    client = GenerationClient(backend, retries=2, backoff=0.0)
+
+    questions = QuestionGeneratorAgent(generator=client).run(PRODUCT)
+    client.close()
+
+    assert questions == QuestionGeneratorAgent().run(PRODUCT)
+    assert (backend.requests, client.stats["retries"]) == (3, 2)
+    assert client.stats["failed"] == len(questions)
+
+def test_concurrent_callers_share_batches_within_the_concurrency_limit():
+    backend = RecordingBackend(transform=str.upper)
+    client = GenerationClient(backend, batch_size=8, max_in_flight=2, max_wait=0.2)
+    start = threading.Barrier(8)
+
+    def ask(caller):
+        start.wait()
+        # Every caller also asks for one shared prompt, coalesced while it is pending.
+        return client.generate_many([f"caller {caller} prompt {n}{DRAFT_MARKER}text {caller}.{n}" for n in range(5)]
+                                    + [f"shared{DRAFT_MARKER}common"])
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(ask, range(8)))
+    client.close()
+
+    assert results[3] == [f"TEXT 3.{n}" for n in range(5)] + ["COMMON"]
+    assert sum(backend.batches) + client.stats["coalesced"] == 8 * 6 and max(backend.batches) <= 8
+    assert len(backend.batches) < 8 and backend.max_in_flight <= 2
+
+def test_backends_without_generate_fail_when_constructed():
+    class Partial(GenerationBackend):
+        name = "partial"
+
+    with pytest.raises(TypeError, match="abstract"):
+        Partial()
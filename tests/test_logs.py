@@ -0,0 +1,43 @@
+import io
+import json
+import logging
+from src.core.logs import SamplingFilter, event, setup_logging, stop_logging
+from src.core.orchestration import Orchestrator
+
+def _record(name, level=logging.DEBUG):
+    record = logging.LogRecord("test", level, __file__, 0, "message", (), None)
+    record.__dict__.update(event(name))
+    return record
+
+def test_sampling_keeps_a_share_of_each_event_type():
+    sampling = SamplingFilter({"agent.start": 0.1, "validation.ok": 0.0})
+
+    kept = [sum(sampling.filter(_record(name)) for _ in range(100)) for name in ("agent.start", "validation.ok", "other")]
+
+    assert kept == [10, 0, 100]
+    assert sampling.filter(_record("validation.ok", logging.ERROR))
+    assert sampling.dropped == {"agent.start": 90, "validation.ok": 100}
+
+def test_batch_run_logs_structured_failures_and_summary(tmp_path):
+    catalog = tmp_path / "catalog.jsonl"
+    records = [{"Product Name": f"Cream {i}", "Price": "$50", "Benefits": "Moisturizing"} for i in range(4)]
+    records.insert(1, {"Product Name": "Broken Cream"})
+    catalog.write_text("".join(json.dumps(r) + "\n" for r in records))
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    stream = io.StringIO()
+    try:
+        setup_logging("INFO", "json", {"batch.progress": 0.5}, stream=stream)
+        Orchestrator().run_batch(str(catalog), str(tmp_path / "out"), workers=1, chunk_size=1, checkpoint_every=1)
+        stop_logging()
+    finally:
+        root.handlers[:], root.level = handlers, level
+
+    entries = [json.loads(line) for line in stream.getvalue().splitlines()]
+    events = [entry["event"] for entry in entries]
+    assert not any("working" in entry["message"] for entry in entries)
+    failed = entries[events.index("product.failed")]
+    assert (failed["level"], failed["index"], failed["key"]) == ("ERROR", 1, "record-1")
+    assert events.count("batch.progress") == 3
+    summary = entries[events.index("run.summary")]
+    assert (summary["mode"], summary["total"], summary["succeeded"], summary["failed"]) == ("batch", 5, 4, 1)
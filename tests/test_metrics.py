@@ -0,0 +1,43 @@
+import json
+import tracemalloc
+from src.core.metrics import AgentMetrics
+from src.core.orchestration import Orchestrator
+
+def test_orchestrator_records_every_agent(tmp_path):
+    orchestrator = Orchestrator(metrics=True)
+    for i in range(5):
+        product = orchestrator.parse({"Product Name": f"Cream {i}", "Price": "$50", "Benefits": "Moisturizing"})
+        orchestrator.generate_pages(product)
+
+    summary = orchestrator.metrics.summary()
+    assert set(summary) == {"DataParserAgent", "QuestionGeneratorAgent", "CompetitorGenerationAgent",
+                            "ContentLogicAgent", "PageAssemblerAgent", "ValidationAgent"}
+    assert all(stats["count"] == 5 for stats in summary.values())
+    assert summary["QuestionGeneratorAgent"]["output_size"]["p50"] > 0
+
+    paths = orchestrator.metrics.export(str(tmp_path))
+    assert json.load(open(paths["json"]))["ValidationAgent"]["count"] == 5
+    prom = open(paths["prometheus"]).read()
+    assert 'kasparro_agent_wall_seconds{agent="ValidationAgent",quantile="0.99"}' in prom
+    assert 'kasparro_agent_cpu_seconds_count{agent="ValidationAgent"} 5' in prom
+
+def test_metrics_survive_drain_and_absorb():
+    worker = AgentMetrics()
+    worker.add("A", (1.0, 0.5, 0, 10, 20))
+    worker.add("A", (3.0, 1.5, 0, 10, 20))
+    parent = AgentMetrics()
+    parent.absorb(worker.drain())
+
+    assert worker.summary() == {}
+    assert parent.summary()["A"]["wall_seconds"]["sum"] == 4.0
+
+def test_peak_alloc_excludes_memory_live_before_the_call():
+    tracing = tracemalloc.is_tracing()
+    metrics = AgentMetrics(trace_memory=True)
+    try:
+        live = bytearray(8 << 20)
+        metrics.measure("A", lambda n: len(bytearray(n)), 1 << 20, None)
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+    assert live and (1 << 20) <= metrics.summary()["A"]["peak_alloc_bytes"]["sum"] < (2 << 20)
@@ -0,0 +1,55 @@
+import json
+import os
+import time
+from src.core.orchestration import Orchestrator
+from src.core.pipeline import Stage, StagedPipeline
+
+def test_slow_stage_throttles_the_input():
+    read = []
+
+    def items():
+        for i in range(40):
+            read.append(i)
+            yield i, i
+
+    def slow(value):
+        time.sleep(0.002)
+        return value
+
+    def check(value):
+        if value == 3:
+            raise ValueError("three")
+        return value * 10
+
+    pipeline = StagedPipeline([Stage("check", check), Stage("slow", slow)], queue_size=2)
+    ahead = []
+    outcomes = []
+    for index, value, error in pipeline.run(items()):
+        ahead.append(len(read) - len(outcomes))
+        outcomes.append((index, value, error))
+
+    assert sorted(index for index, _, _ in outcomes) == list(range(40))
+    assert [o for o in outcomes if o[2]] == [(3, 3, "ValueError: three")]
+    # Three queues of two, plus one item in each stage and one being read.
+    assert max(ahead) <= 3 * 2 + 3
+    stats = pipeline.stats()
+    assert (stats["check"]["items"], stats["check"]["errors"]) == (40, 1)
+    assert stats["slow"]["items"] == 40 and stats["slow"]["queue_depth_max"] <= 2
+
+def test_run_pipeline_matches_batch_output(tmp_path):
+    catalog = tmp_path / "catalog.jsonl"
+    records = [{"Product Name": f"Cream {i}", "Price": "$50", "Benefits": "Moisturizing"} for i in range(5)]
+    records.insert(2, {"Product Name": "Broken Cream"})
+    catalog.write_text("".join(json.dumps(r) + "\n" for r in records))
+    orchestrator = Orchestrator()
+
+    result = orchestrator.run_pipeline(str(catalog), str(tmp_path / "pipeline"),
+                                       stage_workers={"generate": 2, "write": 2})
+    orchestrator.run_batch(str(catalog), str(tmp_path / "batch"), workers=1)
+
+    assert (result.total, result.succeeded, [f.index for f in result.failures]) == (6, 5, [2])
+    assert set(result.stages) == {"parse", "generate", "assemble", "validate", "write"}
+    for key in os.listdir(tmp_path / "pipeline"):
+        for page in os.listdir(tmp_path / "pipeline" / key):
+            assert ((tmp_path / "pipeline" / key / page).read_bytes()
+                    == (tmp_path / "batch" / key / page).read_bytes())
@@ -0,0 +1,37 @@
+import pytest
+from src.core.models import Product, ProductBatch
+from src.core.question_bank import QuestionBank, DEFAULT_QUESTION_BANK
+
+def _product(**overrides):
+    values = dict(name="Test Cream", concentration="", skin_type="Dry", key_ingredients="Retinol",
+                  benefits="Smooths", how_to_use="Apply nightly", side_effects="", price="$50")
+    values.update(overrides)
+    return Product(**values)
+
+BANK = QuestionBank.from_dicts([
+    {"category": "Usage", "question": "How do I use {name}?", "answer": "{how_to_use}."},
+    {"category": "Usage", "question": "Can I layer it?", "answer": "Yes, {name} layers well."},
+    {"category": "Safety", "question": "Any side effects?", "answer": "{side_effects}", "requires": ["side_effects"]},
+    {"category": "Ingredients", "question": "Has it retinol?", "answer": "Yes.", "contains": {"key_ingredients": "RETINOL"}},
+])
+
+def test_bank_renders_templates_and_predicates():
+    questions = BANK.generate(_product())
+    assert [q["question"] for q in questions] == ["How do I use Test Cream?", "Can I layer it?", "Has it retinol?"]
+    assert questions[0]["answer"] == "Apply nightly."
+    assert len(BANK.generate(_product(side_effects="Tingling", key_ingredients="Niacinamide"))) == 3
+    assert BANK.fields == ("name", "key_ingredients", "how_to_use", "side_effects")
+
+def test_bank_applies_category_limits():
+    questions = BANK.generate(_product(), limits={"Usage": 1})
+    assert [q["category"] for q in questions] == ["Usage", "Ingredients"]
+
+def test_batch_generation_matches_single_and_shares_static_strings():
+    products = [_product(name=f"Cream {i}", side_effects="Tingling" * (i % 2)) for i in range(4)]
+    batch = DEFAULT_QUESTION_BANK.generate_batch(ProductBatch.from_products(products))
+    assert batch == [DEFAULT_QUESTION_BANK.generate(p) for p in products]
+    assert batch[0][1]["question"] is batch[3][1]["question"]
+
+def test_bank_rejects_unknown_fields():
+    with pytest.raises(ValueError, match="Unknown product field 'colour'"):
+        QuestionBank.from_dicts([{"category": "X", "question": "{colour}?", "answer": "-"}])
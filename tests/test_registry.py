@@ -0,0 +1,63 @@
+import importlib.metadata
+import os
+import subprocess
+import sys
+from src.agents.base_agent import BaseAgent
+from src.core.orchestration import Orchestrator
+from src.core.registry import AGENTS, PAGES, Registry
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PRODUCT = {"Product Name": "GlowBoost Serum", "Price": "$50", "Concentration": "10% Vitamin C",
+           "Skin Type": "Oily", "Key Ingredients": "Vitamin C", "Benefits": "Brightening",
+           "How to Use": "Apply 2 drops", "Side Effects": "Mild tingling"}
+
+class HouseBrandAgent(BaseAgent):
+    inputs = ("product",)
+    output = "competitor"
+
+    def run(self, product):
+        return {"name": "House Brand", "ingredients": "Glycerin", "benefits": "Hydration", "price": "$10"}
+
+def test_plugins_are_discovered_from_entry_points_when_looked_up(monkeypatch):
+    entry = importlib.metadata.EntryPoint("house_brand", f"{__name__}:HouseBrandAgent", "kasparro.test_agents")
+    calls = []
+    monkeypatch.setattr(importlib.metadata, "entry_points",
+                        lambda group: calls.append(group) or ([entry] if group == entry.group else []))
+    registry = Registry("kasparro.test_agents", {"validator": "..agents.validation_agent:ValidationAgent"})
+
+    assert "validator" in registry and calls == []
+    assert registry["validator"].__name__ == "ValidationAgent" and calls == []
+    assert registry["house_brand"] is HouseBrandAgent
+    assert list(registry) == ["validator", "house_brand"] and calls == ["kasparro.test_agents"]
+    assert registry.get("missing") is None
+
+def test_only_the_agents_of_the_selected_pages_are_constructed():
+    orchestrator = Orchestrator(pages=["faq_page"])
+    product = orchestrator.parse(PRODUCT)
+
+    pages = orchestrator.generate_pages(product)
+
+    assert pages == {"faq_page": Orchestrator().generate_pages(product)["faq_page"]}
+    assert sorted(orchestrator.graph.nodes) == ["DataParserAgent", "PageAssemblerAgent", "QuestionGeneratorAgent",
+                                                "ValidationAgent"]
+    assert "competitor_generator" not in orchestrator._agents and "content_logic" not in orchestrator._agents
+    assert "faq_page" in PAGES and "missing_page" not in PAGES
+
+def test_plugin_agents_replace_the_builtin_producing_their_artifact():
+    AGENTS.register("house_brand", HouseBrandAgent)
+    orchestrator = Orchestrator(agents=["house_brand"])
+
+    pages = orchestrator.generate_pages(orchestrator.parse(PRODUCT))
+
+    assert pages["comparison_page"]["title"] == "GlowBoost Serum vs House Brand"
+    assert "CompetitorGenerationAgent" not in orchestrator.graph.nodes
+    assert orchestrator.fingerprint != Orchestrator().fingerprint
+
+def test_help_imports_no_pipeline_module():
+    code = ("import runpy, sys\nsys.argv = ['main.py', '--help']\n"
+            "try:\n    runpy.run_path('main.py', run_name='__main__')\nexcept SystemExit:\n    pass\n"
+            "print(sorted(name for name in sys.modules if name.startswith('src.')), file=sys.stderr)")
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+
+    assert "--page NAME" in result.stdout
+    assert result.stderr.strip() == "['src.core', 'src.core.registry']"
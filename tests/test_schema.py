@@ -0,0 +1,55 @@
+import json
+from src.agents.validation_agent import ValidationAgent
+from src.core.orchestration import Orchestrator
+from src.core.schema import CompiledSchema
+from src.core.templates import (COMPARISON_PAGE_TEMPLATE, FAQ_TEMPLATE, PAGE_SCHEMAS, PRODUCT_PAGE_TEMPLATE,
+                                TemplateEngine, TemplateSchema)
+
+def _pages():
+    orchestrator = Orchestrator()
+    with open("data/input_product.json") as f:
+        return orchestrator.generate_pages(orchestrator.parse(json.load(f)))
+
+def test_validation_collects_every_violation():
+    pages = _pages()
+    pages["faq_page"]["sections"][0]["q_and_a"] = [{"category": "Usage", "question": "", "answer": 3}]
+    del pages["product_page"]["price"]
+    del pages["comparison_page"]
+
+    assert ValidationAgent().schema.validate(pages) == [
+        "pages: missing required key 'comparison_page'",
+        "pages.faq_page.sections[0].q_and_a: expected at least 5 items, got 1",
+        "pages.faq_page.sections[0].q_and_a[0].question: expected at least 1 characters, got 0",
+        "pages.faq_page.sections[0].q_and_a[0].answer: expected string, got int",
+        "pages.product_page: missing required key 'price'",
+    ]
+
+def test_batch_validation_reports_failing_products():
+    good, bad = _pages(), _pages()
+    bad["product_page"]["benefits_list"] = "Brightening"
+    report = ValidationAgent().run_batch([good, bad, good], keys=["a", "b", "c"])
+    assert report.checked == 3
+    assert report.failures == {"b": ["pages.product_page.benefits_list: expected array, got str"]}
+    assert not report.ok
+
+def test_titles_of_a_product_without_a_name_are_valid():
+    pages = _pages()
+    pages["faq_page"]["page_title"] = pages["product_page"]["title"] = pages["comparison_page"]["title"] = ""
+    assert ValidationAgent().schema.validate(pages) == []
+
+def test_template_schema_reports_the_violations_of_the_rendered_page():
+    question = {"category": "Usage", "question": "How?", "answer": "Daily."}
+    good = {"product": {"name": "Glow", "price": "$5"}, "competitor": {"name": "Dull"}, "questions": [question] * 5,
+            "content_blocks": {"description": "Bright.", "benefits": ["Glow"], "comparison_verdict": "Glow.",
+                               "comparison_rows": [["Price", "$5", "$6"]]}}
+    broken = {"product": {"name": ""}, "questions": [dict(question, question="", answer=3)],
+              "content_blocks": {"benefits": "Glow", "comparison_rows": [["Price"]], "comparison_verdict": None}}
+    engine = TemplateEngine()
+    for name, template in (("faq_page", FAQ_TEMPLATE), ("product_page", PRODUCT_PAGE_TEMPLATE),
+                           ("comparison_page", COMPARISON_PAGE_TEMPLATE)):
+        checker = TemplateSchema(PAGE_SCHEMAS[name], template, f"pages.{name}")
+        schema = CompiledSchema(PAGE_SCHEMAS[name], f"pages.{name}")
+        assert checker.validate(good) == []
+        for context in (broken, {}):
+            expected = schema.validate(engine.compile(template).render(context))
+            assert expected and sorted(checker.validate(context)) == sorted(expected)
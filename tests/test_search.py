@@ -0,0 +1,48 @@
+import json
+import pytest
+from src.core.orchestration import Orchestrator
+from src.core.search import IndexingSink, PageIndex, SearchHit, quote
+from src.core.sinks import SqliteSink
+
+def _faq(*answers):
+    return {"sections": [{"q_and_a": [{"question": "Any side effects?", "answer": answer} for answer in answers]}]}
+
+def test_updates_replace_only_the_given_pages(tmp_path):
+    index = PageIndex(str(tmp_path / "index.sqlite"))
+    index.update([("cream", {"faq_page": _faq("Mild tingling."), "product_page": {"title": "Night Crème"}}),
+                  ("serum", {"faq_page": _faq("Mild tingling."), "comparison_page": {"verdict": "Cheaper"}})])
+
+    assert index.search("tingling") == [SearchHit("cream", "faq_page", "answer", "Mild [tingling]."),
+                                        SearchHit("serum", "faq_page", "answer", "Mild [tingling].")]
+    assert index.products("creme") == ["cream"]
+    assert index.products("tingling", field="question") == []
+
+    index.update([("cream", {"faq_page.fr": _faq("Léger picotement."), "faq_page": _faq("None known.")})])
+
+    assert index.products("tingling") == ["serum"]
+    assert index.products("picotement", page="faq_page.fr") == ["cream"]
+    assert index.products("night") == ["cream"] and len(index) == 2
+    assert index.prune() == 0
+    index.remove("serum")
+    assert index.prune() == 2 and index.products("tingling") == [] and len(index) == 1
+    with pytest.raises(ValueError, match="quote"):
+        index.search("2-3 drops")
+    assert index.search(quote("2-3 drops")) == []
+    index.close()
+
+def test_batch_runs_write_and_index_the_pages(tmp_path):
+    catalog = tmp_path / "catalog.jsonl"
+    catalog.write_text("\n".join(json.dumps({"Product Name": name, "Price": "$20", "Benefits": "Brightening",
+                                             "Side Effects": effect})
+                                 for name, effect in [("Day Cream", "Mild tingling"), ("Night Serum", "None")]))
+    index = PageIndex(str(tmp_path / "index.sqlite"))
+    sink = IndexingSink(SqliteSink(str(tmp_path / "pages.sqlite")), index)
+
+    result = Orchestrator().run_batch(str(catalog), str(tmp_path / "out"), workers=2, sink=sink)
+
+    assert result.succeeded == 2
+    index = PageIndex(str(tmp_path / "index.sqlite"))
+    assert index.products("tingling") == ["day-cream-0"]
+    assert {hit.page for hit in index.search("brightening")} >= {"product_page"}
+    assert len(index) == 2
+    index.close()
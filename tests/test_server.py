@@ -0,0 +1,98 @@
+import http.client
+import json
+import socket
+import threading
+import time
+from src.core.orchestration import Orchestrator
+from src.core.server import RenderService, make_server
+
+PRODUCT = {"Product Name": "Glow Serum", "Price": "₹699", "Benefits": "Brightening",
+           "Key Ingredients": "Vitamin C", "Skin Type": "Oily"}
+
+class SlowOrchestrator(Orchestrator):
+    def __init__(self):
+        super().__init__()
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.renders = 0
+
+    def generate_pages(self, product_model, encoding=None):
+        self.renders += 1
+        self.started.set()
+        self.release.wait(5)
+        return super().generate_pages(product_model, encoding)
+
+def test_identical_concurrent_requests_render_once():
+    orchestrator = SlowOrchestrator()
+    service = RenderService(orchestrator)
+    product = service.parse(json.dumps(PRODUCT).encode())
+    outcomes = []
+    threads = [threading.Thread(target=lambda: outcomes.append(service.render(product))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    orchestrator.started.wait(5)
+    time.sleep(0.5)  # let the other requests reach the in-flight render
+    orchestrator.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert orchestrator.renders == 1
+    assert sorted(outcome for _, outcome in outcomes) == ["coalesced"] * 3 + ["miss"]
+    assert len({body for body, _ in outcomes}) == 1
+    assert service.render(product)[1] == "hit"
+
+def test_lru_evicts_least_recently_used():
+    service = RenderService(Orchestrator(), cache_size=2)
+    a, b, c = (service.parse(json.dumps(dict(PRODUCT, **{"Product Name": name})).encode()) for name in "abc")
+    service.render(a)
+    service.render(b)
+    service.render(a)
+    service.render(c)
+    assert service.render(a)[1] == "hit"
+    assert service.render(b)[1] == "miss"
+
+def test_http_api_over_unix_socket(tmp_path):
+    path = str(tmp_path / "render.sock")
+    server = make_server(RenderService(Orchestrator()), socket_path=path)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def request(method, url, body=None):
+        conn = http.client.HTTPConnection("localhost")
+        conn.sock = socket.socket(socket.AF_UNIX)
+        conn.sock.connect(path)
+        conn.request(method, url, body)
+        response = conn.getresponse()
+        return response.status, response.read()
+
+    try:
+        status, body = request("POST", "/render", json.dumps(PRODUCT))
+        assert status == 200
+        assert set(json.loads(body)["pages"]) == {"faq_page", "product_page", "comparison_page"}
+        assert request("POST", "/render", "[1]")[0] == 400
+        assert json.loads(request("GET", "/healthz")[1])["cache_entries"] == 1
+        assert b'kasparro_serve_requests_total{outcome="error"} 1' in request("GET", "/metrics")[1]
+        assert request("GET", "/nope")[0] == 404
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_http_api_rejects_missing_invalid_and_oversized_lengths():
+    server = make_server(RenderService(Orchestrator()), port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def post(headers, body=b"{}"):
+        with socket.create_connection(server.server_address, timeout=5) as sock:
+            sock.sendall(b"POST /render HTTP/1.1\r\nHost: localhost\r\n" + headers + b"\r\n" + body)
+            response = http.client.HTTPResponse(sock)
+            response.begin()
+            return response.status, response.getheader("Connection")
+
+    try:
+        assert post(b"") == (411, "close")
+        assert post(b"Content-Length: two\r\n") == (400, "close")
+        assert post(b"Content-Length: -1\r\n") == (400, "close")
+        assert post(b"Content-Length: %d\r\n" % (2 << 20)) == (413, "close")
+    finally:
+        server.shutdown()
+        server.server_close()
+
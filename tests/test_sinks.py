@@ -0,0 +1,97 @@
+import json
+import pickle
+import pytest
+from src.core.sinks import BackgroundWriter, DirectorySink, OutputSink, ShardedJsonlSink, SqliteSink, iter_shard
+
+PAGES = {f"p{i}": {"faq_page": {"title": f"FAQ {i}", "faqs": [i]}, "product_page": {"name": "Crème"}}
+         for i in range(50)}
+
+def test_directory_sink_keeps_the_original_layout(tmp_path):
+    with BackgroundWriter(DirectorySink(str(tmp_path))) as sink:
+        for key, pages in PAGES.items():
+            sink.write(key, pages)
+
+    path = tmp_path / "p7" / "faq_page.json"
+    assert path.read_text() == json.dumps(PAGES["p7"]["faq_page"], indent=2)
+    assert not list(tmp_path.rglob("*.tmp*"))
+
+@pytest.mark.parametrize("compression", ["gzip", "none"])
+def test_sharded_jsonl_sink_round_trips(tmp_path, compression):
+    sink = ShardedJsonlSink(str(tmp_path), shards=4, compression=compression)
+    with BackgroundWriter(sink, batch_size=7) as writer:
+        for key, pages in PAGES.items():
+            assert writer.write(key, pages) == sink.location(key)
+
+    read = {}
+    for shard in range(4):
+        read.update(iter_shard(sink.shard_path(shard)))
+    assert read == PAGES
+
+def test_sqlite_sink_replaces_rewritten_products(tmp_path):
+    path = str(tmp_path / "pages.sqlite")
+    with BackgroundWriter(SqliteSink(path)) as sink:
+        for key, pages in PAGES.items():
+            sink.write(key, pages)
+        sink.write("p3", {"faq_page": {"title": "new"}})
+
+    sink = SqliteSink(path)
+    assert sink.read("p3") == {"faq_page": {"title": "new"}, "product_page": {"name": "Crème"}}
+    assert sink.read("p4") == PAGES["p4"]
+    sink.close()
+
+def test_background_writer_reraises_sink_errors():
+    class Broken(OutputSink):
+        def location(self, key):
+            return key
+
+        def locator(self):
+            return str
+
+        def write_many(self, items):
+            raise OSError("disk full")
+
+    writer = BackgroundWriter(Broken())
+    writer.write("a", {"faq_page": {}})
+    with pytest.raises(OSError, match="disk full"):
+        writer.close()
+
+def test_incomplete_sinks_fail_when_constructed(tmp_path):
+    from src.core.fragments import FragmentSink
+
+    class Partial(OutputSink):
+        def write_many(self, items):
+            pass
+
+    with pytest.raises(TypeError, match="abstract"):
+        Partial()
+    for sink in (ShardedJsonlSink(str(tmp_path), shards=3), FragmentSink(str(tmp_path), shards=3)):
+        locate = pickle.loads(pickle.dumps(sink.locator()))
+        assert all(locate(key) == sink.location(key) for key in PAGES)
+
+@pytest.mark.parametrize("kind", ["jsonl", "fragments"])
+@pytest.mark.parametrize("mode", ["batch", "pipeline"])
+def test_interrupted_run_keeps_the_published_shards(tmp_path, kind, mode):
+    from src.core.orchestration import Orchestrator
+    from src.core.sinks import open_sink
+    records = [{"Product Name": f"Cream {i}", "Price": "$5", "Benefits": "Soft", "SKU": f"c-{i}"} for i in range(8)]
+    catalog = tmp_path / "catalog.json"
+    output = tmp_path / "out"
+
+    def shards():
+        return {path.name: path.read_bytes() for path in output.iterdir() if path.name.startswith(("pages-", "fragments-"))}
+
+    def run():
+        sink = open_sink(kind, str(output), shards=2, compression="gzip")
+        if mode == "batch":
+            return Orchestrator().run_batch(str(catalog), str(output), workers=1, chunk_size=2, sink=sink)
+        return Orchestrator().run_pipeline(str(catalog), str(output), sink=sink)
+
+    catalog.write_text(json.dumps(records), encoding="utf-8")
+    run()
+    published = shards()
+    assert len(published) == 2
+    catalog.write_text(json.dumps(records)[:-200] + "}, {]", encoding="utf-8")
+    with pytest.raises(ValueError, match="in array"):
+        run()
+    assert shards() == published
+    assert not [path for path in output.iterdir() if path.name.endswith(".tmp")]
@@ -0,0 +1,65 @@
+import json
+import pytest
+from src.core.streaming import iter_records
+from src.core.tabular import RowError
+
+RECORDS = [{"Product Name": f"Cream {i}", "Price": "₹" + "9" * i, "Rating": i * 1.5} for i in range(20)]
+
+@pytest.mark.parametrize("layout", ["array", "jsonl", "single"])
+def test_iter_records_reads_incrementally(tmp_path, layout):
+    path = tmp_path / "catalog.json"
+    if layout == "array":
+        path.write_text(json.dumps(RECORDS, indent=2, ensure_ascii=False), encoding="utf-8")
+        expected = RECORDS
+    elif layout == "jsonl":
+        path.write_text("\n".join(json.dumps(r) for r in RECORDS) + "\n", encoding="utf-8")
+        expected = RECORDS
+    else:
+        path.write_text(json.dumps(RECORDS[3], indent=2), encoding="utf-8")
+        expected = [RECORDS[3]]
+
+    assert list(iter_records(str(path), read_size=7)) == expected
+
+def test_iter_records_rejects_truncated_array(tmp_path):
+    path = tmp_path / "catalog.json"
+    path.write_text(json.dumps(RECORDS)[:-1], encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(iter_records(str(path), read_size=7))
+
+@pytest.mark.parametrize("layout", ["array", "jsonl"])
+def test_iter_records_reports_a_malformed_record_before_reading_on(tmp_path, layout):
+    path = tmp_path / "catalog.json"
+    lines = [json.dumps(RECORDS[0]), '{"Product Name": Cream}'] + [json.dumps(RECORDS[1])] * 20000
+    text = "[" + ",".join(lines) if layout == "array" else "\n".join(lines)
+    # Reading on to the undecodable end of the file would raise a UnicodeDecodeError.
+    path.write_bytes(text.encode("utf-8") + b"\xff")
+
+    records = iter_records(str(path))
+    assert next(records) == RECORDS[0]
+    if layout == "jsonl":
+        # The line is reported, and the next one is read.
+        error = next(records)
+        assert isinstance(error, RowError) and error.line == 2 and "column 18" in error.message
+        assert next(records) == RECORDS[1]
+    else:
+        with pytest.raises(ValueError, match="in array"):
+            next(records)
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_iter_records_drops_the_rest_of_a_malformed_multiline_record(tmp_path, indent):
+    path = tmp_path / "catalog.jsonl"
+    broken = '{\n  "Product Name": "Cream",\n  "Price": "$5"\n  "Benefits": "Soft",\n  "Tags": {"a": 1}\n}'
+    text = "\n".join(json.dumps(r, indent=indent) for r in RECORDS[:2])
+    path.write_text(json.dumps(RECORDS[0], indent=indent) + "\n" + broken + "\n" + text + "\n", encoding="utf-8")
+
+    records = list(iter_records(str(path), read_size=7))
+    first = len(json.dumps(RECORDS[0], indent=indent).splitlines())
+    assert records[0] == RECORDS[0] and records[2:] == RECORDS[:2]
+    assert isinstance(records[1], RowError) and records[1].line == first + 4
+
+@pytest.mark.parametrize("text", ["[{}, ]", "[{} {}]", "[{},, {}]", "[, {}]"])
+def test_iter_records_rejects_misplaced_commas(tmp_path, text):
+    path = tmp_path / "catalog.json"
+    path.write_text(text, encoding="utf-8")
+    with pytest.raises(ValueError, match="JSON array"):
+        list(iter_records(str(path), read_size=2))
@@ -0,0 +1,55 @@
+import pickle
+import pytest
+from src.core.models import Product
+from src.core.tabular import CsvCatalog, RowError
+
+CSV = (
+    'Product Name,Price,Benefits,Skin Type,SKU\n'
+    'Cream A,$10,Hydrates,Dry,a-1\n'
+    'Cream B,$12\n'
+    '"Cream ""C""",$14,"Smooths,\nfirms",Oily,c-3\n'
+    'Cream D,,Calms,All,d-4\n'
+    'Cream E,$9,Softens,Normal,e-5\n'
+)
+
+@pytest.mark.parametrize("block_size", [8, 1 << 20])
+@pytest.mark.parametrize("workers", [0, 2])
+def test_csv_rows_become_products_and_line_numbered_errors(tmp_path, block_size, workers):
+    path = tmp_path / "catalog.csv"
+    path.write_text(CSV, encoding="utf-8")
+    items = list(CsvCatalog(str(path), block_size=block_size, workers=workers))
+
+    assert [type(item) for item in items] == [Product, RowError, Product, RowError, Product]
+    assert items[0] == Product(name="Cream A", concentration="", skin_type="Dry", key_ingredients="",
+                               benefits="Hydrates", how_to_use="", side_effects="", price="$10", sku="a-1")
+    assert items[2].name == 'Cream "C"' and items[2].benefits == "Smooths,\nfirms"
+    assert str(items[1]) == "line 3: expected 5 fields, got 2"
+    assert str(items[3]) == "line 6: empty required field(s): price"
+    assert pickle.loads(pickle.dumps(items[3])).line == 6
+
+def test_tsv_header_is_checked_once(tmp_path):
+    path = tmp_path / "catalog.tsv"
+    path.write_text("Product Name\tBenefits\nCream\tSoft\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="Missing required column\\(s\\): price"):
+        CsvCatalog(str(path))
+
+def test_csv_workers_reach_the_catalog(tmp_path, monkeypatch):
+    from src.core import streaming
+    from src.core.orchestration import Orchestrator
+    path = tmp_path / "catalog.csv"
+    path.write_text(CSV, encoding="utf-8")
+    catalogs = []
+
+    class Catalog(CsvCatalog):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            catalogs.append(self)
+    monkeypatch.setattr(streaming, "CsvCatalog", Catalog)
+    outputs = []
+    for workers in (0, 2):
+        output = tmp_path / f"out-{workers}"
+        result = Orchestrator(csv_workers=workers).run_stream(str(path), str(output))
+        assert (result.succeeded, len(result.failures)) == (3, 2)
+        outputs.append(sorted((p.name, p.read_bytes()) for p in output.iterdir()))
+    assert [catalog.workers for catalog in catalogs] == [0, 2]
+    assert outputs[0] == outputs[1]
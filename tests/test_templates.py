@@ -0,0 +1,23 @@
+from src.core.templates import TemplateEngine, COMPARISON_PAGE_TEMPLATE
+
+CONTEXT = {
+    "product": {"name": "Test Cream"},
+    "competitor": {"name": "Other Cream"},
+    "content_blocks": {"comparison_rows": [["Price", "$50", "$40"]], "comparison_verdict": "Close call."},
+}
+
+def test_compiled_template_matches_render():
+    engine = TemplateEngine()
+    compiled = engine.compile(COMPARISON_PAGE_TEMPLATE)
+    assert compiled.render(CONTEXT) == engine.render(COMPARISON_PAGE_TEMPLATE, CONTEXT)
+    assert compiled.render({}) == engine.render(COMPARISON_PAGE_TEMPLATE, {})
+
+def test_compiled_template_keeps_whole_value_objects():
+    compiled = TemplateEngine().compile({"rows": "{{ content_blocks.comparison_rows }}", "n": 3})
+    page = compiled.render(CONTEXT)
+    assert page == {"rows": [["Price", "$50", "$40"]], "n": 3}
+    assert page["rows"] is CONTEXT["content_blocks"]["comparison_rows"]
+
+def test_compiled_template_interpolates_and_keeps_missing_placeholders():
+    compiled = TemplateEngine().compile({"title": "{{ product.name }} vs {{ missing.name }}!"})
+    assert compiled.render(CONTEXT) == {"title": "Test Cream vs {{ missing.name }}!"}
@@ -0,0 +1,42 @@
+import json
+import pytest
+from src.core.encoding import INDENTED
+from src.core.orchestration import Orchestrator
+from src.core.variants import VariantSpec
+
+PRODUCT = {"Product Name": "GlowBoost Serum", "Price": "$50", "Concentration": "10% Vitamin C",
+           "Skin Type": "Oily", "Key Ingredients": "Vitamin C, Hyaluronic Acid", "Benefits": "Brightening",
+           "How to Use": "Apply 2 drops", "Side Effects": "Mild tingling"}
+
+def test_variant_pages_are_rendered_next_to_the_default_pages():
+    orchestrator = Orchestrator(variants=["fr", "en:b"])
+    product = orchestrator.parse(PRODUCT)
+
+    pages = orchestrator.generate_pages(product)
+    encoded = orchestrator.generate_pages(product, INDENTED)
+
+    default = Orchestrator().generate_pages(product)
+    assert {name: pages[name] for name in default} == default
+    assert set(pages) == set(default) | {f"{name}.{suffix}" for name in default for suffix in ("fr", "en-b")}
+    assert pages["faq_page.fr"]["sections"][0]["q_and_a"][0]["question"].startswith("À quelle fréquence")
+    assert pages["faq_page.en-b"]["sections"][0]["q_and_a"] == default["faq_page"]["sections"][0]["q_and_a"]
+    assert pages["faq_page.en-b"]["page_title"] != default["faq_page"]["page_title"]
+    assert {name: json.loads(data) for name, data in encoded.items()} == pages
+
+def test_update_renders_only_the_variant_pages_that_depend_on_the_change():
+    orchestrator = Orchestrator(variants=["fr"])
+    previous = orchestrator.parse(PRODUCT)
+    updated = orchestrator.parse(dict(PRODUCT, **{"How to Use": "Apply 3 drops at night"}))
+
+    pages = orchestrator.update_pages(previous, updated)
+
+    assert set(pages) == {"faq_page", "product_page", "faq_page.fr", "product_page.fr"}
+    regenerated = orchestrator.generate_pages(updated)
+    assert pages == {name: regenerated[name] for name in pages}
+
+def test_unknown_variants_are_rejected():
+    assert VariantSpec.parse("en:b") == VariantSpec("en", "b")
+    with pytest.raises(ValueError):
+        VariantSpec.parse("de")
+    with pytest.raises(ValueError):
+        VariantSpec.parse("fr:z")